@@ -0,0 +1,122 @@
+"""
+Intersection Record
+Compact record type for a single intersection.
+
+An Intersection keeps its fields in __slots__, its list fields as tuples and
+its congestion level as a CongestionLevel member. Landmark, incident and
+peak hour strings are interned, so every record naming "Accident" or
+"Central Station" shares one string object. A record is a read-only mapping
+with the same keys and value types as an intersection dictionary.
+"""
+
+from collections.abc import Mapping
+from enum import Enum
+from sys import intern
+
+from intersection_store import CONGESTION_LEVELS, INTERSECTION_FIELDS, validate_intersection
+
+CongestionLevel = Enum("CongestionLevel", [(level.upper(), level) for level in CONGESTION_LEVELS])
+CongestionLevel.__doc__ = "Congestion levels, in CONGESTION_LEVELS order."
+
+
+class Intersection(Mapping):
+    """
+    Read-only intersection record with dictionary-style access.
+
+    Indexing returns the same values an intersection dictionary holds: a
+    string congestion level, a coordinate tuple and fresh lists for the list
+    fields. Attributes expose the compact forms directly.
+    """
+
+    __slots__ = ("name", "latitude", "longitude", "traffic_volume", "congestion_level",
+                 "peak_hours", "nearby_landmarks", "incident_history", "newly_added", "extras")
+
+    def __init__(self, name, latitude, longitude, traffic_volume, congestion_level,
+                 peak_hours=(), nearby_landmarks=(), incident_history=(), newly_added=False, extras=None):
+        self.name = name
+        self.latitude = latitude
+        self.longitude = longitude
+        self.traffic_volume = traffic_volume
+        self.congestion_level = CongestionLevel(congestion_level)
+        self.peak_hours = tuple(intern(period) for period in peak_hours)
+        self.nearby_landmarks = tuple(intern(landmark) for landmark in nearby_landmarks)
+        self.incident_history = tuple(intern(incident) for incident in incident_history)
+        self.newly_added = bool(newly_added)
+        self.extras = extras or None
+
+    @classmethod
+    def from_dict(cls, intersection):
+        """
+        Build a record from an intersection dictionary.
+
+        Args:
+            intersection (dict): Intersection data
+
+        Returns:
+            Intersection: Record holding the same fields
+        """
+        error = validate_intersection(intersection)
+        if error is not None:
+            raise ValueError(error)
+        latitude, longitude = intersection["coordinates"]
+        extras = {key: value for key, value in intersection.items()
+                  if key not in INTERSECTION_FIELDS and key != "newly_added"}
+        return cls(
+            intersection["name"], latitude, longitude, intersection["traffic_volume"],
+            intersection["congestion_level"], intersection["peak_hours"],
+            intersection["nearby_landmarks"], intersection["incident_history"],
+            intersection.get("newly_added", False), extras
+        )
+
+    def __getitem__(self, key):
+        if key == "name":
+            return self.name
+        if key == "coordinates":
+            return (self.latitude, self.longitude)
+        if key == "traffic_volume":
+            return self.traffic_volume
+        if key == "congestion_level":
+            return self.congestion_level.value
+        if key == "peak_hours":
+            return list(self.peak_hours)
+        if key == "nearby_landmarks":
+            return list(self.nearby_landmarks)
+        if key == "incident_history":
+            return list(self.incident_history)
+        if key == "newly_added" and self.newly_added:
+            return True
+        if self.extras and key in self.extras:
+            return self.extras[key]
+        raise KeyError(key)
+
+    def _keys(self):
+        keys = list(INTERSECTION_FIELDS)
+        if self.newly_added:
+            keys.append("newly_added")
+        if self.extras:
+            keys.extend(self.extras)
+        return keys
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self):
+        return f"Intersection({dict(self)!r})"
+
+
+def compact_intersections(intersection_data):
+    """
+    Convert an intersection data dictionary to Intersection records.
+
+    Args:
+        intersection_data (dict): The intersection data dictionary
+
+    Returns:
+        dict: Intersection records keyed by intersection ID
+    """
+    if intersection_data is None:
+        raise ValueError("Intersection data cannot be None")
+    return {iid: Intersection.from_dict(intersection) for iid, intersection in intersection_data.items()}
@@ -0,0 +1,866 @@
+"""
+Intersection Store
+Columnar (struct-of-arrays) storage for intersection data with a dict-compatible view.
+"""
+
+import heapq
+import threading
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from contextlib import contextmanager
+from itertools import count
+from sys import intern
+
+from traffic_indexes import INDEX_TYPES, MAX_INDEXED_VOLUME, haversine_distance, parse_time_period
+
+CONGESTION_LEVELS = ("Low", "Moderate", "High", "Severe", "Critical")
+LEVEL_CODES = {level: code for code, level in enumerate(CONGESTION_LEVELS)}
+
+# Source of content version tokens; every store mutation takes the next one
+_versions = count(1)
+# bulk_update rebuilds an index when change_count times its rebuild factor exceeds the row count
+DEFAULT_REBUILD_FACTOR = 8
+
+VOLUME_BRACKETS = ("low", "medium", "high", "very_high")
+# Inclusive upper volume of every bracket except the last
+VOLUME_BRACKET_LIMITS = (750, 1500, 2000)
+
+# Guards the index bookkeeping that copy() reads against lazy index builds in reader threads
+_index_lock = threading.Lock()
+
+# Largest traffic volume a store accepts, bounded by the packed volume index keys
+MAX_TRAFFIC_VOLUME = MAX_INDEXED_VOLUME
+
+# Per-row columns of a store, shared between copies until written
+_COLUMNS = ("_ids", "_rows", "_names", "_volumes", "_latitudes", "_longitudes", "_levels",
+            "_peak_hours", "_landmarks", "_incidents", "_newly_added", "_extras")
+
+INTERSECTION_FIELDS = (
+    "name", "coordinates", "traffic_volume", "congestion_level",
+    "peak_hours", "nearby_landmarks", "incident_history"
+)
+
+
+def encode_congestion_level(level):
+    """
+    Convert a congestion level name to its one-byte column code.
+
+    Args:
+        level (str): Congestion level name
+
+    Returns:
+        int: Code of the congestion level
+    """
+    if level not in LEVEL_CODES:
+        raise ValueError(f"Invalid congestion level. Must be one of {list(CONGESTION_LEVELS)}")
+    return LEVEL_CODES[level]
+
+
+def validate_intersection(intersection):
+    """
+    Check an intersection record against the platform's data rules.
+
+    Args:
+        intersection (dict): Intersection record
+
+    Returns:
+        str: Error message, or None if the record is valid
+    """
+    if not isinstance(intersection, Mapping):
+        return "Intersection must be a dictionary"
+    for field in INTERSECTION_FIELDS:
+        if field not in intersection:
+            return f"Missing field {field}"
+
+    name = intersection["name"]
+    if not isinstance(name, str) or name == "":
+        return "Name cannot be None or empty"
+
+    coordinates = intersection["coordinates"]
+    if (not isinstance(coordinates, (tuple, list)) or len(coordinates) != 2
+            or not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in coordinates)
+            or not -90 <= coordinates[0] <= 90 or not -180 <= coordinates[1] <= 180):
+        return "Coordinates must be a valid latitude and longitude"
+
+    volume = intersection["traffic_volume"]
+    if not isinstance(volume, int) or isinstance(volume, bool) or volume < 0:
+        return "Traffic volume must be a non-negative integer"
+    if volume > MAX_TRAFFIC_VOLUME:
+        return f"Traffic volume cannot exceed {MAX_TRAFFIC_VOLUME}"
+
+    if intersection["congestion_level"] not in LEVEL_CODES:
+        return f"Invalid congestion level. Must be one of {list(CONGESTION_LEVELS)}"
+
+    for field in ("peak_hours", "nearby_landmarks", "incident_history"):
+        values = intersection[field]
+        if not isinstance(values, (tuple, list)) or not all(isinstance(value, str) for value in values):
+            return f"Field {field} must be a list of strings"
+    try:
+        for period in intersection["peak_hours"]:
+            parse_time_period(period)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+class IntersectionRecord(Mapping):
+    """
+    Read-only dict-style view of one row of an IntersectionStore.
+
+    Fields are read from the columns on access, so building a filter result
+    does not copy any intersection data.
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def __getitem__(self, key):
+        store, row = self._store, self._row
+        if key == "traffic_volume":
+            return store._volumes[row]
+        if key == "congestion_level":
+            return CONGESTION_LEVELS[store._levels[row]]
+        if key == "name":
+            return store._names[row]
+        if key == "coordinates":
+            return (store._latitudes[row], store._longitudes[row])
+        if key == "peak_hours":
+            return list(store._peak_hours[row])
+        if key == "nearby_landmarks":
+            return list(store._landmarks[row])
+        if key == "incident_history":
+            return list(store._incidents[row])
+        if key == "newly_added" and store._newly_added[row]:
+            return True
+        if row in store._extras and key in store._extras[row]:
+            return store._extras[row][key]
+        raise KeyError(key)
+
+    def _keys(self):
+        keys = list(INTERSECTION_FIELDS)
+        if self._store._newly_added[self._row]:
+            keys.append("newly_added")
+        keys.extend(self._store._extras.get(self._row, ()))
+        return keys
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class IntersectionStore(Mapping):
+    """
+    Columnar intersection storage.
+
+    Every intersection gets a dense integer row. Traffic volumes and coordinates
+    live in typed arrays and the congestion level is kept as a one-byte code, so
+    scans run over contiguous columns instead of per-record dictionaries.
+    The store is a read-only mapping of intersection ID to a record view,
+    which keeps it usable wherever an intersection_data dictionary is expected.
+
+    Secondary indexes are optional. Once created with create_index they are
+    kept current by every mutation and used by the matching row queries. An
+    index created lazily is built from the columns on its first use instead.
+    Congestion level counts, the total volume and volume bracket counts are
+    always maintained from the same mutation deltas, so reading them is O(1).
+
+    Copies are copy-on-write: a copy shares every column and index with its
+    source, and a mutation copies only the columns and indexes it touches, so
+    updating one field of a copy costs one column copy instead of the store.
+    That is still O(n) per update, a memcpy of the column plus a copy of the
+    field's indexes; only PersistentMap derives a version in O(log n).
+    """
+
+    def __init__(self):
+        self._ids = []
+        self._rows = {}
+        self._names = []
+        self._volumes = array("q")
+        self._latitudes = array("d")
+        self._longitudes = array("d")
+        self._levels = bytearray()
+        self._peak_hours = []
+        self._landmarks = []
+        self._incidents = []
+        self._newly_added = bytearray()
+        self._extras = {}
+        self._indexes = {}
+        self._level_counts = [0] * len(CONGESTION_LEVELS)
+        self._total_volume = 0
+        self._bracket_counts = [0] * len(VOLUME_BRACKETS)
+        self._brackets = None
+        self._version = next(_versions)
+        # Columns and index fields still shared with another store
+        self._shared = set()
+        self._shared_indexes = set()
+        # Index fields created lazily and not built yet
+        self._pending_indexes = set()
+
+    @classmethod
+    def from_dict(cls, intersection_data, indexes=()):
+        """
+        Build a store from an intersection data dictionary.
+
+        Args:
+            intersection_data (dict): The intersection data dictionary
+            indexes (iterable): Fields to create secondary indexes on
+
+        Returns:
+            IntersectionStore: Store holding the same intersections
+        """
+        if intersection_data is None:
+            raise ValueError("Intersection data cannot be None")
+
+        store = cls()
+        for iid, intersection in intersection_data.items():
+            store.upsert(iid, intersection)
+        for field in indexes:
+            store.create_index(field)
+        return store
+
+    @classmethod
+    def from_columns(cls, ids, names, latitudes, longitudes, volumes, levels, peak_hours,
+                     landmarks, incidents, newly_added=None, extras=None, aggregates=None):
+        """
+        Build a store that adopts already validated columns without copying them.
+
+        The list columns may be any mutable sequence supporting append, extend,
+        item assignment and copy, which lets a loader hand over lazily decoded
+        columns.
+
+        Args:
+            ids (list): Distinct intersection IDs
+            names (list): Names
+            latitudes (array): Latitudes as array("d")
+            longitudes (array): Longitudes as array("d")
+            volumes (array): Traffic volumes as array("q")
+            levels (bytearray): Congestion level codes
+            peak_hours (sequence): Tuples of peak hour periods
+            landmarks (sequence): Tuples of landmark names
+            incidents (sequence): Tuples of incidents
+            newly_added (bytearray): Newly added flags; all clear if None
+            extras (dict): Extra fields keyed by row
+            aggregates (tuple): Precomputed (level_counts, total_volume, bracket_counts);
+                recomputed from the columns if None
+
+        Returns:
+            IntersectionStore: Store backed by the given columns
+        """
+        count = len(ids)
+        columns = (names, latitudes, longitudes, volumes, levels, peak_hours, landmarks, incidents)
+        if any(len(column) != count for column in columns):
+            raise ValueError("All columns must have one entry per intersection")
+
+        store = cls()
+        store._ids = ids
+        store._rows = dict(zip(ids, range(count)))
+        if len(store._rows) != count:
+            raise ValueError("Intersection IDs must be distinct")
+        store._names = names
+        store._latitudes = latitudes
+        store._longitudes = longitudes
+        store._volumes = volumes
+        store._levels = levels
+        store._peak_hours = peak_hours
+        store._landmarks = landmarks
+        store._incidents = incidents
+        store._newly_added = newly_added if newly_added is not None else bytearray(count)
+        store._extras = extras or {}
+
+        if aggregates is None:
+            level_counts = [levels.count(code) for code in range(len(CONGESTION_LEVELS))]
+            bracket_counts = [0] * len(VOLUME_BRACKETS)
+            for volume in volumes:
+                bracket_counts[bisect_left(VOLUME_BRACKET_LIMITS, volume)] += 1
+            aggregates = (level_counts, sum(volumes), bracket_counts)
+        level_counts, total_volume, bracket_counts = aggregates
+        store._level_counts = list(level_counts)
+        store._total_volume = total_volume
+        store._bracket_counts = list(bracket_counts)
+        return store
+
+    def export_columns(self):
+        """
+        Return the store's columns for serialization.
+
+        The returned objects are the live columns and must not be modified.
+
+        Returns:
+            dict: Columns keyed by the matching from_columns argument name
+        """
+        return {
+            "ids": self._ids, "names": self._names,
+            "latitudes": self._latitudes, "longitudes": self._longitudes,
+            "volumes": self._volumes, "levels": self._levels,
+            "peak_hours": self._peak_hours, "landmarks": self._landmarks,
+            "incidents": self._incidents, "newly_added": self._newly_added,
+            "extras": self._extras
+        }
+
+    # Mapping interface
+
+    def __getitem__(self, intersection_id):
+        return self._record(self._rows[intersection_id])
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, intersection_id):
+        return intersection_id in self._rows
+
+    def __repr__(self):
+        return f"IntersectionStore({len(self._ids)} intersections)"
+
+    def _record(self, row):
+        """Return the read-only record view for a row."""
+        return IntersectionRecord(self, row)
+
+    @property
+    def version(self):
+        """Token identifying the current contents; every mutation changes it."""
+        return self._version
+
+    def row_of(self, intersection_id):
+        """Return the dense row number of an intersection ID."""
+        return self._rows[intersection_id]
+
+    def records(self, rows):
+        """
+        Build an intersection dictionary of record views for a sequence of rows.
+
+        Args:
+            rows (iterable): Row numbers to include
+
+        Returns:
+            dict: Intersection dictionary in the order the rows were given
+        """
+        ids = self._ids
+        return {ids[row]: IntersectionRecord(self, row) for row in rows}
+
+    def record_rows(self, result):
+        """
+        Return the rows behind a dictionary of this store's record views.
+
+        Args:
+            result (dict): Dictionary that records returned
+
+        Returns:
+            list: Rows in the dictionary's order, or None if any value is not a
+                record view of this store
+        """
+        rows = []
+        for value in result.values():
+            if type(value) is not IntersectionRecord or value._store is not self:
+                return None
+            rows.append(value._row)
+        return rows
+
+    def copy(self):
+        """
+        Create an independent copy of the store.
+
+        Columns and indexes are shared until either store mutates them, so a
+        copy is O(1) in the number of intersections.
+
+        Returns:
+            IntersectionStore: Copy that no later mutation of either store affects
+        """
+        clone = IntersectionStore.__new__(IntersectionStore)
+        for name in _COLUMNS:
+            setattr(clone, name, getattr(self, name))
+        with _index_lock:
+            clone._indexes = self._indexes.copy()
+            clone._pending_indexes = self._pending_indexes.copy()
+            # Both sides copy a shared column or index before their first write to it
+            self._shared.update(_COLUMNS)
+            self._shared_indexes.update(clone._indexes)
+            clone._shared = set(_COLUMNS)
+            clone._shared_indexes = set(clone._indexes)
+        clone._level_counts = self._level_counts.copy()
+        clone._total_volume = self._total_volume
+        clone._bracket_counts = self._bracket_counts.copy()
+        # Cached bracket lists are never mutated, so copies can share them
+        clone._brackets = self._brackets
+        # Equal contents, so the copy keeps the version until either side changes
+        clone._version = self._version
+        return clone
+
+    def _own(self, *names):
+        """Replace shared columns with private copies before they are written."""
+        for name in names:
+            if name in self._shared:
+                column = getattr(self, name)
+                setattr(self, name, array(column.typecode, column) if isinstance(column, array)
+                        else column.copy())
+                self._shared.discard(name)
+
+    def _own_index(self, field):
+        """Return the index on a field, copying it first if it is shared."""
+        if field in self._shared_indexes:
+            self._indexes[field] = self._indexes[field].copy()
+            self._shared_indexes.discard(field)
+        return self._indexes[field]
+
+    # Secondary indexes
+
+    def create_index(self, field, lazy=False):
+        """
+        Create a secondary index on a field and keep it current from now on.
+
+        Args:
+            field (str): Field to index, one of the keys of INDEX_TYPES
+            lazy (bool): Defer building the index until a query first uses it
+        """
+        if field not in INDEX_TYPES:
+            raise ValueError(f"Invalid index field. Must be one of {list(INDEX_TYPES)}")
+        if field in self._indexes:
+            return
+        if lazy:
+            self._pending_indexes.add(field)
+            return
+
+        self._pending_indexes.discard(field)
+        self._indexes[field] = self._build_index(field)
+
+    def _build_index(self, field):
+        """Build an index on a field from the current columns."""
+        index = INDEX_TYPES[field]()
+        index.build(self._field_value(row, index.field) for row in range(len(self._ids)))
+        return index
+
+    def _built_index(self, field):
+        """Return the index on a field, building a lazily created one first, or None if it has none."""
+        index = self._indexes.get(field)
+        if index is None and field in self._pending_indexes:
+            # Built outside the lock; readers racing on the same store build equal indexes
+            index = self._build_index(field)
+            with _index_lock:
+                if field in self._pending_indexes:
+                    self._indexes[field] = index
+                    self._pending_indexes.discard(field)
+                else:
+                    index = self._indexes.get(field)
+        return index
+
+    @contextmanager
+    def bulk_update(self, change_count, fields=None):
+        """
+        Apply many changes with index maintenance deferred when that is cheaper.
+
+        When change_count is a large enough fraction of the store, the indexes on
+        the changed fields are dropped on entry and rebuilt once on exit instead
+        of being updated per change. An index whose per-change cost grows with
+        the store declares a larger rebuild_factor, so it is rebuilt sooner.
+
+        Args:
+            change_count (int): Expected number of rows to be changed or inserted
+            fields (iterable): Fields that will change, or None for all fields
+        """
+        deferred = [field for field, index in self._indexes.items()
+                    if (fields is None or index.field in fields)
+                    and change_count * getattr(index, "rebuild_factor", DEFAULT_REBUILD_FACTOR) > len(self._ids)]
+        for field in deferred:
+            del self._indexes[field]
+            self._shared_indexes.discard(field)
+        try:
+            yield self
+        finally:
+            for field in deferred:
+                self.create_index(field)
+
+    def drop_index(self, field):
+        """Remove the secondary index on a field, if there is one."""
+        self._indexes.pop(field, None)
+        self._shared_indexes.discard(field)
+        self._pending_indexes.discard(field)
+
+    def index(self, field):
+        """Return the secondary index on a field, or None if it has none."""
+        return self._built_index(field)
+
+    def has_index(self, field):
+        """Return True if a secondary index exists on the field, built or not."""
+        return field in self._indexes or field in self._pending_indexes
+
+    def _field_value(self, row, field):
+        """Return the raw column value that indexes on a field are keyed by."""
+        if field == "congestion_level":
+            return self._levels[row]
+        if field == "traffic_volume":
+            return self._volumes[row]
+        if field == "coordinates":
+            return (self._latitudes[row], self._longitudes[row])
+        if field == "peak_hours":
+            return self._peak_hours[row]
+        if field == "nearby_landmarks":
+            return self._landmarks[row]
+        if field == "incident_history":
+            return self._incidents[row]
+        raise ValueError(f"Field {field} cannot be indexed")
+
+    def _aggregate(self, row, field, sign):
+        """Add (sign 1) or subtract (sign -1) a row's contribution to the aggregates."""
+        if field is None or field == "traffic_volume":
+            volume = self._volumes[row]
+            self._total_volume += sign * volume
+            self._bracket_counts[bisect_left(VOLUME_BRACKET_LIMITS, volume)] += sign
+            self._brackets = None
+        if field is None or field == "congestion_level":
+            self._level_counts[self._levels[row]] += sign
+
+    def _unindex(self, row, field=None):
+        """Remove a row from the aggregates and the indexes on a field (all if field is None)."""
+        self._aggregate(row, field, -1)
+        for name, index in list(self._indexes.items()):
+            if field is None or index.field == field:
+                self._own_index(name).remove(row, self._field_value(row, index.field))
+
+    def _index(self, row, field=None):
+        """Add a row to the aggregates and the indexes on a field (all if field is None)."""
+        self._aggregate(row, field, 1)
+        for name, index in list(self._indexes.items()):
+            if field is None or index.field == field:
+                self._own_index(name).add(row, self._field_value(row, index.field))
+        self._version = next(_versions)
+
+    # In-place mutation, used by the update functions on a fresh copy
+
+    def upsert(self, intersection_id, intersection):
+        """
+        Insert an intersection, or replace it if the ID already exists.
+
+        Args:
+            intersection_id (str): Intersection ID
+            intersection (dict): Intersection record
+        """
+        latitude, longitude = intersection["coordinates"]
+        volume = intersection["traffic_volume"]
+        level = encode_congestion_level(intersection["congestion_level"])
+        peak_hours = tuple(intersection["peak_hours"])
+        landmarks = tuple(intern(landmark) for landmark in intersection["nearby_landmarks"])
+        incidents = tuple(intersection["incident_history"])
+        newly_added = 1 if intersection.get("newly_added", False) else 0
+        extra = {key: value for key, value in intersection.items()
+                 if key not in INTERSECTION_FIELDS and key != "newly_added"}
+
+        self._own(*_COLUMNS)
+        row = self._rows.get(intersection_id)
+        if row is None:
+            row = len(self._ids)
+            self._rows[intersection_id] = row
+            self._ids.append(intersection_id)
+            self._names.append(intersection["name"])
+            self._volumes.append(volume)
+            self._latitudes.append(latitude)
+            self._longitudes.append(longitude)
+            self._levels.append(level)
+            self._peak_hours.append(peak_hours)
+            self._landmarks.append(landmarks)
+            self._incidents.append(incidents)
+            self._newly_added.append(newly_added)
+        else:
+            self._unindex(row)
+            self._names[row] = intersection["name"]
+            self._volumes[row] = volume
+            self._latitudes[row] = latitude
+            self._longitudes[row] = longitude
+            self._levels[row] = level
+            self._peak_hours[row] = peak_hours
+            self._landmarks[row] = landmarks
+            self._incidents[row] = incidents
+            self._newly_added[row] = newly_added
+
+        if extra:
+            self._extras[row] = extra
+        else:
+            self._extras.pop(row, None)
+        self._index(row)
+
+    def extend_columns(self, ids, names, latitudes, longitudes, volumes, level_codes,
+                       peak_hours, landmarks, incidents, newly_added=None, extras=None):
+        """
+        Append already validated intersections column by column.
+
+        This is the bulk-load path: columns grow with one extend call each and
+        the aggregates are updated once for the whole batch. The IDs must be
+        distinct and not yet in the store; use upsert for replacements.
+
+        Args:
+            ids (list): Intersection IDs
+            names (list): Names
+            latitudes (list): Latitudes
+            longitudes (list): Longitudes
+            volumes (list): Traffic volumes
+            level_codes (list): Congestion level codes
+            peak_hours (list): Tuples of peak hour periods
+            landmarks (list): Tuples of interned landmark names
+            incidents (list): Tuples of incidents
+            newly_added (bytes): Newly added flags; all clear if None
+            extras (dict): Extra fields keyed by position in ids
+        """
+        self._own(*_COLUMNS)
+        start = len(self._ids)
+        rows = self._rows
+        for row, iid in enumerate(ids, start):
+            if iid in rows:
+                for added in ids[:row - start]:
+                    del rows[added]
+                raise ValueError(f"Intersection ID {iid} already exists")
+            rows[iid] = row
+
+        self._ids.extend(ids)
+        self._names.extend(names)
+        self._latitudes.extend(latitudes)
+        self._longitudes.extend(longitudes)
+        self._volumes.extend(volumes)
+        self._levels.extend(level_codes)
+        self._peak_hours.extend(peak_hours)
+        self._landmarks.extend(landmarks)
+        self._incidents.extend(incidents)
+        self._newly_added.extend(newly_added if newly_added is not None else bytes(len(ids)))
+        if extras:
+            self._extras.update((start + position, extra) for position, extra in extras.items())
+
+        codes = bytes(level_codes)
+        for code in range(len(CONGESTION_LEVELS)):
+            self._level_counts[code] += codes.count(code)
+        self._total_volume += sum(volumes)
+        for volume in volumes:
+            self._bracket_counts[bisect_left(VOLUME_BRACKET_LIMITS, volume)] += 1
+        self._brackets = None
+        self._version = next(_versions)
+
+        if self._indexes:
+            indexes = [self._own_index(name) for name in list(self._indexes)]
+            for row in range(start, len(self._ids)):
+                for index in indexes:
+                    index.add(row, self._field_value(row, index.field))
+
+    def set_traffic_volume(self, intersection_id, new_volume):
+        """Set the traffic volume of an existing intersection in place."""
+        # Checked before anything is unindexed, so a rejected value leaves the store intact
+        if not isinstance(new_volume, int) or isinstance(new_volume, bool):
+            raise ValueError("Traffic volume of a store must be an integer")
+        if not 0 <= new_volume <= MAX_TRAFFIC_VOLUME:
+            raise ValueError(f"Traffic volume must be between 0 and {MAX_TRAFFIC_VOLUME}")
+        row = self._rows[intersection_id]
+        self._own("_volumes")
+        self._unindex(row, "traffic_volume")
+        self._volumes[row] = new_volume
+        self._index(row, "traffic_volume")
+
+    def set_congestion_level(self, intersection_id, new_level):
+        """Set the congestion level of an existing intersection in place."""
+        row = self._rows[intersection_id]
+        code = encode_congestion_level(new_level)
+        self._own("_levels")
+        self._unindex(row, "congestion_level")
+        self._levels[row] = code
+        self._index(row, "congestion_level")
+
+    def add_incident(self, intersection_id, incident):
+        """
+        Append an incident to an intersection's history in place.
+
+        Returns:
+            bool: True if the incident was added, False if it was already recorded
+        """
+        row = self._rows[intersection_id]
+        if incident in self._incidents[row]:
+            return False
+        self._own("_incidents")
+        self._unindex(row, "incident_history")
+        self._incidents[row] = self._incidents[row] + (incident,)
+        self._index(row, "incident_history")
+        return True
+
+    # Column scans
+
+    def rows_with_congestion_level(self, level):
+        """Return the rows at a congestion level, in row order."""
+        code = LEVEL_CODES.get(level)
+        if code is None:
+            return []
+        index = self._built_index("congestion_level")
+        if index is not None:
+            return index.rows(code)
+        # bytearray.find skips non-matching rows at C speed
+        levels, rows = self._levels, []
+        row = levels.find(code)
+        while row != -1:
+            rows.append(row)
+            row = levels.find(code, row + 1)
+        return rows
+
+    def rows_in_volume_range(self, min_volume, max_volume):
+        """Return the rows whose volume lies in [min_volume, max_volume]."""
+        index = self._built_index("traffic_volume")
+        if index is not None:
+            return index.rows_in_range(min_volume, max_volume)
+        return [row for row, volume in enumerate(self._volumes)
+                if min_volume <= volume <= max_volume]
+
+    def rows_with_peak_hour(self, time_period):
+        """Return the rows listing an exact peak hour period."""
+        index = self._built_index("peak_hours")
+        if index is not None:
+            return index.rows_with_period(time_period)
+        return [row for row, peak_hours in enumerate(self._peak_hours)
+                if time_period in peak_hours]
+
+    def rows_in_peak_at(self, minute):
+        """Return the rows with a peak period containing a minute of the day."""
+        index = self._built_index("peak_hours")
+        if index is not None:
+            return index.rows_at(minute)
+        return [row for row, peak_hours in enumerate(self._peak_hours)
+                if any(start <= minute < end
+                       for period in peak_hours for start, end in parse_time_period(period))]
+
+    def rows_with_peak_overlap(self, intervals):
+        """Return the rows with a peak period overlapping any of the (start, end) intervals."""
+        index = self._built_index("peak_hours")
+        if index is not None:
+            return index.rows_overlapping(intervals)
+        return [row for row, peak_hours in enumerate(self._peak_hours)
+                if any(start < query_end and query_start < end
+                       for period in peak_hours for start, end in parse_time_period(period)
+                       for query_start, query_end in intervals)]
+
+    def rows_with_incident(self, incident_type):
+        """Return the rows with an incident containing incident_type."""
+        index = self._built_index("incident_history")
+        if index is not None:
+            return index.rows_containing(incident_type)
+        return [row for row, incidents in enumerate(self._incidents)
+                if any(incident_type in incident for incident in incidents)]
+
+    def rows_near_landmark(self, landmark):
+        """Return the rows with a landmark containing landmark, ignoring case."""
+        index = self._built_index("nearby_landmarks")
+        if index is not None:
+            return index.rows_containing(landmark)
+        needle = landmark.lower()
+        return [row for row, landmarks in enumerate(self._landmarks)
+                if any(needle in name.lower() for name in landmarks)]
+
+    def rows_with_incident_count_above(self, threshold):
+        """Return the rows with more than threshold incidents."""
+        index = self._built_index("incident_count")
+        if index is not None:
+            return index.rows_above(threshold)
+        return [row for row, incidents in enumerate(self._incidents)
+                if len(incidents) > threshold]
+
+    def top_rows_by_incident_count(self, k):
+        """Return up to k rows with the most incidents, most first and ties in row order."""
+        index = self._built_index("incident_count")
+        if index is not None:
+            return index.top_rows(k)
+        incidents = self._incidents
+        return heapq.nsmallest(k, range(len(incidents)), key=lambda row: (-len(incidents[row]), row))
+
+    def rows_in_bbox(self, min_latitude, min_longitude, max_latitude, max_longitude):
+        """Return the rows inside a latitude/longitude bounding box, edges included."""
+        index = self._built_index("coordinates")
+        if index is not None:
+            return index.rows_in_bbox(min_latitude, min_longitude, max_latitude, max_longitude)
+        return [row for row, (latitude, longitude) in enumerate(zip(self._latitudes, self._longitudes))
+                if min_latitude <= latitude <= max_latitude and min_longitude <= longitude <= max_longitude]
+
+    def rows_within_radius(self, center, radius_m):
+        """Return the rows within radius_m meters of a (latitude, longitude) point."""
+        index = self._built_index("coordinates")
+        if index is not None:
+            return index.rows_within_radius(center, radius_m)
+        return [row for row, coordinates in enumerate(zip(self._latitudes, self._longitudes))
+                if haversine_distance(center, coordinates) <= radius_m]
+
+    def nearest_rows(self, center, k):
+        """Return (distance_m, row) pairs for the k rows closest to a point, closest first."""
+        index = self._built_index("coordinates")
+        if index is not None:
+            return index.nearest_rows(center, k)
+        return heapq.nsmallest(k, ((haversine_distance(center, coordinates), row) for row, coordinates
+                                   in enumerate(zip(self._latitudes, self._longitudes))))
+
+    def top_rows_by_volume(self, n):
+        """Return up to n rows with the highest traffic volumes, highest first."""
+        index = self._built_index("traffic_volume")
+        if index is not None:
+            return index.top_rows(n)
+        volumes = self._volumes
+        # Ties go to the earlier row, matching the order of the volume index
+        return heapq.nlargest(n, range(len(volumes)), key=lambda row: (volumes[row], -row))
+
+    def volume_at_rank(self, rank):
+        """Return the traffic volume at a zero-based rank in ascending order."""
+        index = self._built_index("traffic_volume")
+        if index is not None:
+            return index.volume_at_rank(rank)
+        return sorted(self._volumes)[rank]
+
+    # Aggregates
+
+    def congestion_distribution(self):
+        """
+        Count intersections per congestion level from the maintained counts.
+
+        Returns:
+            dict: Counts of the levels in use, in CONGESTION_LEVELS order
+        """
+        return {level: count for level, count in zip(CONGESTION_LEVELS, self._level_counts) if count}
+
+    def total_traffic_volume(self):
+        """Return the maintained sum of all traffic volumes."""
+        return self._total_volume
+
+    def volume_bracket_counts(self):
+        """Return the maintained number of intersections in each volume bracket."""
+        return dict(zip(VOLUME_BRACKETS, self._bracket_counts))
+
+    def volume_brackets(self):
+        """
+        Group intersection IDs into the low/medium/high/very_high volume brackets.
+
+        The grouping is cached until the next volume change.
+
+        Returns:
+            dict: Lists of intersection IDs keyed by bracket name
+        """
+        if self._brackets is None:
+            brackets = tuple([] for _ in VOLUME_BRACKETS)
+            for iid, volume in zip(self._ids, self._volumes):
+                brackets[bisect_left(VOLUME_BRACKET_LIMITS, volume)].append(iid)
+            self._brackets = brackets
+        return {name: list(ids) for name, ids in zip(VOLUME_BRACKETS, self._brackets)}
+
+    def aggregates_consistent(self):
+        """
+        Compare the maintained aggregates with a full recompute from the columns.
+
+        Returns:
+            bool: True if every maintained aggregate matches the recomputed value
+        """
+        level_counts = [self._levels.count(code) for code in range(len(CONGESTION_LEVELS))]
+        bracket_counts = [0] * len(VOLUME_BRACKETS)
+        for volume in self._volumes:
+            bracket_counts[bisect_left(VOLUME_BRACKET_LIMITS, volume)] += 1
+        brackets_match = (self._brackets is None
+                          or [len(ids) for ids in self._brackets] == bracket_counts)
+        return (level_counts == self._level_counts
+                and sum(self._volumes) == self._total_volume
+                and bracket_counts == self._bracket_counts
+                and brackets_match)
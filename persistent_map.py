@@ -0,0 +1,357 @@
+"""
+Persistent Map
+Immutable hash array mapped trie (HAMT) used as an intersection_data dictionary.
+
+Setting a key copies only the nodes on the path from the root to that key,
+so every version costs O(log n) to derive and all older versions stay valid.
+A version derived from one whose insertion order is already materialized
+gets its own order by patching in the changed leaves instead of sorting.
+"""
+
+from bisect import bisect_left
+from collections.abc import Mapping
+from itertools import count
+
+_BITS = 5
+_BRANCHES = 1 << _BITS
+_MASK = _BRANCHES - 1
+_HASH_BITS = 64
+_HASH_MASK = (1 << _HASH_BITS) - 1
+# Source of version tokens; every derived map takes the next one
+_versions = count(1)
+
+
+class _Leaf:
+    """A key/value pair; seq records the order the key was first inserted."""
+
+    __slots__ = ("hash", "key", "value", "seq")
+
+    def __init__(self, key_hash, key, value, seq):
+        self.hash = key_hash
+        self.key = key
+        self.value = value
+        self.seq = seq
+
+
+class _CollisionNode:
+    """Leaves whose 64-bit hashes are identical."""
+
+    __slots__ = ("hash", "leaves")
+
+    def __init__(self, key_hash, leaves):
+        self.hash = key_hash
+        self.leaves = leaves
+
+    def find(self, key_hash, shift, key):
+        for leaf in self.leaves:
+            if leaf.key == key:
+                return leaf
+        return None
+
+    def assoc(self, key_hash, shift, leaf):
+        for position, existing in enumerate(self.leaves):
+            if existing.key == leaf.key:
+                leaf.seq = existing.seq
+                leaves = self.leaves[:position] + (leaf,) + self.leaves[position + 1:]
+                return _CollisionNode(self.hash, leaves), False
+        return _CollisionNode(self.hash, self.leaves + (leaf,)), True
+
+    def leaves_iter(self):
+        yield from self.leaves
+
+
+class _BitmapNode:
+    """Trie node holding up to 32 children, compressed by a population bitmap."""
+
+    __slots__ = ("bitmap", "children")
+
+    def __init__(self, bitmap, children):
+        self.bitmap = bitmap
+        self.children = children
+
+    def find(self, key_hash, shift, key):
+        bit = 1 << ((key_hash >> shift) & _MASK)
+        if not self.bitmap & bit:
+            return None
+        child = self.children[bin(self.bitmap & (bit - 1)).count("1")]
+        if isinstance(child, _Leaf):
+            return child if child.key == key else None
+        return child.find(key_hash, shift + _BITS, key)
+
+    def assoc(self, key_hash, shift, leaf):
+        bit = 1 << ((key_hash >> shift) & _MASK)
+        position = bin(self.bitmap & (bit - 1)).count("1")
+        children = self.children
+
+        if not self.bitmap & bit:
+            new_children = children[:position] + (leaf,) + children[position:]
+            return _BitmapNode(self.bitmap | bit, new_children), True
+
+        child = children[position]
+        if isinstance(child, _Leaf):
+            if child.key == leaf.key:
+                leaf.seq = child.seq
+                replacement, added = leaf, False
+            else:
+                replacement, added = _merge_leaves(child, leaf, shift + _BITS), True
+        else:
+            replacement, added = child.assoc(key_hash, shift + _BITS, leaf)
+
+        new_children = children[:position] + (replacement,) + children[position + 1:]
+        return _BitmapNode(self.bitmap, new_children), added
+
+    def assoc_many(self, shift, leaves):
+        """
+        Insert leaves with distinct keys, copying this node and each touched child once.
+
+        Returns:
+            tuple: (new node, number of keys added)
+        """
+        groups = {}
+        for leaf in leaves:
+            groups.setdefault((leaf.hash >> shift) & _MASK, []).append(leaf)
+
+        bitmap = self.bitmap
+        children = list(self.children)
+        added = 0
+        for fragment, group in groups.items():
+            bit = 1 << fragment
+            position = bin(bitmap & (bit - 1)).count("1")
+            if not bitmap & bit:
+                children.insert(position, group[0] if len(group) == 1 else _build_node(group, shift + _BITS))
+                bitmap |= bit
+                added += len(group)
+                continue
+
+            child = children[position]
+            if isinstance(child, _Leaf):
+                for leaf in group:
+                    if leaf.key == child.key:
+                        leaf.seq = child.seq
+                        break
+                else:
+                    group.append(child)
+                added += len(group) - 1
+                replacement = group[0] if len(group) == 1 else _build_node(group, shift + _BITS)
+            elif isinstance(child, _CollisionNode):
+                replacement = child
+                for leaf in group:
+                    replacement, leaf_added = replacement.assoc(leaf.hash, shift + _BITS, leaf)
+                    added += leaf_added
+            else:
+                replacement, group_added = child.assoc_many(shift + _BITS, group)
+                added += group_added
+            children[position] = replacement
+        return _BitmapNode(bitmap, tuple(children)), added
+
+    def leaves_iter(self):
+        for child in self.children:
+            if isinstance(child, _Leaf):
+                yield child
+            else:
+                yield from child.leaves_iter()
+
+
+def _merge_leaves(leaf, other_leaf, shift):
+    """Build the smallest subtree holding two leaves with different keys."""
+    if shift >= _HASH_BITS or leaf.hash == other_leaf.hash:
+        return _CollisionNode(leaf.hash, (leaf, other_leaf))
+
+    fragment = (leaf.hash >> shift) & _MASK
+    other_fragment = (other_leaf.hash >> shift) & _MASK
+    if fragment == other_fragment:
+        return _BitmapNode(1 << fragment, (_merge_leaves(leaf, other_leaf, shift + _BITS),))
+    if fragment < other_fragment:
+        return _BitmapNode((1 << fragment) | (1 << other_fragment), (leaf, other_leaf))
+    return _BitmapNode((1 << fragment) | (1 << other_fragment), (other_leaf, leaf))
+
+
+def _build_node(leaves, shift):
+    """Build a subtree bottom-up from leaves with distinct keys, without path copying."""
+    groups = {}
+    for leaf in leaves:
+        groups.setdefault((leaf.hash >> shift) & _MASK, []).append(leaf)
+
+    bitmap = 0
+    children = []
+    for fragment in sorted(groups):
+        group = groups[fragment]
+        bitmap |= 1 << fragment
+        if len(group) == 1:
+            children.append(group[0])
+        elif shift + _BITS >= _HASH_BITS or len({leaf.hash for leaf in group}) == 1:
+            children.append(_CollisionNode(group[0].hash, tuple(group)))
+        else:
+            children.append(_build_node(group, shift + _BITS))
+    return _BitmapNode(bitmap, tuple(children))
+
+
+_EMPTY_NODE = _BitmapNode(0, ())
+
+
+def _seq(leaf):
+    return leaf.seq
+
+
+def _apply_patch(ordered, leaves):
+    """Derive a version's insertion order from its parent's order and the leaves it set."""
+    ordered = list(ordered)
+    last_seq = ordered[-1].seq if ordered else -1
+    for leaf in leaves:
+        if leaf.seq > last_seq:
+            ordered.append(leaf)
+            last_seq = leaf.seq
+        else:
+            ordered[bisect_left(ordered, leaf.seq, key=_seq)] = leaf
+    return ordered
+
+
+class PersistentMap(Mapping):
+    """
+    Immutable mapping with O(log n) structural-sharing updates.
+
+    Iteration follows first-insertion order, like a dict. Replacing the value
+    of an existing key keeps its position.
+    """
+
+    __slots__ = ("_root", "_size", "_next_seq", "_ordered", "_patch", "_version", "__weakref__")
+
+    def __init__(self, data=None):
+        self._root = _EMPTY_NODE
+        self._size = 0
+        self._next_seq = 0
+        self._ordered = None
+        self._patch = None
+        self._version = next(_versions)
+        if data:
+            # Mapping keys are distinct, so the trie can be built in one pass
+            leaves = [_Leaf(hash(key) & _HASH_MASK, key, value, seq)
+                      for seq, (key, value) in enumerate(data.items())]
+            self._root = _build_node(leaves, 0)
+            self._size = self._next_seq = len(leaves)
+            self._ordered = leaves
+
+    @classmethod
+    def from_dict(cls, intersection_data):
+        """
+        Build a persistent map from an intersection data dictionary.
+
+        Args:
+            intersection_data (dict): The intersection data dictionary
+
+        Returns:
+            PersistentMap: Map holding the same intersections
+        """
+        if intersection_data is None:
+            raise ValueError("Intersection data cannot be None")
+        return cls(intersection_data)
+
+    def _assoc_in_place(self, key, value):
+        """Insert into this map while it is still being constructed."""
+        leaf = _Leaf(hash(key) & _HASH_MASK, key, value, self._next_seq)
+        self._root, added = self._root.assoc(leaf.hash, 0, leaf)
+        if added:
+            self._size += 1
+            self._next_seq += 1
+        self._ordered = None
+        if self._patch is not None:
+            self._patch[1].append(leaf)
+
+    def _derive(self):
+        """Return a new map sharing this map's root, ready for in-place inserts."""
+        clone = PersistentMap.__new__(PersistentMap)
+        clone._root = self._root
+        clone._size = self._size
+        clone._next_seq = self._next_seq
+        clone._ordered = None
+        # (parent order, leaves set since), kept only when the parent order exists
+        clone._patch = None if self._ordered is None else (self._ordered, [])
+        clone._version = next(_versions)
+        return clone
+
+    def set(self, key, value):
+        """
+        Return a new map with key bound to value, sharing all untouched nodes.
+
+        Args:
+            key: Key to set
+            value: Value to bind
+
+        Returns:
+            PersistentMap: The new version; this map is unchanged
+        """
+        clone = self._derive()
+        clone._assoc_in_place(key, value)
+        return clone
+
+    def update(self, items):
+        """
+        Return a new map with every (key, value) pair of a mapping applied.
+
+        Args:
+            items (dict): Mapping of keys to new values
+
+        Returns:
+            PersistentMap: The new version; this map is unchanged
+        """
+        clone = self._derive()
+        if len(items) == 1:
+            for key, value in items.items():
+                clone._assoc_in_place(key, value)
+            return clone
+
+        # Sequence numbers of replaced keys are restored during insertion
+        leaves = [_Leaf(hash(key) & _HASH_MASK, key, value, clone._next_seq + offset)
+                  for offset, (key, value) in enumerate(items.items())]
+        clone._root, added = clone._root.assoc_many(0, leaves)
+        if clone._patch is not None:
+            clone._patch[1].extend(leaves)
+        clone._size += added
+        clone._next_seq += len(leaves)
+        return clone
+
+    def copy(self):
+        """Return this map; it is immutable, so a copy is never needed."""
+        return self
+
+    @property
+    def version(self):
+        """Token identifying this map's contents; every derived map gets a new one."""
+        return self._version
+
+    def __getitem__(self, key):
+        leaf = self._root.find(hash(key) & _HASH_MASK, 0, key)
+        if leaf is None:
+            raise KeyError(key)
+        return leaf.value
+
+    def __contains__(self, key):
+        return self._root.find(hash(key) & _HASH_MASK, 0, key) is not None
+
+    def __len__(self):
+        return self._size
+
+    def _leaves(self):
+        # Reads go through locals so concurrent readers of a published map stay safe
+        ordered = self._ordered
+        if ordered is None:
+            patch = self._patch
+            if patch is not None:
+                ordered = _apply_patch(*patch)
+            else:
+                ordered = sorted(self._root.leaves_iter(), key=_seq)
+            self._ordered = ordered
+            self._patch = None
+        return ordered
+
+    def __iter__(self):
+        return (leaf.key for leaf in self._leaves())
+
+    def items(self):
+        return [(leaf.key, leaf.value) for leaf in self._leaves()]
+
+    def values(self):
+        return [leaf.value for leaf in self._leaves()]
+
+    def __repr__(self):
+        return f"PersistentMap({len(self)} items)"
@@ -1,9 +1,17 @@
 import pytest
+import asyncio
+import gc
 import inspect
 import importlib
+import json
+import socket
+import threading
+import time
+import weakref
 from test.TestUtils import TestUtils
 from urban_traffic_analysis_platform import (
     initialize_data,
+    get_formatted_intersection,
     filter_by_congestion_level,
     filter_by_traffic_volume,
     filter_by_peak_hour,
@@ -16,8 +24,37 @@ from urban_traffic_analysis_platform import (
     calculate_congestion_distribution,
     calculate_total_traffic_volume,
     find_high_incident_areas,
-    create_volume_brackets
+    create_volume_brackets,
+    find_intersections_in_peak_at,
+    filter_by_peak_hour_overlap,
+    find_intersections_within_radius,
+    find_intersections_in_bbox,
+    find_nearest_intersections,
+    apply_updates,
+    top_intersections_by_volume,
+    calculate_volume_percentile,
+    top_k_incident_areas,
+    record_traffic_volume,
+    main
 )
+from intersection_store import IntersectionStore
+from persistent_map import PersistentMap
+from traffic_ingest import iter_intersection_chunks, load_intersections, write_intersections
+from traffic_snapshot import OffsetTupleColumn, load_snapshot, save_snapshot
+from intersection_record import CongestionLevel, Intersection, compact_intersections
+from traffic_analytics import get_analytics_backend, numpy_available, set_analytics_backend
+from traffic_parallel import map_reduce_aggregates
+from traffic_query import (
+    CongestionLevelIs, FilterView, HasIncident, HasPeakHour, NearLandmark, Query, VolumeBetween, lazy_view
+)
+from traffic_cache import RESULT_CACHE, ResultCache, dataset_version
+from traffic_indexes import INDEX_TYPES, IncidentCountIndex
+from traffic_merge import MERGE_POLICIES, bulk_merge, merge_sorted_shards
+from traffic_timeseries import VolumeHistory, bytes_per_series
+from traffic_service import IngestionService, fake_sensor_payload, parse_readings, run_fake_sensor
+from traffic_mvcc import Snapshot, VersionedData
+from traffic_wal import DurableData, WriteAheadLog, read_segment, recover
+from traffic_benchmark import BACKENDS, compare_results, generate_intersections, run_benchmarks
 
 @pytest.fixture
 def test_obj():
@@ -180,5 +217,1441 @@ def test_implementation_techniques(test_obj):
         test_obj.yakshaAssert("test_implementation_techniques", False, "functional")
         pytest.fail(f"Implementation techniques test failed: {str(e)}")
 
+def test_intersection_store(test_obj):
+    """Test that the columnar store gives the same results as the dictionary implementation"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        store = IntersectionStore.from_dict(intersection_data)
+        
+        # Check the dict-compatible view
+        assert len(store) == len(intersection_data) and list(store) == list(intersection_data)
+        assert "I001" in store and "I999" not in store
+        assert dict(store) == intersection_data, "Store records must match the source dictionaries"
+        
+        # Check filters and statistics against the dictionary implementation
+        assert filter_by_congestion_level(store, "Severe") == filter_by_congestion_level(intersection_data, "Severe")
+        assert filter_by_congestion_level(store, "Extreme") == {}
+        assert filter_by_traffic_volume(store, 750, 1500) == filter_by_traffic_volume(intersection_data, 750, 1500)
+        assert filter_by_peak_hour(store, "08:00-09:00") == filter_by_peak_hour(intersection_data, "08:00-09:00")
+        assert filter_by_incident_type(store, "Accident") == filter_by_incident_type(intersection_data, "Accident")
+        assert find_intersections_near_landmark(store, "PARK") == find_intersections_near_landmark(intersection_data, "PARK")
+        assert calculate_congestion_distribution(store) == calculate_congestion_distribution(intersection_data)
+        assert calculate_total_traffic_volume(store) == calculate_total_traffic_volume(intersection_data)
+        assert find_high_incident_areas(store, 1) == find_high_incident_areas(intersection_data, 1)
+        assert create_volume_brackets(store) == create_volume_brackets(intersection_data)
+        
+        # Check updates return a new store and leave the original unchanged
+        updated = update_traffic_volume(store, "I001", 2500)
+        assert isinstance(updated, IntersectionStore)
+        assert updated["I001"]["traffic_volume"] == 2500 and store["I001"]["traffic_volume"] == 1200
+        updated = update_congestion_level(store, "I005", "Critical")
+        assert updated["I005"]["congestion_level"] == "Critical" and store["I005"]["congestion_level"] == "Low"
+        updated = add_incident_record(store, "I005", "Minor Accident")
+        assert updated["I005"]["incident_history"] == ["Minor Accident"] and store["I005"]["incident_history"] == []
+        
+        # Check merge matches the dictionary implementation
+        merged = merge_intersection_data(store, new_intersections)
+        assert dict(merged) == merge_intersection_data(intersection_data, new_intersections)
+        assert len(store) == 5
+        
+        # Copies share untouched columns and indexes, and writes on either side stay private
+        indexed = IntersectionStore.from_dict(intersection_data, indexes=INDEX_TYPES)
+        updated = update_traffic_volume(indexed, "I001", 2345)
+        assert updated.index("coordinates") is indexed.index("coordinates")
+        assert updated.index("traffic_volume") is not indexed.index("traffic_volume")
+        assert list(filter_by_traffic_volume(indexed, 2345, 2345)) == []
+        assert list(filter_by_traffic_volume(updated, 2345, 2345)) == ["I001"]
+        indexed.set_congestion_level("I001", "Critical")
+        assert updated["I001"]["congestion_level"] == "High"
+        assert list(filter_by_congestion_level(updated, "Critical")) == ["I004"]
+        assert dict(merge_intersection_data(updated, new_intersections)) == merge_intersection_data(
+            update_traffic_volume(intersection_data, "I001", 2345), new_intersections)
+        assert updated.aggregates_consistent() and indexed.aggregates_consistent()
+        
+        # A store rejects float volumes with ValueError before touching its indexes
+        assert update_traffic_volume(intersection_data, "I001", 1500.5)["I001"]["traffic_volume"] == 1500.5
+        with pytest.raises(ValueError):
+            update_traffic_volume(indexed, "I001", 1500.5)
+        with pytest.raises(ValueError):
+            updated.set_traffic_volume("I001", 1500.5)
+        assert list(filter_by_traffic_volume(updated, 2345, 2345)) == ["I001"] and updated.aggregates_consistent()
+        
+        test_obj.yakshaAssert("test_intersection_store", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_intersection_store", False, "functional")
+        pytest.fail(f"Intersection store test failed: {str(e)}")
+
+def test_congestion_level_index(test_obj):
+    """Test that the congestion level index stays current through updates and merges"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        store = IntersectionStore.from_dict(intersection_data, indexes=("congestion_level",))
+        assert store.has_index("congestion_level")
+        
+        # Indexed lookups must match the dictionary implementation
+        for level in ["Low", "Moderate", "High", "Severe", "Critical", "Extreme"]:
+            assert filter_by_congestion_level(store, level) == filter_by_congestion_level(intersection_data, level)
+        
+        # Updates must move rows between levels without touching the original store
+        updated = update_congestion_level(store, "I001", "Critical")
+        assert set(filter_by_congestion_level(updated, "Critical")) == {"I001", "I004"}
+        assert filter_by_congestion_level(updated, "High") == {}
+        assert set(filter_by_congestion_level(store, "High")) == {"I001"}
+        
+        # Merged and replaced intersections must be indexed
+        merged = merge_intersection_data(updated, new_intersections)
+        assert set(filter_by_congestion_level(merged, "Severe")) == {"I003", "N001"}
+        replaced = merge_intersection_data(merged, {"I004": {**intersection_data["I004"], "congestion_level": "Low"}})
+        assert set(filter_by_congestion_level(replaced, "Critical")) == {"I001"}
+        assert set(filter_by_congestion_level(replaced, "Low")) == {"I004", "I005"}
+        
+        # Unknown index fields are rejected
+        with pytest.raises(ValueError):
+            store.create_index("unknown_field")
+        
+        test_obj.yakshaAssert("test_congestion_level_index", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_congestion_level_index", False, "functional")
+        pytest.fail(f"Congestion level index test failed: {str(e)}")
+
+def test_volume_index(test_obj):
+    """Test volume range, top N and percentile queries with and without the volume index"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        store = IntersectionStore.from_dict(intersection_data, indexes=("traffic_volume",))
+        
+        # Indexed range queries must match the dictionary implementation, boundaries included
+        for min_volume, max_volume in [(0, 5000), (600, 1500), (801, 1199), (2001, 3000), (2000, 2000)]:
+            assert filter_by_traffic_volume(store, min_volume, max_volume) == filter_by_traffic_volume(intersection_data, min_volume, max_volume)
+        
+        # Updates must move rows within the index
+        updated = update_traffic_volume(store, "I005", 2500)
+        assert list(filter_by_traffic_volume(updated, 2001, 3000)) == ["I005"]
+        assert "I005" in filter_by_traffic_volume(store, 600, 600)
+        merged = merge_intersection_data(updated, new_intersections)
+        assert set(filter_by_traffic_volume(merged, 700, 800)) == {"I002", "N002"}
+        
+        # Top N and percentiles agree between the index, the plain scan and dictionaries
+        plain = IntersectionStore.from_dict(intersection_data)
+        assert list(top_intersections_by_volume(store, 3)) == ["I004", "I003", "I001"]
+        assert list(top_intersections_by_volume(plain, 3)) == ["I004", "I003", "I001"]
+        assert list(top_intersections_by_volume(intersection_data, 3)) == ["I004", "I003", "I001"]
+        assert top_intersections_by_volume(store, 0) == {}
+        assert len(top_intersections_by_volume(store, 10)) == 5
+        for percentile in [0, 20, 50, 90, 100]:
+            expected = calculate_volume_percentile(intersection_data, percentile)
+            assert calculate_volume_percentile(store, percentile) == expected
+            assert calculate_volume_percentile(plain, percentile) == expected
+        assert calculate_volume_percentile(intersection_data, 50) == 1200
+        
+        with pytest.raises(ValueError):
+            calculate_volume_percentile(store, 101)
+        with pytest.raises(ValueError):
+            calculate_volume_percentile({}, 50)
+        with pytest.raises(ValueError):
+            top_intersections_by_volume(store, -1)
+        
+        # Ties go to the earliest intersection on every backend
+        tied = {f"I{i}": dict(intersection_data["I001"], traffic_volume=1000) for i in range(5)}
+        tied_store = IntersectionStore.from_dict(tied, indexes=("traffic_volume",))
+        for data in (tied, tied_store, IntersectionStore.from_dict(tied)):
+            assert list(top_intersections_by_volume(data, 2)) == ["I0", "I1"]
+            assert list(top_intersections_by_volume(data, 5)) == ["I0", "I1", "I2", "I3", "I4"]
+        
+        # Float bounds behave like the dictionary scan and oversized volumes are rejected
+        for min_volume, max_volume in [(599.5, 1200.5), (600.1, 1199.9), (0, float("inf")), (1200.5, 1200.7)]:
+            assert filter_by_traffic_volume(store, min_volume, max_volume) == filter_by_traffic_volume(intersection_data, min_volume, max_volume)
+        with pytest.raises(ValueError):
+            store.set_traffic_volume("I001", 2 ** 31)
+        assert store["I001"]["traffic_volume"] == intersection_data["I001"]["traffic_volume"]
+        
+        test_obj.yakshaAssert("test_volume_index", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_volume_index", False, "functional")
+        pytest.fail(f"Volume index test failed: {str(e)}")
+
+def test_peak_hour_index(test_obj):
+    """Test point-in-time and overlap peak hour queries with and without the interval index"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        store = IntersectionStore.from_dict(intersection_data, indexes=("peak_hours",))
+        plain = IntersectionStore.from_dict(intersection_data)
+        
+        # Exact period matching keeps its original semantics
+        assert filter_by_peak_hour(store, "07:00-09:00") == filter_by_peak_hour(intersection_data, "07:00-09:00")
+        assert filter_by_peak_hour(store, "12:00-13:00") == {}
+        
+        # Point-in-time queries, with half-open period ends
+        assert set(find_intersections_in_peak_at(store, "08:15")) == {"I001", "I002", "I003", "I004", "I005"}
+        assert set(find_intersections_in_peak_at(store, "09:00")) == {"I002", "I003", "I004"}
+        assert set(find_intersections_in_peak_at(store, "14:30")) == {"I005"}
+        assert find_intersections_in_peak_at(store, "12:00") == {}
+        
+        # Overlap queries find windows that are not an exact string match
+        assert set(filter_by_peak_hour_overlap(store, "09:45-10:15")) == {"I003", "I004"}
+        assert filter_by_peak_hour_overlap(store, "11:00-13:00") == {}
+        
+        # Index, plain scan and dictionaries agree, including a window wrapping midnight
+        for query in ["00:00-24:00", "06:00-07:00", "19:30-20:30", "23:00-06:45"]:
+            expected = filter_by_peak_hour_overlap(intersection_data, query)
+            assert filter_by_peak_hour_overlap(store, query) == expected
+            assert filter_by_peak_hour_overlap(plain, query) == expected
+        for time_of_day in ["05:30", "10:29", "10:30", "20:00", "23:59"]:
+            expected = find_intersections_in_peak_at(intersection_data, time_of_day)
+            assert find_intersections_in_peak_at(store, time_of_day) == expected
+            assert find_intersections_in_peak_at(plain, time_of_day) == expected
+        
+        # Merged intersections are indexed, including overnight periods
+        merged = merge_intersection_data(store, {**new_intersections, "N003": {**new_intersections["N001"], "peak_hours": ["22:00-02:00"]}})
+        assert set(find_intersections_in_peak_at(merged, "05:30")) == {"N001"}
+        assert set(find_intersections_in_peak_at(merged, "01:00")) == {"N003"}
+        assert set(find_intersections_in_peak_at(merged, "23:00")) == {"N003"}
+        
+        # A period no row lists any more drops out of the tree
+        merged = merge_intersection_data(merged, {"N003": new_intersections["N001"]})
+        assert find_intersections_in_peak_at(merged, "01:00") == {}
+        
+        # Bulk building gives the same answers as inserting row by row
+        peak_hours = [tuple(intersection["peak_hours"]) for intersection in intersection_data.values()]
+        bulk, incremental = INDEX_TYPES["peak_hours"](), INDEX_TYPES["peak_hours"]()
+        bulk.build(peak_hours)
+        for row, periods in enumerate(peak_hours):
+            incremental.add(row, periods)
+        for minute in range(0, 1440, 15):
+            assert bulk.rows_at(minute) == incremental.rows_at(minute)
+            window = [(minute, min(minute + 45, 1440))]
+            assert bulk.rows_overlapping(window) == incremental.rows_overlapping(window)
+        
+        with pytest.raises(ValueError):
+            find_intersections_in_peak_at(store, "8 o'clock")
+        with pytest.raises(ValueError):
+            filter_by_peak_hour_overlap(store, "07:00")
+        
+        test_obj.yakshaAssert("test_peak_hour_index", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_peak_hour_index", False, "functional")
+        pytest.fail(f"Peak hour index test failed: {str(e)}")
+
+def test_incident_index(test_obj):
+    """Test substring incident search through the trigram index"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        store = IntersectionStore.from_dict(intersection_data, indexes=("incident_history",))
+        
+        # Substring semantics must match the dictionary implementation
+        for incident_type in ["Accident", "Accidents", "Work", "Fail", "ood", "a", "", "accident", "Earthquake"]:
+            assert filter_by_incident_type(store, incident_type) == filter_by_incident_type(intersection_data, incident_type)
+        assert set(filter_by_incident_type(store, "Accident")) == {"I001", "I003", "I004"}
+        
+        # Added incidents are searchable in the new store only
+        updated = add_incident_record(store, "I005", "Minor Accident")
+        assert set(filter_by_incident_type(updated, "Minor")) == {"I005"}
+        assert filter_by_incident_type(store, "Minor") == {}
+        
+        # Replacing an intersection through a merge drops its old incidents
+        merged = merge_intersection_data(updated, {"I002": {**intersection_data["I002"], "incident_history": []}})
+        assert filter_by_incident_type(merged, "Road Work") == {}
+        merged = merge_intersection_data(merged, new_intersections)
+        assert set(filter_by_incident_type(merged, "Road Work")) == {"N001"}
+        assert set(filter_by_incident_type(merged, "Pedestrian")) == {"N002"}
+        
+        test_obj.yakshaAssert("test_incident_index", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_incident_index", False, "functional")
+        pytest.fail(f"Incident index test failed: {str(e)}")
+
+def test_landmark_index(test_obj):
+    """Test case-insensitive landmark search through the landmark index"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        store = IntersectionStore.from_dict(intersection_data, indexes=("nearby_landmarks",))
+        
+        # Results must match the dictionary implementation for any casing and length
+        for landmark in ["park", "PARK", "Park", "ferry", "Central", "al", "", "s", "hall", "Airport"]:
+            assert find_intersections_near_landmark(store, landmark) == find_intersections_near_landmark(intersection_data, landmark)
+        assert set(find_intersections_near_landmark(store, "park")) == {"I002", "I004"}
+        
+        # Merged intersections are searchable, including shared landmarks
+        merged = merge_intersection_data(store, new_intersections)
+        assert set(find_intersections_near_landmark(merged, "Ferry Terminal")) == {"I003", "N002"}
+        assert set(find_intersections_near_landmark(merged, "park")) == {"I002", "I004", "N001"}
+        assert set(find_intersections_near_landmark(store, "ferry terminal")) == {"I003"}
+        
+        # Query patterns are not memoized, only landmarks the index holds
+        index = store.index("nearby_landmarks")
+        remembered = len(index._lowered)
+        for i in range(100):
+            find_intersections_near_landmark(store, f"Query {i}")
+        assert len(index._lowered) == remembered
+        
+        test_obj.yakshaAssert("test_landmark_index", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_landmark_index", False, "functional")
+        pytest.fail(f"Landmark index test failed: {str(e)}")
+
+def test_spatial_index(test_obj):
+    """Test radius, bounding box and nearest-neighbour queries with and without the spatial index"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        store = IntersectionStore.from_dict(intersection_data, indexes=("coordinates",))
+        plain = IntersectionStore.from_dict(intersection_data)
+        
+        # River & Market and Harbor & Waterfront are about 260 m apart
+        merged = merge_intersection_data(store, new_intersections)
+        assert set(find_intersections_within_radius(merged, 40.7020, -74.0160, 500)) == {"I003", "N002"}
+        assert set(find_intersections_within_radius(merged, 40.7020, -74.0160, 100)) == {"I003"}
+        assert list(find_nearest_intersections(merged, 40.7020, -74.0160, 2)) == ["I003", "N002"]
+        assert list(find_nearest_intersections(merged, 40.6413, -73.7781, 1)) == ["N001"]
+        assert find_nearest_intersections(store, 40.7, -74.0, 0) == {}
+        
+        # Index, plain scan and dictionaries agree
+        for radius_m in [0, 1000, 3000, 10000, 50000]:
+            expected = find_intersections_within_radius(intersection_data, 40.73, -74.0, radius_m)
+            assert find_intersections_within_radius(store, 40.73, -74.0, radius_m) == expected
+            assert find_intersections_within_radius(plain, 40.73, -74.0, radius_m) == expected
+        for k in [1, 3, 5, 10]:
+            expected = list(find_nearest_intersections(intersection_data, 40.75, -74.0, k))
+            assert list(find_nearest_intersections(store, 40.75, -74.0, k)) == expected
+            assert list(find_nearest_intersections(plain, 40.75, -74.0, k)) == expected
+        expected = find_intersections_in_bbox(intersection_data, 40.70, -74.01, 40.75, -73.99)
+        assert set(expected) == {"I001", "I004", "I005"}
+        assert find_intersections_in_bbox(store, 40.70, -74.01, 40.75, -73.99) == expected
+        assert find_intersections_in_bbox(plain, 40.70, -74.01, 40.75, -73.99) == expected
+        
+        with pytest.raises(ValueError):
+            find_intersections_within_radius(store, 40.7, -74.0, -1)
+        with pytest.raises(ValueError):
+            find_intersections_in_bbox(store, 40.8, -74.0, 40.7, -73.9)
+        with pytest.raises(ValueError):
+            find_nearest_intersections(store, 91, -74.0, 1)
+        
+        test_obj.yakshaAssert("test_spatial_index", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_spatial_index", False, "functional")
+        pytest.fail(f"Spatial index test failed: {str(e)}")
+
+def test_persistent_map(test_obj):
+    """Test that updates on a persistent map share structure and keep old versions valid"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        snapshot = PersistentMap.from_dict(intersection_data)
+        assert snapshot == intersection_data and list(snapshot) == list(intersection_data)
+        
+        # Each update returns a new version and leaves the previous one untouched
+        updated = update_traffic_volume(snapshot, "I001", 1500)
+        updated = update_congestion_level(updated, "I002", "Critical")
+        updated = add_incident_record(updated, "I005", "Minor Accident")
+        assert isinstance(updated, PersistentMap)
+        assert updated["I001"]["traffic_volume"] == 1500 and snapshot["I001"]["traffic_volume"] == 1200
+        assert updated["I002"]["congestion_level"] == "Critical" and snapshot["I002"]["congestion_level"] == "Moderate"
+        assert updated["I005"]["incident_history"] == ["Minor Accident"] and snapshot["I005"]["incident_history"] == []
+        assert add_incident_record(updated, "I005", "Minor Accident") is updated
+        assert list(updated) == list(intersection_data), "Updates must keep insertion order"
+        
+        # Results match the dictionary implementation
+        expected = update_traffic_volume(intersection_data, "I003", 0)
+        assert update_traffic_volume(snapshot, "I003", 0) == expected
+        merged = merge_intersection_data(snapshot, new_intersections)
+        assert merged == merge_intersection_data(intersection_data, new_intersections) and len(snapshot) == 5
+        assert filter_by_congestion_level(merged, "Severe") == filter_by_congestion_level(merge_intersection_data(intersection_data, new_intersections), "Severe")
+        
+        # Many versions derived from one base stay independent
+        large = PersistentMap.from_dict({f"X{i}": {"traffic_volume": i} for i in range(5000)})
+        versions = [large.set(f"X{i}", {"traffic_volume": -i}) for i in range(0, 5000, 250)]
+        assert all(large[f"X{i}"]["traffic_volume"] == i for i in range(5000))
+        assert all(version[f"X{i * 250}"]["traffic_volume"] == -i * 250 for i, version in enumerate(versions))
+        assert len(large.set("Y1", {})) == 5001 and "Y1" not in large
+        
+        test_obj.yakshaAssert("test_persistent_map", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_persistent_map", False, "functional")
+        pytest.fail(f"Persistent map test failed: {str(e)}")
+
+def test_apply_updates(test_obj):
+    """Test batch updates across dictionaries, persistent maps and stores"""
+    try:
+        intersection_data, _ = initialize_data()
+        updates = [
+            {"intersection_id": "I001", "traffic_volume": 1300},
+            {"intersection_id": "I002", "congestion_level": "Severe"},
+            {"intersection_id": "I005", "incident": "Minor Accident"},
+            {"intersection_id": "I999", "traffic_volume": 100},
+            {"intersection_id": "I001", "traffic_volume": -5},
+            {"intersection_id": "I003", "congestion_level": "Gridlock"},
+            {"intersection_id": "I004", "incident": ""},
+            {"intersection_id": "I004"},
+            {"traffic_volume": 100},
+            {"intersection_id": "I001", "traffic_volume": 1400, "incident": "Accident"},
+            {"intersection_id": "I005", "incident": "Minor Accident"}
+        ]
+        
+        updated, errors = apply_updates(intersection_data, updates)
+        assert [position for position, _ in errors] == [3, 4, 5, 6, 7, 8]
+        assert "not found" in errors[0][1]
+        assert updated["I001"]["traffic_volume"] == 1400
+        assert updated["I001"]["incident_history"] == ["Accident", "Signal Failure"]
+        assert updated["I002"]["congestion_level"] == "Severe"
+        assert updated["I005"]["incident_history"] == ["Minor Accident"]
+        
+        # The input is never modified
+        assert intersection_data["I001"]["traffic_volume"] == 1200 and intersection_data["I005"]["incident_history"] == []
+        
+        # The same batch gives the same result on every container type
+        for container in (PersistentMap.from_dict(intersection_data), 
+                          IntersectionStore.from_dict(intersection_data, indexes=("traffic_volume", "congestion_level"))):
+            batch_updated, batch_errors = apply_updates(container, updates)
+            assert dict(batch_updated) == updated and batch_errors == errors
+            assert container["I001"]["traffic_volume"] == 1200
+        store_updated, _ = apply_updates(IntersectionStore.from_dict(intersection_data, indexes=("traffic_volume",)), updates)
+        assert filter_by_traffic_volume(store_updated, 1400, 1400) == filter_by_traffic_volume(updated, 1400, 1400)
+        
+        # Malformed IDs, oversized volumes and non-string incidents are rejected alike by every backend
+        malformed = [
+            {"intersection_id": ["I001"], "traffic_volume": 100},
+            {"intersection_id": {"id": "I001"}, "congestion_level": "Low"},
+            {"intersection_id": "I001", "traffic_volume": 2 ** 31},
+            {"intersection_id": "I001", "traffic_volume": 99999999999999999999},
+            {"intersection_id": "I001", "incident": ["Accident"]},
+            {"intersection_id": "I001", "traffic_volume": 2 ** 31 - 1}
+        ]
+        expected, expected_errors = apply_updates(intersection_data, malformed)
+        assert [position for position, _ in expected_errors] == [0, 1, 2, 3, 4]
+        for container in (PersistentMap.from_dict(intersection_data), IntersectionStore.from_dict(intersection_data),
+                          IntersectionStore.from_dict(intersection_data, indexes=INDEX_TYPES)):
+            batch_updated, batch_errors = apply_updates(container, malformed)
+            assert dict(batch_updated) == expected and batch_errors == expected_errors
+        
+        # An empty batch changes nothing
+        assert apply_updates(intersection_data, []) == (intersection_data, [])
+        with pytest.raises(ValueError):
+            apply_updates(intersection_data, None)
+        
+        test_obj.yakshaAssert("test_apply_updates", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_apply_updates", False, "functional")
+        pytest.fail(f"Apply updates test failed: {str(e)}")
+
+def test_incremental_aggregates(test_obj):
+    """Test that store aggregates stay consistent with a full recompute through every update path"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        store = IntersectionStore.from_dict(intersection_data)
+        assert store.aggregates_consistent()
+        assert store.volume_bracket_counts() == {"low": 1, "medium": 3, "high": 1, "very_high": 0}
+        
+        # Apply every kind of change and compare with the dictionary implementation
+        updated = update_traffic_volume(store, "I002", 2400)
+        updated = update_congestion_level(updated, "I005", "Critical")
+        updated = add_incident_record(updated, "I005", "Stalled Vehicle")
+        create_volume_brackets(updated)
+        updated = merge_intersection_data(updated, new_intersections)
+        updated = merge_intersection_data(updated, {"I001": {**intersection_data["I001"], "traffic_volume": 100, "congestion_level": "Low"}})
+        updated, _ = apply_updates(updated, [{"intersection_id": "N001", "traffic_volume": 500, "congestion_level": "High"}])
+        assert updated.aggregates_consistent() and store.aggregates_consistent()
+        
+        reference = dict(updated)
+        assert calculate_congestion_distribution(updated) == calculate_congestion_distribution(reference)
+        assert calculate_total_traffic_volume(updated) == calculate_total_traffic_volume(reference)
+        assert create_volume_brackets(updated) == create_volume_brackets(reference)
+        assert calculate_total_traffic_volume(store) == calculate_total_traffic_volume(intersection_data)
+        
+        # Cached brackets are returned as fresh lists
+        brackets = create_volume_brackets(updated)
+        brackets["low"].append("X999")
+        assert "X999" not in create_volume_brackets(updated)["low"]
+        
+        # Levels with no intersections are left out of the distribution
+        assert "Critical" not in calculate_congestion_distribution(update_congestion_level(store, "I004", "Low"))
+        
+        test_obj.yakshaAssert("test_incremental_aggregates", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_incremental_aggregates", False, "functional")
+        pytest.fail(f"Incremental aggregates test failed: {str(e)}")
+
+def test_streaming_ingest(test_obj, tmp_path):
+    """Test CSV and JSONL loading, round trips and malformed row reporting"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        
+        # Both formats round-trip through the streaming loader
+        for file_name in ("intersections.csv", "intersections.jsonl"):
+            path = str(tmp_path / file_name)
+            write_intersections(intersection_data, path)
+            loaded, errors = load_intersections(path, chunk_size=2, indexes=("traffic_volume",))
+            assert errors == [] and dict(loaded) == intersection_data
+            assert loaded.aggregates_consistent()
+            assert filter_by_traffic_volume(loaded, 1000, 1500) == filter_by_traffic_volume(intersection_data, 1000, 1500)
+            assert [len(chunk) for chunk in iter_intersection_chunks(path, chunk_size=2)] == [2, 2, 1]
+        
+        # JSONL keeps newly_added flags and extra fields, for appended and replaced rows alike
+        merged = merge_intersection_data(intersection_data, new_intersections)
+        merged["I002"] = {**merged["I002"], "operator": "DOT", "sensors": [1, 2]}
+        merged["N001"] = {**merged["N001"], "operator": "City"}
+        path = str(tmp_path / "merged.jsonl")
+        write_intersections(merged, path)
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(json.dumps({"intersection_id": "I003", **merged["I003"], "newly_added": True, "note": "resurveyed"}) + "\n")
+        loaded, errors = load_intersections(path, chunk_size=3)
+        expected = {**merged, "I003": {**merged["I003"], "newly_added": True, "note": "resurveyed"}}
+        assert errors == [] and dict(loaded) == expected
+        write_intersections(loaded, path)
+        assert dict(load_intersections(path)[0]) == expected
+        
+        # Malformed rows are reported by line and skipped; later duplicates win
+        path = tmp_path / "bad.csv"
+        path.write_text(
+            "intersection_id,name,latitude,longitude,traffic_volume,congestion_level,"
+            "peak_hours,nearby_landmarks,incident_history\n"
+            "I001,Main & 1st,40.71,-74.0,1200,High,07:00-09:00,Park|Library,Accident\n"
+            "I002,Oak & 2nd,40.72,-74.1,many,Low,,,\n"
+            "I003,Elm & 3rd,140.0,-74.2,300,Low,,,\n"
+            "I004,Pine & 4th,40.73,-74.3,400,Gridlock,,,\n"
+            "I005,Ash & 5th,40.74,-74.4,500,Low,25:00-26:00,,\n"
+            "I006,Birch & 6th,40.75,-74.5\n"
+            "I001,Main & 1st,40.71,-74.0,1250,Severe,07:00-09:00,Park,\n",
+            encoding="utf-8"
+        )
+        loaded, errors = load_intersections(str(path))
+        assert [line for line, _ in errors] == [3, 4, 5, 6, 7]
+        assert "Malformed row" in errors[0][1] and "congestion level" in errors[2][1]
+        generic_errors = []
+        list(iter_intersection_chunks(str(path), errors=generic_errors))
+        assert [line for line, _ in generic_errors] == [3, 4, 5, 6, 7]
+        assert [message for _, message in generic_errors][1:4] == [message for _, message in errors][1:4]
+        assert list(loaded) == ["I001"]
+        assert loaded["I001"]["traffic_volume"] == 1250 and loaded["I001"]["incident_history"] == []
+        assert loaded.congestion_distribution() == {"Severe": 1}
+        
+        # Out-of-range volumes are reported per row by both formats, with or without indexes
+        header = ",".join(["intersection_id", "name", "latitude", "longitude", "traffic_volume", "congestion_level",
+                           "peak_hours", "nearby_landmarks", "incident_history"])
+        rows = [f"{iid},Road {iid},40.7,-74.0,{volume},Low,,," for iid, volume in
+                (("I001", 2 ** 31 - 1), ("I002", 2 ** 31), ("I003", 2 ** 64), ("I004", 10))]
+        (tmp_path / "big.csv").write_text("\n".join([header] + rows) + "\n", encoding="utf-8")
+        records = [{"intersection_id": iid, "name": f"Road {iid}", "coordinates": [40.7, -74.0], "traffic_volume": volume,
+                    "congestion_level": "Low", "peak_hours": [], "nearby_landmarks": [], "incident_history": []}
+                   for iid, volume in (("I001", 2 ** 31 - 1), ("I002", 2 ** 31), ("I003", 2 ** 64), ("I004", 10))]
+        (tmp_path / "big.jsonl").write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+        for path, first_line in ((tmp_path / "big.csv", 2), (tmp_path / "big.jsonl", 1)):
+            for indexes in ((), INDEX_TYPES):
+                loaded, errors = load_intersections(str(path), indexes=indexes)
+                assert list(loaded) == ["I001", "I004"]
+                assert [line for line, _ in errors] == [first_line + 1, first_line + 2]
+                assert all("cannot exceed" in message for _, message in errors)
+        
+        with pytest.raises(ValueError):
+            load_intersections(str(tmp_path / "intersections.xml"))
+        with pytest.raises(ValueError):
+            load_intersections(str(path), chunk_size=0)
+        
+        test_obj.yakshaAssert("test_streaming_ingest", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_streaming_ingest", False, "functional")
+        pytest.fail(f"Streaming ingest test failed: {str(e)}")
+
+def test_binary_snapshot(test_obj, tmp_path, monkeypatch):
+    """Test snapshot round trips, lazy list columns and format validation"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        combined = merge_intersection_data(intersection_data, new_intersections)
+        path = str(tmp_path / "network.snap")
+        
+        assert save_snapshot(combined, path) == len(combined)
+        loaded = load_snapshot(path)
+        assert dict(loaded) == combined and list(loaded) == list(combined)
+        assert loaded.aggregates_consistent()
+        assert isinstance(loaded.export_columns()["incidents"], OffsetTupleColumn)
+        
+        # Queries agree with a store built from the dictionary, with or without indexes
+        built = IntersectionStore.from_dict(combined)
+        indexed = load_snapshot(path, indexes=("nearby_landmarks", "incident_history"))
+        for store in (loaded, indexed):
+            assert filter_by_incident_type(store, "Accident") == filter_by_incident_type(built, "Accident")
+            assert find_intersections_near_landmark(store, "museum") == find_intersections_near_landmark(built, "museum")
+            assert filter_by_peak_hour(store, "07:00-09:00") == filter_by_peak_hour(built, "07:00-09:00")
+            assert create_volume_brackets(store) == create_volume_brackets(built)
+        
+        # Indexes requested on load are built on first use and answer like eager ones
+        lazy = load_snapshot(path, indexes=INDEX_TYPES)
+        assert all(lazy.has_index(field) for field in INDEX_TYPES)
+        eager = IntersectionStore.from_dict(combined, indexes=INDEX_TYPES)
+        assert lazy.rows_with_incident("Accident") == eager.rows_with_incident("Accident")
+        assert lazy.rows_in_peak_at(8 * 60) == eager.rows_in_peak_at(8 * 60)
+        assert lazy.index("nearby_landmarks") is not None and lazy.aggregates_consistent()
+        
+        # Opening a snapshot in main() decodes no rows until a query needs them
+        decoded = []
+        original_decode = OffsetTupleColumn._decode
+        monkeypatch.setattr(OffsetTupleColumn, "_decode",
+                            lambda column, row: decoded.append(row) or original_decode(column, row))
+        monkeypatch.setattr("builtins.input", lambda prompt="": "0")
+        main(path)
+        assert decoded == []
+        monkeypatch.undo()
+        
+        # Mutations and copies behave as on an in-memory store
+        copied = loaded.copy()
+        updated = add_incident_record(loaded, "I005", "Flooding")
+        assert updated["I005"]["incident_history"] == ["Flooding"]
+        assert loaded["I005"]["incident_history"] == [] and copied["I005"]["incident_history"] == []
+        copied.upsert("X001", dict(combined["I001"]))
+        assert copied["X001"]["nearby_landmarks"] == combined["I001"]["nearby_landmarks"]
+        assert "X001" not in loaded
+        
+        # Saving a snapshot-backed store writes the same content
+        resaved = str(tmp_path / "resaved.snap")
+        save_snapshot(updated, resaved)
+        assert dict(load_snapshot(resaved)) == dict(updated)
+        
+        # An empty dataset round-trips
+        save_snapshot({}, str(tmp_path / "empty.snap"))
+        assert len(load_snapshot(str(tmp_path / "empty.snap"))) == 0
+        
+        # Corrupt and foreign files are rejected
+        with open(path, "rb") as file:
+            content = file.read()
+        for name, data in (("magic.snap", b"NOTASNAP" + content[8:]),
+                           ("version.snap", content[:8] + b"\x09" + content[9:]),
+                           ("truncated.snap", content[:len(content) // 2]),
+                           ("blank.snap", b"")):
+            (tmp_path / name).write_bytes(data)
+            with pytest.raises(ValueError):
+                load_snapshot(str(tmp_path / name))
+        with pytest.raises(ValueError):
+            save_snapshot(None, path)
+        
+        test_obj.yakshaAssert("test_binary_snapshot", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_binary_snapshot", False, "functional")
+        pytest.fail(f"Binary snapshot test failed: {str(e)}")
+
+def test_compact_intersection_record(test_obj):
+    """Test the slotted Intersection record against intersection dictionaries"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        combined = merge_intersection_data(intersection_data, new_intersections)
+        compact = compact_intersections(combined)
+        
+        # Records read exactly like the dictionaries they replace
+        assert compact == combined and list(compact["N001"]) == list(combined["N001"])
+        for iid, intersection in combined.items():
+            assert get_formatted_intersection(iid, compact[iid]) == get_formatted_intersection(iid, intersection)
+        record = compact["I001"]
+        assert record["congestion_level"] == "High" and record.congestion_level is CongestionLevel.HIGH
+        assert record["coordinates"] == (40.7128, -74.0060) and record.get("newly_added", False) is False
+        assert not hasattr(record, "__dict__")
+        
+        # Repeated strings are shared between records
+        assert compact["I001"].incident_history[0] is compact["I003"].incident_history[0]
+        
+        # Returned lists are copies, so records cannot be changed through them
+        record["incident_history"].append("Flooding")
+        assert record["incident_history"] == ["Accident", "Signal Failure"]
+        
+        # The platform functions accept dictionaries of records
+        assert filter_by_congestion_level(compact, "High") == filter_by_congestion_level(combined, "High")
+        assert calculate_total_traffic_volume(compact) == calculate_total_traffic_volume(combined)
+        assert add_incident_record(compact, "I005", "Flooding") == add_incident_record(combined, "I005", "Flooding")
+        assert dict(IntersectionStore.from_dict(compact)) == combined
+        
+        with pytest.raises(ValueError):
+            Intersection.from_dict({**combined["I001"], "congestion_level": "Gridlock"})
+        with pytest.raises(ValueError):
+            compact_intersections(None)
+        
+        test_obj.yakshaAssert("test_compact_intersection_record", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_compact_intersection_record", False, "functional")
+        pytest.fail(f"Compact intersection record test failed: {str(e)}")
+
+def test_numpy_analytics_backend(test_obj):
+    """Test backend selection and that the NumPy statistics match the pure-Python ones"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        combined = merge_intersection_data(intersection_data, new_intersections)
+        containers = (combined, {}, PersistentMap.from_dict(combined), IntersectionStore.from_dict(combined),
+                      {"X001": {**combined["I001"], "congestion_level": "Unknown"}, **combined},
+                      {**combined, "I001": {**combined["I001"], "traffic_volume": 6100.7},
+                       "I002": {**combined["I002"], "traffic_volume": 750.5}})
+        
+        def statistics(data):
+            return [calculate_congestion_distribution(data), calculate_total_traffic_volume(data),
+                    create_volume_brackets(data), find_high_incident_areas(data, 0), find_high_incident_areas(data, 1)]
+        
+        assert get_analytics_backend() == "python"
+        expected = [statistics(data) for data in containers]
+        if numpy_available():
+            assert set_analytics_backend("numpy") == "python"
+            try:
+                for data, python_results in zip(containers, expected):
+                    numpy_results = statistics(data)
+                    assert numpy_results == python_results
+                    # Key order matches as well, not just the contents
+                    assert [list(result) for result in numpy_results if isinstance(result, dict)] == \
+                        [list(result) for result in python_results if isinstance(result, dict)]
+            finally:
+                set_analytics_backend("python")
+        else:
+            with pytest.raises(ValueError):
+                set_analytics_backend("numpy")
+            assert get_analytics_backend() == "python"
+        
+        with pytest.raises(ValueError):
+            set_analytics_backend("fortran")
+        
+        test_obj.yakshaAssert("test_numpy_analytics_backend", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_numpy_analytics_backend", False, "functional")
+        pytest.fail(f"NumPy analytics backend test failed: {str(e)}")
+
+def test_map_reduce_aggregates(test_obj):
+    """Test that the process-pool aggregates match the serial statistics"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        combined = merge_intersection_data(intersection_data, new_intersections)
+        
+        for data in (combined, IntersectionStore.from_dict(combined), {}):
+            expected = {
+                "congestion_distribution": calculate_congestion_distribution(data),
+                "total_traffic_volume": calculate_total_traffic_volume(data),
+                "volume_brackets": create_volume_brackets(data),
+                "high_incident_areas": find_high_incident_areas(data, 0)
+            }
+            # Uneven partitions must merge to the same result, in the same order
+            for chunk_size in (None, 1, 3):
+                results = map_reduce_aggregates(data, workers=2, chunk_size=chunk_size, threshold=0)
+                assert results == expected
+                assert list(results["congestion_distribution"]) == list(expected["congestion_distribution"])
+                assert list(results["high_incident_areas"]) == list(expected["high_incident_areas"])
+            
+            # The aggregate functions partition the same work when given workers
+            assert calculate_congestion_distribution(data, workers=2) == expected["congestion_distribution"]
+            assert calculate_total_traffic_volume(data, workers=2) == expected["total_traffic_volume"]
+            assert create_volume_brackets(data, workers=2) == expected["volume_brackets"]
+            assert find_high_incident_areas(data, 0, workers=2) == expected["high_incident_areas"]
+            assert map_reduce_aggregates(data, workers=1, aggregates=("total_traffic_volume",)) == \
+                {"total_traffic_volume": expected["total_traffic_volume"]}
+        
+        # Dictionaries may mix int and float volumes; the workers pack them as doubles
+        mixed = {key: dict(value) for key, value in combined.items()}
+        mixed["I001"]["traffic_volume"] = 1500.5
+        mixed["I002"]["traffic_volume"] = 999.25
+        assert calculate_congestion_distribution(mixed, workers=2) == calculate_congestion_distribution(mixed)
+        assert calculate_total_traffic_volume(mixed, workers=2) == calculate_total_traffic_volume(mixed)
+        assert create_volume_brackets(mixed, workers=2) == create_volume_brackets(mixed)
+        assert find_high_incident_areas(mixed, 0, workers=2) == find_high_incident_areas(mixed, 0)
+        assert map_reduce_aggregates(mixed, workers=2, chunk_size=1) == map_reduce_aggregates(mixed, workers=1)
+        
+        with pytest.raises(ValueError):
+            map_reduce_aggregates(None)
+        with pytest.raises(ValueError):
+            map_reduce_aggregates(combined, workers=0)
+        with pytest.raises(ValueError):
+            map_reduce_aggregates(combined, chunk_size=0)
+        with pytest.raises(ValueError):
+            map_reduce_aggregates(combined, aggregates=("median_volume",))
+        with pytest.raises(ValueError):
+            calculate_total_traffic_volume(combined, workers=0)
+        
+        test_obj.yakshaAssert("test_map_reduce_aggregates", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_map_reduce_aggregates", False, "functional")
+        pytest.fail(f"Map-reduce aggregates test failed: {str(e)}")
+
+def test_query_planner(test_obj):
+    """Test composed queries against chained filters and the planner's driver choice"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        combined = merge_intersection_data(intersection_data, new_intersections)
+        indexed = IntersectionStore.from_dict(combined, indexes=("traffic_volume", "incident_history", "nearby_landmarks"))
+        
+        query = VolumeBetween(700, 2000) & NearLandmark("station") & HasIncident("Accident")
+        assert isinstance(query, Query) and len(query.predicates) == 3
+        for data in (combined, IntersectionStore.from_dict(combined), indexed, PersistentMap.from_dict(combined)):
+            chained = filter_by_incident_type(
+                find_intersections_near_landmark(filter_by_traffic_volume(data, 700, 2000), "station"), "Accident")
+            results = query.run(data)
+            assert results == chained and list(results) == list(chained)
+            assert (CongestionLevelIs("High") & HasPeakHour("07:00-09:00")).run(data) == \
+                filter_by_peak_hour(filter_by_congestion_level(data, "High"), "07:00-09:00")
+        
+        # The most selective indexed predicate drives the query
+        plan = query.plan(indexed)
+        assert plan.driver is query.predicates[1] and plan.estimate == 1
+        assert plan.residuals == [query.predicates[2], query.predicates[0]]
+        plan = (VolumeBetween(700, 2000) & CongestionLevelIs("Severe")).plan(indexed)
+        assert isinstance(plan.driver, CongestionLevelIs) and plan.estimate == 2
+        
+        # Without indexes only the maintained level counts can drive; otherwise the store is scanned
+        assert query.plan(IntersectionStore.from_dict(combined)).driver is None
+        assert (CongestionLevelIs("Gridlock") & query).run(indexed) == {}
+        assert Query().run(combined) == combined
+        
+        with pytest.raises(ValueError):
+            VolumeBetween(500, 100)
+        with pytest.raises(ValueError):
+            Query("High")
+        with pytest.raises(ValueError):
+            query.run(None)
+        
+        test_obj.yakshaAssert("test_query_planner", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_query_planner", False, "functional")
+        pytest.fail(f"Query planner test failed: {str(e)}")
+
+def test_lazy_filter_views(test_obj):
+    """Test lazy filter views, chaining through the filter functions and pagination"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        combined = merge_intersection_data(intersection_data, new_intersections)
+        
+        for data in (combined, IntersectionStore.from_dict(combined, indexes=("incident_history",))):
+            eager = filter_by_incident_type(filter_by_traffic_volume(data, 700, 2000), "Accident")
+            view = filter_by_incident_type(filter_by_traffic_volume(lazy_view(data), 700, 2000), "Accident")
+            assert isinstance(view, FilterView) and len(view.query.predicates) == 2
+            assert len(view) == len(eager) and list(view) == list(eager) and dict(view) == eager
+            assert view.materialize() == eager and view == eager
+            assert "I001" in view and "I005" not in view and view["I003"] == eager["I003"]
+            with pytest.raises(KeyError):
+                view["I005"]
+            
+            # Slices and pages only evaluate as far as they need to
+            assert list(view[:2]) == list(eager)[:2] and list(view[1:]) == list(eager)[1:]
+            assert list(view.page(1, 2)) == list(eager)[2:4] and view.page(5, 2) == {}
+            
+            # Other filters and statistics accept a view like any dictionary
+            assert filter_by_congestion_level(view, "Severe").materialize() == filter_by_congestion_level(eager, "Severe")
+            assert calculate_total_traffic_volume(view) == calculate_total_traffic_volume(eager)
+            assert find_intersections_in_peak_at(view, "08:00") == find_intersections_in_peak_at(eager, "08:00")
+            assert not find_intersections_near_landmark(view, "Nowhere") and bool(view)
+        
+        with pytest.raises(ValueError):
+            lazy_view(None)
+        with pytest.raises(ValueError):
+            lazy_view(combined)[-2:]
+        with pytest.raises(ValueError):
+            lazy_view(combined).page(0, 0)
+        
+        test_obj.yakshaAssert("test_lazy_filter_views", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_lazy_filter_views", False, "functional")
+        pytest.fail(f"Lazy filter views test failed: {str(e)}")
+
+def test_versioned_result_cache(test_obj):
+    """Test cache hits, version-based invalidation, LRU eviction and the counters"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        store = IntersectionStore.from_dict(intersection_data)
+        RESULT_CACHE.clear()
+        
+        # Repeated calls on the same version are served from the cache
+        first = filter_by_traffic_volume(store, 700, 1500)
+        assert filter_by_traffic_volume(store, 700, 1500) == first
+        assert calculate_volume_percentile(store, 50) == calculate_volume_percentile(store, 50)
+        info = RESULT_CACHE.info()
+        assert (info.hits, info.misses) == (2, 2) and info.entries == 2
+        
+        # Cached results are copies, so callers cannot corrupt them
+        first.clear()
+        assert len(filter_by_traffic_volume(store, 700, 1500)) == 3
+        
+        # Updates and merges produce new versions that miss and see the new data
+        for updated in (update_traffic_volume(store, "I005", 900), add_incident_record(store, "I005", "Flooding"),
+                        merge_intersection_data(store, new_intersections)):
+            assert dataset_version(updated) != dataset_version(store)
+            assert filter_by_traffic_volume(updated, 700, 1500) == filter_by_traffic_volume(dict(updated), 700, 1500)
+        assert "I005" in filter_by_traffic_volume(update_traffic_volume(store, "I005", 900), 700, 1500)
+        assert dataset_version(store.copy()) == dataset_version(store)
+        
+        # In-place store changes move the version on as well
+        version = dataset_version(store)
+        store.set_congestion_level("I001", "Severe")
+        assert dataset_version(store) != version
+        assert calculate_congestion_distribution(store)["Severe"] == 2
+        
+        # Persistent maps are versioned; plain dictionaries bypass the cache
+        persistent = PersistentMap.from_dict(intersection_data)
+        assert filter_by_congestion_level(persistent, "High") == filter_by_congestion_level(persistent, "High")
+        hits = RESULT_CACHE.info().hits
+        bypasses = RESULT_CACHE.info().bypasses
+        filter_by_congestion_level(intersection_data, "High")
+        assert RESULT_CACHE.info().bypasses == bypasses + 1 and RESULT_CACHE.info().hits == hits
+        
+        # Least recently used entries are evicted first, by count and by weight
+        cache = ResultCache(max_entries=2, max_weight=6)
+        cache.call(filter_by_congestion_level, store, "High")
+        cache.call(filter_by_congestion_level, store, "Low")
+        cache.call(filter_by_congestion_level, store, "High")
+        cache.call(filter_by_congestion_level, store, "Moderate")
+        assert cache.info().evictions == 1 and cache.info().hits == 1
+        cache.call(filter_by_congestion_level, store, "High")
+        assert cache.info().hits == 2
+        cache.call(filter_by_traffic_volume, store, 0, 5000)
+        assert cache.info().weight == 6 and cache.info().evictions == 2 and len(cache) == 2
+        
+        # Store results are cached as rows, so cached entries do not keep old versions alive
+        old = update_traffic_volume(store, "I002", 1000)
+        cached = filter_by_traffic_volume(old, 700, 1500)
+        assert filter_by_traffic_volume(old.copy(), 700, 1500) == cached
+        assert all(record._store is not old for record in filter_by_traffic_volume(old.copy(), 700, 1500).values())
+        reference = weakref.ref(old)
+        del old, cached
+        gc.collect()
+        assert reference() is None
+        
+        with pytest.raises(ValueError):
+            ResultCache(max_entries=0)
+        with pytest.raises(ValueError):
+            filter_by_traffic_volume(store, 500, 100)
+        RESULT_CACHE.clear()
+        
+        test_obj.yakshaAssert("test_versioned_result_cache", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_versioned_result_cache", False, "functional")
+        pytest.fail(f"Versioned result cache test failed: {str(e)}")
+
+def test_incident_count_index(test_obj):
+    """Test the incident count bucket index, threshold queries and top-k hotspots"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        plain = merge_intersection_data(intersection_data, new_intersections)
+        store = IntersectionStore.from_dict(plain, indexes=("incident_count",))
+        unindexed = IntersectionStore.from_dict(plain)
+        assert store.has_index("incident_count") and store.index("incident_count").field == "incident_history"
+        
+        # Threshold queries match the scan on every representation
+        for threshold in range(4):
+            expected = find_high_incident_areas(plain, threshold)
+            assert find_high_incident_areas(store, threshold) == expected
+            assert find_high_incident_areas(unindexed, threshold) == expected
+            assert store.index("incident_count").count_above(threshold) == len(expected)
+        
+        # Top-k orders by incident count with ties in data order
+        for k in range(len(plain) + 2):
+            expected = top_k_incident_areas(plain, k)
+            assert list(top_k_incident_areas(store, k)) == list(expected)
+            assert list(top_k_incident_areas(unindexed, k)) == list(expected)
+        assert list(top_k_incident_areas(plain, 3)) == ["I003", "I001", "I004"]
+        assert top_k_incident_areas(plain, 0) == {}
+        
+        # add_incident_record moves the intersection to a higher bucket
+        for incident in ("Flooding", "Accident", "Signal failure", "Road work"):
+            store = add_incident_record(store, "I005", incident)
+            plain = add_incident_record(plain, "I005", incident)
+        assert list(top_k_incident_areas(store, 1)) == ["I005"]
+        assert list(top_k_incident_areas(store, 4)) == list(top_k_incident_areas(plain, 4))
+        assert find_high_incident_areas(store, 2) == find_high_incident_areas(plain, 2)
+        
+        # The index survives copies and bulk updates, and empties its top buckets
+        index = IncidentCountIndex()
+        index.build([("Accident", "Flooding"), (), ("Accident",)])
+        clone = index.copy()
+        index.remove(0, ("Accident", "Flooding"))
+        assert index.top_rows(5) == [2, 1] and index.rows_above(0) == [2]
+        assert clone.top_rows(2) == [0, 2] and clone.rows_above(1) == [0]
+        with store.bulk_update(len(store), fields=("incident_history",)):
+            assert not store.has_index("incident_count")
+        assert store.has_index("incident_count")
+        
+        with pytest.raises(ValueError):
+            top_k_incident_areas(store, -1)
+        with pytest.raises(ValueError):
+            top_k_incident_areas(None, 3)
+        
+        test_obj.yakshaAssert("test_incident_count_index", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_incident_count_index", False, "functional")
+        pytest.fail(f"Incident count index test failed: {str(e)}")
+
+def test_bulk_merge_policies(test_obj, tmp_path):
+    """Test conflict policies, in-place merging and the k-way merge of sorted shards"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        incoming = {
+            "I001": {**intersection_data["I001"], "traffic_volume": 999, "incident_history": ["Accident", "Flooding"]},
+            **new_intersections
+        }
+        
+        # Each policy decides the winner of the conflicting I001
+        assert bulk_merge(intersection_data, incoming, policy="keep")["I001"] == intersection_data["I001"]
+        assert bulk_merge(intersection_data, incoming, policy="overwrite")["I001"]["traffic_volume"] == 999
+        merged = bulk_merge(intersection_data, incoming, policy="merge_incidents")
+        assert merged["I001"]["incident_history"] == ["Accident", "Signal Failure", "Flooding"]
+        assert merged["I001"]["traffic_volume"] == 999 and merged["N001"]["newly_added"]
+        assert "newly_added" not in intersection_data["I001"] and len(intersection_data) == 5
+        assert bulk_merge(intersection_data, incoming, policy="overwrite") == merge_intersection_data(intersection_data, incoming)
+        
+        older = {"I001": {**intersection_data["I001"], "updated_at": "2024-05-01T08:00"}}
+        newer = {"I001": {**intersection_data["I001"], "traffic_volume": 10, "updated_at": "2024-05-02T08:00"}}
+        base = bulk_merge(intersection_data, newer, policy="newest", mark_new=False)
+        assert bulk_merge(base, older, policy="newest")["I001"]["traffic_volume"] == 10
+        assert bulk_merge(base, incoming, policy="newest")["I001"]["traffic_volume"] == 10
+        assert bulk_merge(intersection_data, older, policy="newest")["I001"]["updated_at"] == "2024-05-01T08:00"
+        
+        # Stores and persistent maps give the same result as dictionaries
+        expected = bulk_merge(intersection_data, incoming, policy="merge_incidents")
+        for existing in (IntersectionStore.from_dict(intersection_data, indexes=INDEX_TYPES),
+                         PersistentMap.from_dict(intersection_data)):
+            merged = bulk_merge(existing, incoming, policy="merge_incidents")
+            assert {iid: dict(record) for iid, record in merged.items()} == expected
+            assert len(existing) == 5
+        store = IntersectionStore.from_dict(intersection_data, indexes=("incident_count",))
+        assert bulk_merge(store, incoming, policy="merge_incidents", in_place=True) is store
+        assert list(top_k_incident_areas(store, 1)) == ["I001"] and len(store) == 7
+        
+        # In-place merges of dictionaries write into the existing dictionary
+        target = dict(intersection_data)
+        assert bulk_merge(target, new_intersections, in_place=True) is target and len(target) == 7
+        
+        # Repeated IDs in a stream of pairs are resolved in order
+        pairs = [("N001", new_intersections["N001"]),
+                 ("N001", {**new_intersections["N001"], "incident_history": ["Flooding"]})]
+        merged = bulk_merge({}, pairs, policy="merge_incidents", mark_new=False)
+        assert merged["N001"]["incident_history"] == ["Accident", "Road Work", "Flooding"]
+        
+        # Sorted shards are merged in ID order with later shards as the incoming side
+        shards = []
+        for number, shard in enumerate((intersection_data, incoming, new_intersections)):
+            path = str(tmp_path / f"shard{number}.{'csv' if number else 'jsonl'}")
+            write_intersections({iid: shard[iid] for iid in sorted(shard)}, path)
+            shards.append(path)
+        stream = merge_sorted_shards(shards, policy="merge_incidents")
+        output = str(tmp_path / "merged.jsonl")
+        write_intersections(stream, output)
+        loaded, errors = load_intersections(output)
+        assert errors == [] and list(loaded) == sorted(expected)
+        assert loaded["I001"]["incident_history"] == ["Accident", "Signal Failure", "Flooding"]
+        assert dict(merge_sorted_shards(shards[:1]))["I003"]["name"] == intersection_data["I003"]["name"]
+        
+        with open(shards[1], "a", encoding="utf-8") as file:
+            file.write("A000,Broken,1,2,3,Low,,,\nA001,Bad,x,2,3,Low,,,\n")
+        errors = []
+        with pytest.raises(ValueError):
+            list(merge_sorted_shards(shards, errors=errors))
+        assert errors == [(shards[1], 6, errors[0][2])]
+        
+        with pytest.raises(ValueError):
+            bulk_merge(intersection_data, incoming, policy="latest")
+        with pytest.raises(ValueError):
+            list(merge_sorted_shards(shards, policy="latest"))
+        with pytest.raises(ValueError):
+            bulk_merge(None, incoming)
+        assert "newest" in MERGE_POLICIES
+        
+        test_obj.yakshaAssert("test_bulk_merge_policies", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_bulk_merge_policies", False, "functional")
+        pytest.fail(f"Bulk merge policies test failed: {str(e)}")
+
+def test_volume_history_ring_buffers(test_obj):
+    """Test ring buffer samples, rolling aggregates, gaps, late samples and wrap-around"""
+    try:
+        intersection_data, _ = initialize_data()
+        history = VolumeHistory(capacity=60, resolution=60)
+        start = 1700000000 - 1700000000 % 60
+        
+        # record_traffic_volume updates the data and keeps every reading
+        data = intersection_data
+        for minute in range(90):
+            data = record_traffic_volume(data, history, "I001", 100 + minute, start + minute * 60)
+        assert data["I001"]["traffic_volume"] == 189 and intersection_data["I001"]["traffic_volume"] == 1200
+        assert "I001" in history and "I002" not in history and len(history) == 1
+        
+        # Only the latest 60 minutes are retained
+        samples = history.samples("I001")
+        assert len(samples) == 60 and samples[0] == (start + 30 * 60, 130) and samples[-1] == (start + 89 * 60, 189)
+        assert history.latest("I001") == (start + 89 * 60, 189)
+        
+        # Rolling and arbitrary windows agree with the raw samples
+        last_ten = history.rolling("I001", 600)
+        assert (last_ten.count, last_ten.total, last_ten.max) == (10, sum(range(180, 190)), 189)
+        assert last_ten.mean == sum(range(180, 190)) / 10
+        stats = history.window("I001", start + 40 * 60, start + 49 * 60 + 59)
+        assert (stats.count, stats.total, stats.max) == (10, sum(range(140, 150)), 149)
+        everything = history.window("I001", 0, start + 10 ** 6)
+        assert (everything.count, everything.total) == (60, sum(range(130, 190)))
+        assert history.window("I001", 0, start).count == 0 and history.rolling("I005", 600).mean is None
+        
+        # Gaps leave empty slots, late samples replace retained slots
+        history.record("I002", start, 500)
+        history.record("I002", start + 10 * 60, 700)
+        history.record("I002", start + 5 * 60, 900)
+        stats = history.rolling("I002", 3600)
+        assert (stats.count, stats.total, stats.max, stats.mean) == (3, 2100, 900, 700)
+        history.record("I002", start + 5 * 60, 100)
+        assert history.rolling("I002", 3600).max == 700
+        history.record("I002", start + 1000 * 60, 50)
+        assert history.samples("I002") == [(start + 1000 * 60, 50)]
+        
+        # Memory is fixed per series and does not grow with the number of samples
+        assert history.memory_bytes() == 2 * bytes_per_series(60)
+        assert bytes_per_series(1440) < 1440 * 12
+        
+        with pytest.raises(ValueError):
+            history.record("I002", start, 10)
+        with pytest.raises(ValueError):
+            history.record("I002", start + 1000 * 60, -1)
+        with pytest.raises(ValueError):
+            record_traffic_volume(data, None, "I001", 10)
+        with pytest.raises(ValueError):
+            record_traffic_volume(data, history, "I999", 10)
+        with pytest.raises(ValueError):
+            VolumeHistory(capacity=0)
+        with pytest.raises(ValueError):
+            history.window("I001", 10, 5)
+        
+        test_obj.yakshaAssert("test_volume_history_ring_buffers", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_volume_history_ring_buffers", False, "functional")
+        pytest.fail(f"Volume history ring buffer test failed: {str(e)}")
+
+def test_live_ingestion_service(test_obj, tmp_path):
+    """Test the asyncio ingestion service with a fake sensor over TCP and Unix sockets"""
+    try:
+        intersection_data, _ = initialize_data()
+        ids = list(intersection_data)
+        payload = fake_sensor_payload(ids, 5000, seed=7)
+        readings, malformed = parse_readings(payload.split(b"\n"))
+        assert len(readings) == 5000 and malformed == 0
+        expected, errors = apply_updates(intersection_data, readings)
+        assert errors == []
+        
+        # Malformed lines are skipped one by one, the rest still parse
+        mixed, malformed = parse_readings([b'{"intersection_id": "I001", "traffic_volume": 5}', b"not json", b"  ", b"[1"])
+        assert len(mixed) == 1 and malformed == 2
+        
+        async def scenario():
+            # Readings sent over TCP end up applied in order
+            service = IngestionService(PersistentMap.from_dict(intersection_data))
+            server = await service.serve_tcp()
+            port = server.sockets[0].getsockname()[1]
+            bad_lines = b'{"intersection_id": "I999", "traffic_volume": 1}\nbroken\n'
+            await run_fake_sensor(payload + bad_lines, port=port)
+            await service.stop()
+            stats = service.stats()
+            assert dict(service.data.items()) == expected
+            assert (stats.received, stats.applied, stats.rejected) == (5001, 5000, 2)
+            assert service.recent_errors[-1][1] == "Intersection ID I999 not found"
+            
+            # A full queue pauses the sensor until the applier catches up
+            service = IngestionService(IntersectionStore.from_dict(intersection_data), max_queue=1, linger=0.2)
+            server = await service.serve_tcp()
+            pauses = await run_fake_sensor(payload, port=server.sockets[0].getsockname()[1], write_size=4096)
+            await service.stop()
+            assert pauses >= 1 and service.stats().backpressure_events >= pauses
+            assert {iid: dict(record) for iid, record in service.data.items()} == expected
+            
+            # submit reports when it had to wait for room
+            service = IngestionService(intersection_data, max_queue=1)
+            assert await service.submit([{"intersection_id": "I001", "traffic_volume": 10}]) is False
+            waiting = asyncio.ensure_future(service.submit([{"intersection_id": "I001", "traffic_volume": 20}]))
+            await asyncio.sleep(0.01)
+            assert not waiting.done()
+            await service.start()
+            assert await waiting is True
+            await service.stop()
+            assert service.data["I001"]["traffic_volume"] == 20 and intersection_data["I001"]["traffic_volume"] == 1200
+            
+            # A batch never exceeds max_batch; a list that overflows it is split across batches
+            service = IngestionService(intersection_data, max_batch=3, linger=0)
+            sizes = []
+            apply_batch = service._apply
+            service._apply = lambda batch: sizes.append(len(batch)) or apply_batch(batch)
+            for volume in (100, 200):
+                await service.submit([{"intersection_id": "I001", "traffic_volume": volume + step} for step in range(2)])
+            await service.submit([{"intersection_id": "I002", "traffic_volume": 300 + step} for step in range(8)])
+            await service.start()
+            await asyncio.wait_for(service.drain(), timeout=5)
+            assert sizes == [3, 3, 3, 3] and service.stats().applied == 12
+            assert service.data["I001"]["traffic_volume"] == 201 and service.data["I002"]["traffic_volume"] == 307
+            await service.stop()
+            
+            # A reading that makes apply_updates raise is rejected alone and drain still returns
+            broken = {**intersection_data, "I002": {key: value for key, value in intersection_data["I002"].items()
+                                                    if key != "incident_history"}}
+            service = IngestionService(broken, linger=0)
+            await service.start()
+            await service.submit([{"intersection_id": "I001", "traffic_volume": 99999999999999999999},
+                                  {"intersection_id": ["I001"], "traffic_volume": 1},
+                                  {"intersection_id": "I002", "incident": "Flooding"},
+                                  {"intersection_id": "I001", "traffic_volume": 1300}])
+            await asyncio.wait_for(service.drain(), timeout=5)
+            stats = service.stats()
+            assert (stats.applied, stats.rejected) == (1, 3) and service.data["I001"]["traffic_volume"] == 1300
+            assert "incident_history" in service.recent_errors[-1][1]
+            await service.submit([{"intersection_id": "I001", "traffic_volume": 1400}])
+            await asyncio.wait_for(service.stop(), timeout=5)
+            assert service.data["I001"]["traffic_volume"] == 1400
+            
+            if hasattr(socket, "AF_UNIX"):
+                service = IngestionService(intersection_data)
+                path = str(tmp_path / "sensors.sock")
+                await service.serve_unix(path)
+                await run_fake_sensor(payload, path=path)
+                await service.stop()
+                assert service.data == expected
+        
+        asyncio.run(scenario())
+        
+        with pytest.raises(ValueError):
+            IngestionService(None)
+        with pytest.raises(ValueError):
+            IngestionService(intersection_data, max_queue=0)
+        
+        test_obj.yakshaAssert("test_live_ingestion_service", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_live_ingestion_service", False, "functional")
+        pytest.fail(f"Live ingestion service test failed: {str(e)}")
+
+def test_mvcc_snapshots(test_obj):
+    """Test lock-free snapshot reads under concurrent writers and reclamation of old versions"""
+    try:
+        intersection_data, _ = initialize_data()
+        
+        # Readers are not blocked by a writer that is building the next version
+        versions = VersionedData(intersection_data)
+        first = versions.snapshot()
+        assert isinstance(first, Snapshot) and first.version == 1 and versions.version == 1
+        building, release = threading.Event(), threading.Event()
+        
+        def slow_update(data, iid, new_volume):
+            building.set()
+            release.wait(5)
+            return update_traffic_volume(data, iid, new_volume)
+        
+        writer = threading.Thread(target=versions.update, args=(slow_update, "I001", 10))
+        writer.start()
+        assert building.wait(5)
+        assert versions.snapshot() is first and versions.read(calculate_total_traffic_volume) > 0
+        release.set()
+        writer.join(5)
+        assert versions.version == 2 and versions.snapshot().data["I001"]["traffic_volume"] == 10
+        assert first.data["I001"]["traffic_volume"] == 1200
+        
+        # Writers move volume between two intersections, so every version has the same total
+        for data in (IntersectionStore.from_dict(intersection_data, indexes=INDEX_TYPES),
+                     PersistentMap.from_dict(intersection_data)):
+            versions = VersionedData(data)
+            total = versions.read(calculate_total_traffic_volume)
+            stop = threading.Event()
+            failures, latencies = [], []
+            
+            def write(step):
+                volume = 0
+                # A fixed number of versions, rather than a timed window, bounds the run
+                for _ in range(200):
+                    volume = (volume + step) % 1000
+                    current = versions.snapshot().data
+                    moved = current["I001"]["traffic_volume"] + current["I002"]["traffic_volume"]
+                    errors = versions.apply_updates([
+                        {"intersection_id": "I001", "traffic_volume": volume},
+                        {"intersection_id": "I002", "traffic_volume": moved - volume},
+                    ])
+                    if errors:
+                        failures.append(errors)
+                stop.set()
+            
+            def read():
+                last_version = 0
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    snapshot = versions.snapshot()
+                    if calculate_total_traffic_volume(snapshot.data) != total or snapshot.version < last_version:
+                        failures.append(snapshot.version)
+                    last_version = snapshot.version
+                    latencies.append(time.perf_counter() - started)
+            
+            # A single writer, since it reads the volumes to move before publishing
+            threads = [threading.Thread(target=read) for _ in range(3)] + [threading.Thread(target=write, args=(7,))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(30)
+            assert failures == [] and latencies and versions.version == 201
+        
+        # An old version lives while it is pinned and is reclaimed afterwards
+        versions = VersionedData(intersection_data)
+        pinned = versions.snapshot()
+        versions.update(update_congestion_level, "I001", "Low")
+        versions.update(update_congestion_level, "I001", "High")
+        assert versions.live_versions() == [1, 3] and versions.reclaimed_count() == 1
+        assert pinned.data["I001"]["congestion_level"] == "High"
+        del pinned
+        gc.collect()
+        assert versions.live_versions() == [3] and versions.reclaimed_count() == 2
+        
+        # Reclamation follows the data, so cached reads neither pin old versions nor hide live ones;
+        # a held store result is made of record views, which keep their version alive
+        for build, live_while_held in ((lambda: IntersectionStore.from_dict(intersection_data, indexes=INDEX_TYPES), [20, 21]),
+                                       (lambda: PersistentMap.from_dict(intersection_data), [21])):
+            tracked = VersionedData(build())
+            held = None
+            for volume in range(20):
+                held = tracked.read(filter_by_traffic_volume, 0, 5000)
+                tracked.read(top_intersections_by_volume, 3)
+                tracked.read(calculate_volume_percentile, 50)
+                tracked.update(update_traffic_volume, "I001", volume)
+            gc.collect()
+            assert tracked.live_versions() == live_while_held
+            del held
+            gc.collect()
+            assert tracked.live_versions() == [21] and tracked.reclaimed_count() == 20
+        
+        # An update batch that changes nothing does not publish a version
+        errors = versions.apply_updates([{"intersection_id": "I999", "traffic_volume": 1}])
+        assert len(errors) == 1 and versions.version == 3
+        
+        with pytest.raises(ValueError):
+            VersionedData(None)
+        with pytest.raises(ValueError):
+            versions.publish(None)
+        
+        test_obj.yakshaAssert("test_mvcc_snapshots", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_mvcc_snapshots", False, "functional")
+        pytest.fail(f"MVCC snapshot test failed: {str(e)}")
+
+def test_write_ahead_log_recovery(test_obj, tmp_path):
+    """Test logged updates, group commit, checkpoints, torn log tails and recovery"""
+    try:
+        intersection_data, new_intersections = initialize_data()
+        directory = str(tmp_path / "wal")
+        
+        def as_dicts(data):
+            return {iid: dict(record) for iid, record in data.items()}
+        
+        # Every kind of mutation is logged and replayed after the checkpoint
+        durable = DurableData(directory, PersistentMap.from_dict(intersection_data))
+        durable.update_traffic_volume("I001", 10)
+        durable.update_congestion_level("I002", "Low")
+        durable.add_incident_record("I003", "Fire")
+        durable.merge_intersection_data(new_intersections)
+        errors = durable.apply_updates([{"intersection_id": "I004", "traffic_volume": 7},
+                                        {"intersection_id": "I999", "traffic_volume": 1}])
+        assert len(errors) == 1 and durable.log.lsn == 5
+        assert durable.commit() == 5 and durable.log.durable_lsn == 5
+        expected = as_dicts(durable.data)
+        durable.close()
+        recovered, lsn = recover(directory)
+        assert lsn == 5 and isinstance(recovered, IntersectionStore) and as_dicts(recovered) == expected
+        
+        # Rejected changes are neither applied nor logged
+        durable = DurableData(directory, indexes=INDEX_TYPES)
+        assert as_dicts(durable.data) == expected
+        with pytest.raises(ValueError):
+            durable.update_traffic_volume("I001", 10.5)
+        with pytest.raises(ValueError):
+            durable.update_congestion_level("I999", "Low")
+        assert durable.log.lsn == 5 and durable.data["I001"]["traffic_volume"] == 10
+        
+        # A record cut short by a crash is discarded together with the change it held
+        durable.update_traffic_volume("I005", 1)
+        durable.close()
+        segment = sorted((tmp_path / "wal").glob("wal-*.log"))[-1]
+        with open(segment, "r+b") as file:
+            file.truncate(segment.stat().st_size - 3)
+        records, valid_length, complete = read_segment(str(segment))
+        assert not complete and records[-1][0] == 5
+        durable = DurableData(directory)
+        assert durable.log.lsn == 5 and as_dicts(durable.data) == expected
+        assert segment.stat().st_size == valid_length
+        durable.close()
+        
+        # Changes a store would reject are refused on dictionaries too, so recovery never fails
+        durable = DurableData(str(tmp_path / "strict"), intersection_data, sync_interval=0)
+        with pytest.raises(ValueError):
+            durable.merge_intersection_data({"N003": {**new_intersections["N001"], "congestion_level": "Gridlock"}})
+        with pytest.raises(ValueError):
+            durable.merge_intersection_data({"N003": {"name": "Half a record"}})
+        with pytest.raises(ValueError):
+            durable.update_traffic_volume("I001", 2 ** 40)
+        with pytest.raises(ValueError):
+            durable.add_incident_record("I001", 5)
+        durable.merge_intersection_data(new_intersections)
+        expected = as_dicts(durable.data)
+        # Simulate a crash: the log is left as it is, without a final checkpoint
+        durable.log.close()
+        recovered, lsn = recover(str(tmp_path / "strict"), INDEX_TYPES)
+        assert lsn == 1 and as_dicts(recovered) == expected
+        
+        # Checkpoints compact the log and recovery replays only the tail
+        durable = DurableData(str(tmp_path / "compact"), intersection_data, sync_interval=0, checkpoint_bytes=200)
+        for volume in range(30):
+            durable.update_traffic_volume("I001", volume)
+            assert durable.log.durable_lsn == durable.log.lsn
+        files = sorted(path.name for path in (tmp_path / "compact").iterdir())
+        assert len(files) == 2 and files[0].startswith("checkpoint-") and files[1].startswith("wal-")
+        durable.close()
+        recovered, lsn = recover(str(tmp_path / "compact"))
+        assert lsn == 30 and recovered["I001"]["traffic_volume"] == 29
+        assert intersection_data["I001"]["traffic_volume"] == 1200
+        
+        with pytest.raises(ValueError):
+            DurableData(str(tmp_path / "empty"))
+        with pytest.raises(ValueError):
+            WriteAheadLog(None)
+        log = WriteAheadLog(str(tmp_path / "closed"))
+        log.close()
+        with pytest.raises(ValueError):
+            log.append_volume("I001", 1)
+        
+        test_obj.yakshaAssert("test_write_ahead_log_recovery", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_write_ahead_log_recovery", False, "functional")
+        pytest.fail(f"Write-ahead log recovery test failed: {str(e)}")
+
+def test_benchmark_harness(test_obj):
+    """Test the seeded intersection generator and the benchmark results format"""
+    try:
+        # The generator is deterministic and produces valid, skewed data
+        intersection_data = generate_intersections(2000, seed=5)
+        assert intersection_data == generate_intersections(2000, seed=5)
+        assert intersection_data != generate_intersections(2000, seed=6)
+        assert list(generate_intersections(2, prefix="N", start=10)) == ["N0000010", "N0000011"]
+        store = IntersectionStore.from_dict(intersection_data, indexes=INDEX_TYPES)
+        assert len(store) == 2000 and sum(calculate_congestion_distribution(store).values()) == 2000
+        assert filter_by_peak_hour_overlap(intersection_data, "07:30-08:30")
+        volumes = sorted(intersection["traffic_volume"] for intersection in intersection_data.values())
+        assert volumes[-1] > 3 * volumes[len(volumes) // 2]
+        landmark_counts = {}
+        for intersection in intersection_data.values():
+            assert 1 <= len(intersection["nearby_landmarks"]) == len(set(intersection["nearby_landmarks"])) <= 3
+            for landmark in intersection["nearby_landmarks"]:
+                landmark_counts[landmark] = landmark_counts.get(landmark, 0) + 1
+        counts = sorted(landmark_counts.values(), reverse=True)
+        assert counts[0] > 10 * counts[len(counts) // 2]
+        
+        # Every public function except the interactive main is timed, on every backend
+        module = importlib.import_module("urban_traffic_analysis_platform")
+        public = {name for name, member in inspect.getmembers(module, inspect.isfunction)
+                  if not name.startswith("_") and member.__module__ == module.__name__} - {"main"}
+        results = run_benchmarks(sizes=[300], seed=1, min_time=0, max_repeats=2)
+        timed = {(result["backend"], result["function"]) for result in results["results"]}
+        assert timed == {(backend, name) for backend in BACKENDS for name in public}
+        assert all(result["repeats"] == 1 and result["median_s"] >= 0 for result in results["results"])
+        assert json.loads(json.dumps(results)) == results and results["seed"] == 1
+        
+        # Comparing runs reports the functions that slowed down beyond the tolerance
+        slower = {**results, "results": [{**result, "min_s": result["min_s"] * 2 + 1}
+                                         if result["function"] == "apply_updates" else result
+                                         for result in results["results"]]}
+        regressions = compare_results(results, slower)
+        assert {regression[2] for regression in regressions} == {"apply_updates"} and len(regressions) == len(BACKENDS)
+        assert compare_results(results, results) == []
+        
+        only = run_benchmarks(sizes=[50], backends=["store"], min_time=0, functions=["apply_updates"])
+        assert [result["function"] for result in only["results"]] == ["apply_updates"]
+        with pytest.raises(ValueError):
+            run_benchmarks(sizes=[0])
+        with pytest.raises(ValueError):
+            run_benchmarks(sizes=[10], backends=["sqlite"])
+        with pytest.raises(ValueError):
+            generate_intersections(-1)
+        
+        test_obj.yakshaAssert("test_benchmark_harness", True, "functional")
+    except Exception as e:
+        test_obj.yakshaAssert("test_benchmark_harness", False, "functional")
+        pytest.fail(f"Benchmark harness test failed: {str(e)}")
+
 if __name__ == '__main__':
     pytest.main(['-v'])
\ No newline at end of file
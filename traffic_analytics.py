@@ -0,0 +1,146 @@
+"""
+Traffic Analytics
+Optional NumPy backend for the traffic statistics.
+
+The platform's statistics functions use pure Python by default. Selecting the
+"numpy" backend with set_analytics_backend routes them to the vectorized
+versions in this module, which return results identical to the pure-Python
+ones. NumPy is optional: the "python" backend works without it, and
+selecting "numpy" when it is not installed raises a ValueError.
+"""
+
+from intersection_store import CONGESTION_LEVELS, VOLUME_BRACKETS, VOLUME_BRACKET_LIMITS, IntersectionStore
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ANALYTICS_BACKENDS = ("python", "numpy")
+_backend = "python"
+
+
+def numpy_available():
+    """Return True if NumPy can be imported."""
+    return np is not None
+
+
+def get_analytics_backend():
+    """Return the name of the selected analytics backend."""
+    return _backend
+
+
+def set_analytics_backend(backend):
+    """
+    Select the backend used by the statistics functions.
+
+    Args:
+        backend (str): "python" or "numpy"
+
+    Returns:
+        str: The previously selected backend
+    """
+    global _backend
+    if backend not in ANALYTICS_BACKENDS:
+        raise ValueError(f"Invalid analytics backend. Must be one of {list(ANALYTICS_BACKENDS)}")
+    if backend == "numpy" and np is None:
+        raise ValueError("The numpy analytics backend requires NumPy to be installed")
+    previous, _backend = _backend, backend
+    return previous
+
+
+def _volumes(intersection_data):
+    if isinstance(intersection_data, IntersectionStore):
+        return np.frombuffer(intersection_data.export_columns()["volumes"], dtype=np.int64)
+    volumes = [intersection["traffic_volume"] for intersection in intersection_data.values()]
+    # Dictionaries may hold float volumes, which must not be truncated
+    dtype = np.int64 if all(isinstance(volume, int) for volume in volumes) else np.float64
+    return np.array(volumes, dtype=dtype)
+
+
+def _incident_counts(intersection_data):
+    if isinstance(intersection_data, IntersectionStore):
+        incidents = intersection_data.export_columns()["incidents"]
+    else:
+        incidents = (intersection["incident_history"] for intersection in intersection_data.values())
+    return np.fromiter(map(len, incidents), dtype=np.int64, count=len(intersection_data))
+
+
+def vectorized_congestion_distribution(intersection_data):
+    """
+    Count intersections per congestion level with np.bincount.
+
+    Levels are counted in order of first appearance, matching the
+    pure-Python version; stores report levels in CONGESTION_LEVELS order.
+
+    Args:
+        intersection_data (dict): The intersection data dictionary
+
+    Returns:
+        dict: Dictionary with congestion levels as keys and counts as values
+    """
+    if isinstance(intersection_data, IntersectionStore):
+        levels = np.frombuffer(intersection_data.export_columns()["levels"], dtype=np.uint8)
+        counts = np.bincount(levels, minlength=len(CONGESTION_LEVELS)).tolist()
+        return {level: count for level, count in zip(CONGESTION_LEVELS, counts) if count}
+
+    # Codes are assigned as levels are first seen, so bincount keeps first-appearance order
+    codes = {}
+    level_codes = np.fromiter(
+        (codes.setdefault(intersection["congestion_level"], len(codes)) for intersection in intersection_data.values()),
+        dtype=np.intp, count=len(intersection_data)
+    )
+    return dict(zip(codes, np.bincount(level_codes, minlength=len(codes)).tolist()))
+
+
+def vectorized_total_traffic_volume(intersection_data):
+    """
+    Sum all traffic volumes with NumPy.
+
+    Args:
+        intersection_data (dict): The intersection data dictionary
+
+    Returns:
+        int: Total traffic volume, a float if any volume is a float
+    """
+    return _volumes(intersection_data).sum().item()
+
+
+def vectorized_volume_brackets(intersection_data):
+    """
+    Group intersection IDs into volume brackets with np.digitize.
+
+    Args:
+        intersection_data (dict): The intersection data dictionary
+
+    Returns:
+        dict: Dictionary with volume brackets as keys and lists of intersection IDs as values
+    """
+    # right=True puts a volume equal to a limit in the lower bracket, like volume <= 750
+    bracket_of = np.digitize(_volumes(intersection_data), VOLUME_BRACKET_LIMITS, right=True)
+    # A stable sort groups rows by bracket while keeping their original order
+    order = np.argsort(bracket_of, kind="stable").tolist()
+    bounds = np.cumsum(np.bincount(bracket_of, minlength=len(VOLUME_BRACKETS))).tolist()
+
+    ids = list(intersection_data)
+    sorted_ids = [ids[row] for row in order]
+    starts = [0] + bounds[:-1]
+    return {name: sorted_ids[start:end] for name, start, end in zip(VOLUME_BRACKETS, starts, bounds)}
+
+
+def vectorized_high_incident_areas(intersection_data, threshold=1):
+    """
+    Find intersections with more than threshold incidents from a counts array.
+
+    Args:
+        intersection_data (dict): The intersection data dictionary
+        threshold (int): Minimum number of incidents
+
+    Returns:
+        dict: Dictionary of high incident intersections
+    """
+    rows = np.flatnonzero(_incident_counts(intersection_data) > threshold).tolist()
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.records(rows)
+    items = list(intersection_data.items())
+    return dict(items[row] for row in rows)
@@ -0,0 +1,482 @@
+"""
+Traffic Benchmark
+Seeded synthetic intersections and a timing harness for the public functions.
+
+generate_intersections builds deterministic intersection data of any size in
+the format of initialize_data:
+
+- traffic volumes are lognormal, so most intersections are quiet and a few
+  are very busy, and the congestion level follows the volume with some noise
+- peak hours are morning and evening rush periods with varied starts and
+  lengths, and some intersections also have a midday peak
+- landmarks and incident types are drawn from Zipf distributions, so a few
+  of them are very common and most are rare
+- coordinates cluster around district centres, themselves of Zipfian size
+
+run_benchmarks times every public function of urban_traffic_analysis_platform
+except the interactive main on each requested size and backend. Functions
+behind the result cache are timed cold, with the cache cleared before every
+call. The results are plain JSON-ready dictionaries, and compare_results lists
+the functions that became slower than a baseline run, so results saved from
+two commits can be compared:
+
+    python traffic_benchmark.py --sizes 1000 100000 --output after.json --compare before.json
+"""
+
+import argparse
+import gc
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from bisect import bisect_right
+from contextlib import contextmanager, redirect_stdout, suppress
+from itertools import accumulate
+
+from intersection_store import CONGESTION_LEVELS, IntersectionStore
+from persistent_map import PersistentMap
+from traffic_cache import RESULT_CACHE
+from traffic_indexes import INDEX_TYPES
+from traffic_timeseries import VolumeHistory
+from urban_traffic_analysis_platform import (
+    initialize_data,
+    get_formatted_intersection,
+    display_data,
+    filter_by_congestion_level,
+    filter_by_traffic_volume,
+    filter_by_peak_hour,
+    find_intersections_in_peak_at,
+    filter_by_peak_hour_overlap,
+    filter_by_incident_type,
+    find_intersections_near_landmark,
+    find_intersections_within_radius,
+    find_intersections_in_bbox,
+    find_nearest_intersections,
+    update_traffic_volume,
+    record_traffic_volume,
+    update_congestion_level,
+    add_incident_record,
+    merge_intersection_data,
+    apply_updates,
+    calculate_congestion_distribution,
+    calculate_total_traffic_volume,
+    find_high_incident_areas,
+    top_k_incident_areas,
+    create_volume_brackets,
+    top_intersections_by_volume,
+    calculate_volume_percentile
+)
+
+RESULTS_FORMAT = 1
+DEFAULT_SIZES = (1000, 100000, 1000000)
+BACKENDS = ("dict", "store", "persistent_map")
+# Seconds each function is repeated for, unless it reaches MAX_REPEATS first
+DEFAULT_MIN_TIME = 0.2
+MAX_REPEATS = 50
+# Relative slowdown over the baseline reported as a regression
+DEFAULT_TOLERANCE = 0.2
+# Intersections formatted or displayed per timed call
+FORMAT_SAMPLE = 1000
+
+CITY_CENTER = (40.7128, -74.0060)
+DISTRICT_COUNT = 24
+ZIPF_EXPONENT = 1.1
+# Lognormal volume parameters: a median near 730 vehicles per hour
+VOLUME_MU = 6.6
+VOLUME_SIGMA = 0.6
+MAX_VOLUME = 6000
+# Volumes at which the typical congestion level steps up
+LEVEL_THRESHOLDS = (400, 800, 1200, 1800)
+# Relative weights of having 0, 1, 2, ... incidents on record
+INCIDENT_COUNT_WEIGHTS = (45, 25, 13, 8, 5, 3, 1)
+
+STREETS = (
+    "Main", "Broadway", "Park", "5th", "River", "Market", "Oak", "Pine", "Maple", "Cedar",
+    "Elm", "Washington", "Lincoln", "Madison", "Jefferson", "Franklin", "Union", "Church",
+    "Spring", "Hill", "Lake", "Bridge", "Mill", "Water", "Harbor", "College", "Grand",
+    "Chestnut", "Walnut", "Highland", "Sunset", "Liberty"
+)
+LANDMARKS = (
+    "Central Station", "City Hall", "Shopping Mall", "Central Park", "Museum", "Office Complex",
+    "Financial District", "Ferry Terminal", "Restaurant Row", "University", "Hospital", "Stadium",
+    "Convention Center", "Public Library", "Farmers Market", "Art Gallery", "Police Station",
+    "Fire Station", "High School", "Bus Depot", "Concert Hall", "Courthouse", "Zoo", "Aquarium",
+    "Botanical Garden", "Tech Park", "Industrial Park", "Cathedral", "Opera House", "Marina"
+) + tuple(f"{street} {kind}" for kind in ("Plaza", "Elementary", "Clinic", "Market") for street in STREETS)
+INCIDENT_TYPES = (
+    "Accident", "Road Work", "Signal Failure", "Flooding", "Traffic Light Outage",
+    "Multiple Accidents", "Vehicle Breakdown", "Construction", "Pedestrian Incident",
+    "Water Main Break", "Power Outage", "Fallen Tree"
+)
+# (start choices in minutes, start weights, length choices in minutes) per rush period
+MORNING_PEAKS = ((390, 420, 450, 480, 510), (2, 6, 4, 2, 1), (90, 120, 150, 180))
+EVENING_PEAKS = ((900, 930, 960, 990, 1020, 1050), (1, 2, 5, 4, 3, 1), (120, 150, 180, 210))
+MIDDAY_PEAKS = ((660, 690, 720), (1, 2, 1), (90, 120))
+MIDDAY_SHARE = 0.2
+
+# Fixed query arguments, chosen to hit typical rather than empty results
+QUERY_TIME = "08:15"
+QUERY_PERIOD = "07:30-08:30"
+QUERY_VOLUME_RANGE = (1000, 2000)
+QUERY_RADIUS_M = 1500
+QUERY_BOX_HALF_SIZE = 0.02
+UPDATE_BATCH = 1000
+MERGE_SHARE = 0.01
+
+
+def _zipf_cumulative_weights(count, exponent=ZIPF_EXPONENT):
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def _format_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _peak_choices(peaks):
+    """Return every period of a rush period table with its weight."""
+    starts, weights, lengths = peaks
+    periods = [f"{_format_minutes(start)}-{_format_minutes(start + length)}" for start in starts for length in lengths]
+    return periods, [weight for weight in weights for _ in lengths]
+
+
+def _distinct(values, limit):
+    """Return up to limit distinct values, in order of first appearance."""
+    return list(dict.fromkeys(values))[:limit]
+
+
+def generate_intersections(count, seed=0, prefix="I", start=0):
+    """
+    Generate deterministic synthetic intersection data.
+
+    The same arguments always produce the same data. Every column is drawn in
+    bulk, which keeps a million intersections to a few seconds.
+
+    Args:
+        count (int): Number of intersections
+        seed (int): Random seed
+        prefix (str): Intersection ID prefix
+        start (int): Number of the first intersection ID
+
+    Returns:
+        dict: Intersection data dictionary with IDs such as "I0000042"
+    """
+    if count is None or count < 0:
+        raise ValueError("Count cannot be None or negative")
+    generator = random.Random(seed)
+    districts = [(CITY_CENTER[0] + generator.uniform(-0.12, 0.12), CITY_CENTER[1] + generator.uniform(-0.15, 0.15),
+                  generator.uniform(0.004, 0.02)) for _ in range(DISTRICT_COUNT)]
+    street_pairs = [f"{first} & {second}" for first in STREETS for second in STREETS if first != second]
+
+    names = generator.choices(street_pairs, k=count)
+    locations = generator.choices(districts, cum_weights=_zipf_cumulative_weights(DISTRICT_COUNT), k=count)
+    volumes = [min(int(generator.lognormvariate(VOLUME_MU, VOLUME_SIGMA)), MAX_VOLUME) for _ in range(count)]
+    mornings = generator.choices(*_peak_choices(MORNING_PEAKS), k=count)
+    evenings = generator.choices(*_peak_choices(EVENING_PEAKS), k=count)
+    middays = generator.choices(*_peak_choices(MIDDAY_PEAKS), k=count)
+    landmark_counts = generator.choices((1, 2, 3), k=count)
+    landmarks = generator.choices(LANDMARKS, cum_weights=_zipf_cumulative_weights(len(LANDMARKS)), k=3 * count)
+    incident_counts = generator.choices(range(len(INCIDENT_COUNT_WEIGHTS)), INCIDENT_COUNT_WEIGHTS, k=count)
+    # Two draws per incident leave room for repeats of the common types
+    incidents = generator.choices(INCIDENT_TYPES, cum_weights=_zipf_cumulative_weights(len(INCIDENT_TYPES)),
+                                  k=2 * sum(incident_counts))
+    gauss, random_share = generator.gauss, generator.random
+
+    intersection_data = {}
+    incident_position = 0
+    for row in range(count):
+        latitude, longitude, spread = locations[row]
+        volume = volumes[row]
+        noisy_volume = volume * (0.8 + 0.45 * random_share())
+        peak_hours = [mornings[row], evenings[row]]
+        if random_share() < MIDDAY_SHARE:
+            peak_hours.insert(1, middays[row])
+        incident_count = incident_counts[row]
+        intersection_data[f"{prefix}{start + row:07d}"] = {
+            "name": names[row],
+            "coordinates": (round(gauss(latitude, spread), 6), round(gauss(longitude, spread), 6)),
+            "traffic_volume": volume,
+            "congestion_level": CONGESTION_LEVELS[bisect_right(LEVEL_THRESHOLDS, noisy_volume)],
+            "peak_hours": peak_hours,
+            "nearby_landmarks": _distinct(landmarks[3 * row:3 * row + 3], landmark_counts[row]),
+            "incident_history": _distinct(incidents[incident_position:incident_position + 2 * incident_count],
+                                          incident_count)
+        }
+        incident_position += 2 * incident_count
+    return intersection_data
+
+
+def build_backend(intersection_data, backend):
+    """
+    Convert generated data to one of BACKENDS.
+
+    Stores get the indexes the platform creates at startup.
+
+    Args:
+        intersection_data (dict): The intersection data dictionary
+        backend (str): "dict", "store" or "persistent_map"
+
+    Returns:
+        Intersection data of the requested type
+    """
+    if backend == "dict":
+        return intersection_data
+    if backend == "store":
+        return IntersectionStore.from_dict(intersection_data, indexes=INDEX_TYPES)
+    if backend == "persistent_map":
+        return PersistentMap.from_dict(intersection_data)
+    raise ValueError(f"Invalid backend. Must be one of {list(BACKENDS)}")
+
+
+@contextmanager
+def _gc_paused():
+    """Pause cyclic garbage collection, which rescans every new record while large data is built."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _display_sample(sample):
+    with redirect_stdout(io.StringIO()):
+        display_data(sample, "intersections")
+
+
+def benchmark_cases(intersection_data, seed=0):
+    """
+    Build the timed calls for one dataset.
+
+    Args:
+        intersection_data: Data to run the functions on, of any backend
+        seed (int): Seed for the update arguments and the merged feed
+
+    Returns:
+        list: (function name, items per call, callable) triples
+    """
+    generator = random.Random(seed)
+    ids = list(intersection_data.keys())
+    iid = generator.choice(ids)
+    latitude, longitude = CITY_CENTER
+    updates = [{"intersection_id": generator.choice(ids), "traffic_volume": generator.randrange(MAX_VOLUME)}
+               for _ in range(UPDATE_BATCH)]
+    feed = generate_intersections(max(1, int(len(ids) * MERGE_SHARE)), seed + 1, prefix="N")
+    sample = {sample_id: intersection_data[sample_id] for sample_id in ids[:FORMAT_SAMPLE]}
+    history = VolumeHistory()
+    clock = iter(range(0, 10 ** 9, history.resolution))
+    data = intersection_data
+
+    return [
+        ("initialize_data", 1, initialize_data),
+        ("get_formatted_intersection", len(sample),
+         lambda: [get_formatted_intersection(key, value) for key, value in sample.items()]),
+        ("display_data", len(sample), lambda: _display_sample(sample)),
+        ("filter_by_congestion_level", 1, lambda: filter_by_congestion_level(data, "High")),
+        ("filter_by_traffic_volume", 1, lambda: filter_by_traffic_volume(data, *QUERY_VOLUME_RANGE)),
+        ("filter_by_peak_hour", 1, lambda: filter_by_peak_hour(data, "07:00-09:00")),
+        ("find_intersections_in_peak_at", 1, lambda: find_intersections_in_peak_at(data, QUERY_TIME)),
+        ("filter_by_peak_hour_overlap", 1, lambda: filter_by_peak_hour_overlap(data, QUERY_PERIOD)),
+        ("filter_by_incident_type", 1, lambda: filter_by_incident_type(data, INCIDENT_TYPES[0])),
+        ("find_intersections_near_landmark", 1,
+         lambda: find_intersections_near_landmark(data, LANDMARKS[0])),
+        ("find_intersections_within_radius", 1,
+         lambda: find_intersections_within_radius(data, latitude, longitude, QUERY_RADIUS_M)),
+        ("find_intersections_in_bbox", 1,
+         lambda: find_intersections_in_bbox(data, latitude - QUERY_BOX_HALF_SIZE, longitude - QUERY_BOX_HALF_SIZE,
+                                                   latitude + QUERY_BOX_HALF_SIZE, longitude + QUERY_BOX_HALF_SIZE)),
+        ("find_nearest_intersections", 1, lambda: find_nearest_intersections(data, latitude, longitude, 10)),
+        ("update_traffic_volume", 1, lambda: update_traffic_volume(data, iid, 1234)),
+        ("record_traffic_volume", 1, lambda: record_traffic_volume(data, history, iid, 1234, next(clock))),
+        ("update_congestion_level", 1, lambda: update_congestion_level(data, iid, "Critical")),
+        ("add_incident_record", 1, lambda: add_incident_record(data, iid, "Benchmark Incident")),
+        ("merge_intersection_data", len(feed), lambda: merge_intersection_data(data, feed)),
+        ("apply_updates", len(updates), lambda: apply_updates(data, updates)),
+        ("calculate_congestion_distribution", 1, lambda: calculate_congestion_distribution(data)),
+        ("calculate_total_traffic_volume", 1, lambda: calculate_total_traffic_volume(data)),
+        ("find_high_incident_areas", 1, lambda: find_high_incident_areas(data, 3)),
+        ("top_k_incident_areas", 1, lambda: top_k_incident_areas(data, 10)),
+        ("create_volume_brackets", 1, lambda: create_volume_brackets(data)),
+        ("top_intersections_by_volume", 1, lambda: top_intersections_by_volume(data, 10)),
+        ("calculate_volume_percentile", 1, lambda: calculate_volume_percentile(data, 90))
+    ]
+
+
+def time_call(function, min_time=DEFAULT_MIN_TIME, max_repeats=MAX_REPEATS):
+    """
+    Time repeated calls with an empty result cache.
+
+    Args:
+        function (callable): Call to time
+        min_time (float): Seconds to keep repeating for
+        max_repeats (int): Maximum number of calls
+
+    Returns:
+        dict: Median and minimum seconds per call and the number of calls
+    """
+    gc.collect()
+    timings = []
+    started = time.perf_counter()
+    while not timings or (len(timings) < max_repeats and time.perf_counter() - started < min_time):
+        RESULT_CACHE.clear()
+        call_started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - call_started)
+    return {"median_s": statistics.median(timings), "min_s": min(timings), "repeats": len(timings)}
+
+
+def _current_commit():
+    with suppress(OSError, subprocess.CalledProcessError):
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    return None
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, backends=BACKENDS, seed=0, min_time=DEFAULT_MIN_TIME,
+                   max_repeats=MAX_REPEATS, functions=None, progress=None):
+    """
+    Time the public functions on generated data of every size and backend.
+
+    Args:
+        sizes (iterable): Numbers of intersections
+        backends (iterable): Backends from BACKENDS
+        seed (int): Seed of the generated data
+        min_time (float): Seconds each function is repeated for
+        max_repeats (int): Maximum number of calls per function
+        functions (iterable): Names of the functions to time; all of them if None
+        progress (callable): Called with each result as it is measured
+
+    Returns:
+        dict: JSON-ready results with the environment and one entry per
+            (backend, size, function), including generation and build times
+    """
+    if sizes is None or any(size is None or size <= 0 for size in sizes):
+        raise ValueError("Sizes must be positive")
+    for backend in backends:
+        if backend not in BACKENDS:
+            raise ValueError(f"Invalid backend. Must be one of {list(BACKENDS)}")
+    selected = None if functions is None else set(functions)
+
+    results = []
+    for size in sizes:
+        started = time.perf_counter()
+        with _gc_paused():
+            intersection_data = generate_intersections(size, seed)
+        generated = time.perf_counter() - started
+        for backend in backends:
+            started = time.perf_counter()
+            with _gc_paused():
+                data = build_backend(intersection_data, backend)
+            setup = {"generate_s": generated, "build_s": time.perf_counter() - started}
+            for name, items, function in benchmark_cases(data, seed):
+                if selected is not None and name not in selected:
+                    continue
+                result = {"backend": backend, "size": size, "function": name, "items": items,
+                          **time_call(function, min_time, max_repeats), **setup}
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+            del data
+    return {
+        "format": RESULTS_FORMAT,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": _current_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "results": results
+    }
+
+
+def compare_results(baseline, current, tolerance=DEFAULT_TOLERANCE, statistic="min_s"):
+    """
+    Find the functions that became slower than in a baseline run.
+
+    The fastest call is compared by default, since it is the timing least
+    disturbed by other load on the machine.
+
+    Args:
+        baseline (dict): Results of run_benchmarks, for example from an earlier commit
+        current (dict): Results of run_benchmarks to check
+        tolerance (float): Allowed relative slowdown
+        statistic (str): "min_s" or "median_s"
+
+    Returns:
+        list: (backend, size, function, baseline_seconds, current_seconds, ratio)
+            tuples for the regressions, largest ratio first
+    """
+    if baseline is None or current is None:
+        raise ValueError("Results cannot be None")
+    if tolerance is None or tolerance < 0:
+        raise ValueError("Tolerance cannot be None or negative")
+    if statistic not in ("min_s", "median_s"):
+        raise ValueError("Statistic must be min_s or median_s")
+    timings = {(result["backend"], result["size"], result["function"]): result[statistic]
+               for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        key = (result["backend"], result["size"], result["function"])
+        before = timings.get(key)
+        if before and result[statistic] > before * (1 + tolerance):
+            regressions.append((*key, before, result[statistic], result[statistic] / before))
+    return sorted(regressions, key=lambda regression: -regression[-1])
+
+
+def _format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def _print_result(result):
+    print(f"{result['backend']:>14} {result['size']:>8} {result['function']:<34} "
+          f"{_format_seconds(result['median_s']):>10}  ({result['repeats']} calls)")
+
+
+def main(arguments=None):
+    """
+    Run the benchmarks from the command line.
+
+    Args:
+        arguments (list): Command line arguments; sys.argv[1:] if None
+
+    Returns:
+        int: Exit status, 1 if a comparison found regressions
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the urban traffic analysis platform.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--functions", nargs="+", help="only time these functions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--compare", help="report regressions against a JSON results file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    options = parser.parse_args(arguments)
+
+    results = run_benchmarks(options.sizes, options.backends, options.seed, options.min_time,
+                             functions=options.functions, progress=_print_result)
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    if not options.compare:
+        return 0
+
+    with open(options.compare, encoding="utf-8") as file:
+        regressions = compare_results(json.load(file), results, options.tolerance)
+    for backend, size, name, before, after, ratio in regressions:
+        print(f"Regression: {backend} {size} {name} {_format_seconds(before)} -> {_format_seconds(after)} "
+              f"({ratio:.2f}x)")
+    if not regressions:
+        print("No regressions.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+Traffic Cache
+Versioned LRU cache for filter and statistics results.
+
+Results are keyed on (function, arguments, dataset version). IntersectionStore
+and PersistentMap carry a version token that changes whenever their contents
+change. The update and merge functions always produce a new version, so a
+cached result can never be served for data it was not computed from.
+Superseded entries are never hit again and age out through LRU eviction.
+Results made of a store's record views are cached as their row numbers and
+rebuilt on a hit, so an entry never keeps an old store version alive.
+
+Plain dictionaries have no version and can be modified in place, so calls on
+them bypass the cache. The cache can be shared between threads: a lock guards
+the bookkeeping, never the computation of a result.
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+from intersection_store import IntersectionStore
+from persistent_map import PersistentMap
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "bypasses", "evictions",
+                                     "entries", "weight", "max_entries", "max_weight"])
+DEFAULT_MAX_ENTRIES = 256
+# Upper bound on the total number of intersections held across cached results
+DEFAULT_MAX_WEIGHT = 1000000
+
+
+def dataset_version(intersection_data):
+    """
+    Return the cache version of a dataset.
+
+    Args:
+        intersection_data: Intersection data of any supported type
+
+    Returns:
+        tuple: (type, version token), or None if the data is not versioned
+    """
+    if isinstance(intersection_data, (IntersectionStore, PersistentMap)):
+        return type(intersection_data), intersection_data.version
+    return None
+
+
+class _StoreRows(tuple):
+    """Rows of a cached store result whose record views are rebuilt on every hit."""
+
+
+def _pack_result(result, intersection_data):
+    """Return what to cache for a result: its rows if it is made of store record views."""
+    if isinstance(intersection_data, IntersectionStore) and isinstance(result, dict) and result:
+        rows = intersection_data.record_rows(result)
+        if rows is not None:
+            return _StoreRows(rows)
+    return result
+
+
+def _result_weight(result):
+    """Number of intersections a result holds, counting at least one per entry."""
+    if isinstance(result, dict):
+        return max(sum(len(value) if isinstance(value, list) else 1 for value in result.values()), 1)
+    if isinstance(result, _StoreRows):
+        return max(len(result), 1)
+    return 1
+
+
+def _copy_result(result, intersection_data):
+    """Copy a cached result so callers cannot modify the cached one."""
+    if isinstance(result, _StoreRows):
+        # Same version, so the rows mean the same intersections in this store
+        return intersection_data.records(result)
+    if isinstance(result, dict):
+        return {key: list(value) if isinstance(value, list) else value for key, value in result.items()}
+    return result
+
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of function results over versioned datasets.
+
+    Args:
+        max_entries (int): Maximum number of cached results
+        max_weight (int): Maximum total weight, in intersections, of cached results
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_weight=DEFAULT_MAX_WEIGHT):
+        if max_entries is None or max_entries <= 0:
+            raise ValueError("Maximum entries must be positive")
+        if max_weight is None or max_weight <= 0:
+            raise ValueError("Maximum weight must be positive")
+        self.max_entries = max_entries
+        self.max_weight = max_weight
+        self._entries = OrderedDict()
+        self._weight = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+
+    def call(self, function, intersection_data, *args, **kwargs):
+        """
+        Return function(intersection_data, *args, **kwargs), from the cache when possible.
+
+        Args:
+            function (callable): Function to call on a miss
+            intersection_data: Dataset passed as the first argument
+
+        Returns:
+            The function's result; dictionaries are returned as fresh copies
+        """
+        version = dataset_version(intersection_data)
+        key = (function.__module__, function.__qualname__, args, tuple(sorted(kwargs.items())), version)
+        try:
+            hash(key)
+        except TypeError:
+            version = None
+        if version is None:
+            with self._lock:
+                self.bypasses += 1
+            return function(intersection_data, *args, **kwargs)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if entry is not None:
+            return _copy_result(entry[0], intersection_data)
+
+        result = function(intersection_data, *args, **kwargs)
+        packed = _pack_result(result, intersection_data)
+        weight = _result_weight(packed)
+        if weight <= self.max_weight:
+            with self._lock:
+                # Another thread may have stored the same result meanwhile
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self._weight -= previous[1]
+                self._entries[key] = (packed, weight)
+                self._weight += weight
+                self._evict()
+            if packed is result:
+                result = _copy_result(result, intersection_data)
+        return result
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries or self._weight > self.max_weight:
+            _, (_, weight) = self._entries.popitem(last=False)
+            self._weight -= weight
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every cached result and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._weight = 0
+            self.hits = self.misses = self.bypasses = self.evictions = 0
+
+    def info(self):
+        """
+        Report the cache counters and occupancy.
+
+        Returns:
+            CacheInfo: Hits, misses, bypasses, evictions, entries, weight and limits
+        """
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.bypasses, self.evictions,
+                             len(self._entries), self._weight, self.max_entries, self.max_weight)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+RESULT_CACHE = ResultCache()
+
+
+def cached_result(function):
+    """
+    Decorate a function of intersection data so its results go through RESULT_CACHE.
+
+    Args:
+        function (callable): Function taking intersection data as its first argument
+
+    Returns:
+        callable: Caching wrapper
+    """
+    @wraps(function)
+    def wrapper(intersection_data, *args, **kwargs):
+        return RESULT_CACHE.call(function, intersection_data, *args, **kwargs)
+    return wrapper
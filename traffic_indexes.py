@@ -0,0 +1,812 @@
+"""
+Traffic Indexes
+Secondary indexes over IntersectionStore rows, maintained incrementally by the store.
+
+Every index watches a single store field. The store calls add(row, value) when
+a row gains a value for that field and remove(row, value) before the value
+changes, where value is the raw column value (for example the one-byte code of
+a congestion level). An index is built from the values of all rows, in row
+order, with build(values).
+"""
+
+import heapq
+import math
+from array import array
+from bisect import bisect_left, insort
+from functools import lru_cache
+from sys import intern
+
+# Volume index keys pack (volume, row) into one signed 64-bit integer
+_ROW_BITS = 32
+_ROW_MASK = (1 << _ROW_BITS) - 1
+# Largest volume that fits in a packed volume index key
+MAX_INDEXED_VOLUME = (1 << (63 - _ROW_BITS)) - 1
+
+MINUTES_PER_DAY = 24 * 60
+# Leaf count of the peak hour segment tree, the next power of two above a day
+_SEGMENT_SIZE = 2048
+
+EARTH_RADIUS_M = 6371008.8
+_METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+# Spatial grid cell edge in degrees, roughly 550 m of latitude
+GRID_CELL_DEGREES = 0.005
+
+
+@lru_cache(maxsize=4096)
+def parse_time_of_day(time_of_day):
+    """
+    Parse an "HH:MM" string into minutes after midnight.
+
+    Args:
+        time_of_day (str): Time such as "08:15"; "24:00" is accepted as end of day
+
+    Returns:
+        int: Minute of the day between 0 and 1440
+    """
+    hours, separator, minutes = time_of_day.strip().partition(":")
+    if not separator or not hours.isdigit() or not minutes.isdigit() or len(minutes) != 2:
+        raise ValueError(f"Invalid time {time_of_day}. Must use HH:MM format")
+    minute = int(hours) * 60 + int(minutes)
+    if int(minutes) >= 60 or minute > MINUTES_PER_DAY:
+        raise ValueError(f"Invalid time {time_of_day}. Must use HH:MM format")
+    return minute
+
+
+@lru_cache(maxsize=4096)
+def parse_time_period(time_period):
+    """
+    Parse an "HH:MM-HH:MM" period into half-open minute-of-day intervals.
+
+    A period that wraps past midnight, such as "22:00-02:00", is split into two
+    intervals. Repeated strings are parsed once thanks to the cache.
+
+    Args:
+        time_period (str): Time period such as "07:00-09:00"
+
+    Returns:
+        tuple: (start, end) minute pairs with start < end
+    """
+    start_text, separator, end_text = time_period.partition("-")
+    if not separator:
+        raise ValueError(f"Invalid time period {time_period}. Must use HH:MM-HH:MM format")
+    start = parse_time_of_day(start_text)
+    end = parse_time_of_day(end_text)
+    if start < end:
+        return ((start, end),)
+    if start == end:
+        return ()
+    return tuple(interval for interval in ((start, MINUTES_PER_DAY), (0, end))
+                 if interval[0] < interval[1])
+
+
+class CongestionLevelIndex:
+    """
+    Hash index from congestion level code to the set of rows at that level.
+    """
+
+    field = "congestion_level"
+
+    def __init__(self):
+        self._rows_by_code = {}
+
+    def build(self, codes):
+        """Index every row from an iterable of codes in row order."""
+        for row, code in enumerate(codes):
+            self.add(row, code)
+
+    def add(self, row, code):
+        """Register a row under a congestion level code."""
+        self._rows_by_code.setdefault(code, set()).add(row)
+
+    def remove(self, row, code):
+        """Unregister a row from a congestion level code."""
+        rows = self._rows_by_code.get(code)
+        if rows is not None:
+            rows.discard(row)
+
+    def rows(self, code):
+        """
+        Return the rows at a congestion level code.
+
+        Args:
+            code (int): Congestion level code
+
+        Returns:
+            list: Rows in ascending order
+        """
+        return sorted(self._rows_by_code.get(code, ()))
+
+    def count(self, code):
+        """Return the number of rows at a congestion level code."""
+        return len(self._rows_by_code.get(code, ()))
+
+    def copy(self):
+        """Return an independent copy of the index."""
+        clone = CongestionLevelIndex()
+        clone._rows_by_code = {code: rows.copy() for code, rows in self._rows_by_code.items()}
+        return clone
+
+
+class VolumeIndex:
+    """
+    Sorted index over traffic volume.
+
+    Keys are (volume << 32) | row kept in one sorted array("q"), so a range
+    query is two bisections plus a slice, and inserts and removals are a
+    bisection plus a memmove of the tail of the array. Volumes above
+    MAX_INDEXED_VOLUME do not fit in a key and are rejected.
+    """
+
+    field = "traffic_volume"
+    # Every change moves the tail of one array, so a bulk rebuild pays off early
+    rebuild_factor = 256
+
+    def __init__(self):
+        self._keys = array("q")
+
+    def build(self, volumes):
+        """Index every row from an iterable of volumes in row order."""
+        volumes = list(volumes)
+        if volumes and max(volumes) > MAX_INDEXED_VOLUME:
+            raise ValueError(f"Traffic volume cannot exceed {MAX_INDEXED_VOLUME}")
+        self._keys = array("q", sorted((volume << _ROW_BITS) | row
+                                       for row, volume in enumerate(volumes)))
+
+    def add(self, row, volume):
+        """Insert a row with its volume."""
+        if volume > MAX_INDEXED_VOLUME:
+            raise ValueError(f"Traffic volume cannot exceed {MAX_INDEXED_VOLUME}")
+        insort(self._keys, (volume << _ROW_BITS) | row)
+
+    def _key_bounds(self, min_volume, max_volume):
+        """Return the key range of [min_volume, max_volume], with bounds of any numeric type."""
+        low = math.ceil(max(min_volume, 0))
+        high = math.floor(min(max_volume, MAX_INDEXED_VOLUME))
+        return low << _ROW_BITS, (high + 1) << _ROW_BITS
+
+    def remove(self, row, volume):
+        """Remove a row with its volume."""
+        key = (volume << _ROW_BITS) | row
+        position = bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+    def rows_in_range(self, min_volume, max_volume):
+        """
+        Return the rows whose volume lies in [min_volume, max_volume].
+
+        Args:
+            min_volume (int): Minimum traffic volume
+            max_volume (int): Maximum traffic volume
+
+        Returns:
+            list: Rows in ascending order
+        """
+        low, high = self._key_bounds(min_volume, max_volume)
+        if low >= high:
+            return []
+        start = bisect_left(self._keys, low)
+        stop = bisect_left(self._keys, high)
+        return sorted(key & _ROW_MASK for key in self._keys[start:stop])
+
+    def count_in_range(self, min_volume, max_volume):
+        """Return the number of rows whose volume lies in [min_volume, max_volume]."""
+        low, high = self._key_bounds(min_volume, max_volume)
+        if low >= high:
+            return 0
+        return bisect_left(self._keys, high) - bisect_left(self._keys, low)
+
+    def top_rows(self, n):
+        """Return up to n rows with the highest volumes, highest first and ties by ascending row."""
+        keys = self._keys
+        n = min(n, len(keys))
+        rows = []
+        stop = len(keys)
+        while len(rows) < n:
+            # Take the lowest rows of the next volume down
+            start = bisect_left(keys, (keys[stop - 1] >> _ROW_BITS) << _ROW_BITS, 0, stop)
+            rows.extend(key & _ROW_MASK for key in keys[start:min(stop, start + n - len(rows))])
+            stop = start
+        return rows
+
+    def volume_at_rank(self, rank):
+        """Return the volume at a zero-based rank in ascending volume order."""
+        return self._keys[rank] >> _ROW_BITS
+
+    def copy(self):
+        """Return an independent copy of the index."""
+        clone = VolumeIndex()
+        clone._keys = array("q", self._keys)
+        return clone
+
+
+def _count_add(counts, row):
+    counts[row] = counts.get(row, 0) + 1
+
+
+def _count_remove(counts, row):
+    remaining = counts.get(row, 0) - 1
+    if remaining > 0:
+        counts[row] = remaining
+    else:
+        counts.pop(row, None)
+
+
+class PeakHourIndex:
+    """
+    Interval index over parsed peak hour periods.
+
+    Rows are grouped by period string, and each distinct period becomes
+    minute-of-day intervals stored in a segment tree over the 1440 minutes of
+    a day, so "in peak at 08:15" walks one leaf-to-root path and unions the
+    rows of the periods found on it. Periods are also bucketed by interval
+    start, which answers overlap queries as the periods containing the query
+    start plus those starting inside the query. Peak periods repeat heavily
+    across intersections, so the tree stays small and building the index is
+    one dictionary update per row and period.
+    """
+
+    field = "peak_hours"
+
+    def __init__(self):
+        self._nodes = [None] * (2 * _SEGMENT_SIZE)
+        self._starts = [None] * MINUTES_PER_DAY
+        self._rows_by_period = {}
+
+    def build(self, peak_hours_column):
+        """Index every row from an iterable of peak hour tuples in row order."""
+        rows_by_period = self._rows_by_period
+        for row, peak_hours in enumerate(peak_hours_column):
+            for period in peak_hours:
+                counts = rows_by_period.get(period)
+                if counts is None:
+                    counts = rows_by_period[period] = {}
+                counts[row] = counts.get(row, 0) + 1
+        # The tree only holds distinct periods, linked once all rows are grouped
+        for period in rows_by_period:
+            self._link(period, set.add)
+
+    def _link(self, period, change):
+        """Add (set.add) or remove (set.discard) a period in every tree node and start bucket it covers."""
+        for start, end in parse_time_period(period):
+            change(self._bucket(self._starts, start), period)
+            low, high = start + _SEGMENT_SIZE, end + _SEGMENT_SIZE
+            while low < high:
+                if low & 1:
+                    change(self._bucket(self._nodes, low), period)
+                    low += 1
+                if high & 1:
+                    high -= 1
+                    change(self._bucket(self._nodes, high), period)
+                low >>= 1
+                high >>= 1
+
+    @staticmethod
+    def _bucket(buckets, position):
+        periods = buckets[position]
+        if periods is None:
+            periods = buckets[position] = set()
+        return periods
+
+    def add(self, row, peak_hours):
+        """Insert the periods of a row."""
+        for period in peak_hours:
+            counts = self._rows_by_period.get(period)
+            if counts is None:
+                # Parsed first so an invalid period leaves the index unchanged
+                parse_time_period(period)
+                counts = self._rows_by_period[period] = {}
+                self._link(period, set.add)
+            _count_add(counts, row)
+
+    def remove(self, row, peak_hours):
+        """Remove the periods of a row."""
+        for period in peak_hours:
+            counts = self._rows_by_period.get(period)
+            if counts is None:
+                continue
+            _count_remove(counts, row)
+            if not counts:
+                del self._rows_by_period[period]
+                self._link(period, set.discard)
+
+    def rows_with_period(self, time_period):
+        """Return the rows listing exactly this period string, in ascending order."""
+        return sorted(self._rows_by_period.get(time_period, ()))
+
+    def count_with_period(self, time_period):
+        """Return the number of rows listing exactly this period string."""
+        return len(self._rows_by_period.get(time_period, ()))
+
+    def _stab(self, minute, periods):
+        node = minute + _SEGMENT_SIZE
+        while node:
+            if self._nodes[node]:
+                periods.update(self._nodes[node])
+            node >>= 1
+
+    def _rows(self, periods):
+        rows = set()
+        for period in periods:
+            rows.update(self._rows_by_period[period])
+        return sorted(rows)
+
+    def rows_at(self, minute):
+        """
+        Return the rows with a peak period containing a minute of the day.
+
+        Args:
+            minute (int): Minute of the day between 0 and 1439
+
+        Returns:
+            list: Rows in ascending order
+        """
+        periods = set()
+        self._stab(minute, periods)
+        return self._rows(periods)
+
+    def rows_overlapping(self, intervals):
+        """
+        Return the rows with a peak period overlapping any of the intervals.
+
+        Args:
+            intervals (iterable): Half-open (start, end) minute pairs
+
+        Returns:
+            list: Rows in ascending order
+        """
+        periods = set()
+        for start, end in intervals:
+            self._stab(start, periods)
+            for minute in range(start + 1, end):
+                if self._starts[minute]:
+                    periods.update(self._starts[minute])
+        return self._rows(periods)
+
+    def copy(self):
+        """Return an independent copy of the index."""
+        clone = PeakHourIndex()
+        clone._nodes = [periods.copy() if periods else None for periods in self._nodes]
+        clone._starts = [periods.copy() if periods else None for periods in self._starts]
+        clone._rows_by_period = {period: counts.copy() for period, counts in self._rows_by_period.items()}
+        return clone
+
+
+def trigrams(text):
+    """Return the set of three-character substrings of a string."""
+    return {text[position:position + 3] for position in range(len(text) - 2)}
+
+
+class IncidentIndex:
+    """
+    Trigram inverted index for substring search over incident histories.
+
+    Incident strings repeat heavily across intersections, so trigrams point at
+    distinct incident strings and each string points at the rows recording it.
+    A query intersects the posting sets of its trigrams, smallest first,
+    verifies the surviving strings with a real substring test and returns the
+    union of their rows.
+    """
+
+    field = "incident_history"
+
+    def __init__(self):
+        self._rows_by_text = {}
+        self._texts_by_gram = {}
+
+    def build(self, incidents_column):
+        """Index every row from an iterable of incident tuples in row order."""
+        for row, incidents in enumerate(incidents_column):
+            self.add(row, incidents)
+
+    def normalize(self, text):
+        """Return the form of a stored string that is indexed."""
+        return text
+
+    def normalize_pattern(self, pattern):
+        """Return the form of a query pattern that is searched for."""
+        return pattern
+
+    def add(self, row, incidents):
+        """Insert the incidents of a row."""
+        for incident in incidents:
+            incident = self.normalize(incident)
+            counts = self._rows_by_text.get(incident)
+            if counts is None:
+                counts = self._rows_by_text[incident] = {}
+                for gram in trigrams(incident):
+                    self._texts_by_gram.setdefault(gram, set()).add(incident)
+            _count_add(counts, row)
+
+    def remove(self, row, incidents):
+        """Remove the incidents of a row."""
+        for incident in incidents:
+            incident = self.normalize(incident)
+            counts = self._rows_by_text.get(incident)
+            if counts is None:
+                continue
+            _count_remove(counts, row)
+            if not counts:
+                del self._rows_by_text[incident]
+                for gram in trigrams(incident):
+                    texts = self._texts_by_gram[gram]
+                    texts.discard(incident)
+                    if not texts:
+                        del self._texts_by_gram[gram]
+
+    def matching_texts(self, pattern):
+        """Return the distinct indexed strings containing pattern."""
+        pattern = self.normalize_pattern(pattern)
+        grams = trigrams(pattern)
+        if not grams:
+            # Patterns shorter than a trigram fall back to the vocabulary
+            return [text for text in self._rows_by_text if pattern in text]
+
+        postings = []
+        for gram in grams:
+            texts = self._texts_by_gram.get(gram)
+            if not texts:
+                return []
+            postings.append(texts)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for texts in postings[1:]:
+            candidates &= texts
+            if not candidates:
+                return []
+        return [text for text in candidates if pattern in text]
+
+    def rows_containing(self, pattern):
+        """
+        Return the rows with a string containing pattern.
+
+        Args:
+            pattern (str): Substring to search for
+
+        Returns:
+            list: Rows in ascending order
+        """
+        rows = set()
+        for text in self.matching_texts(pattern):
+            rows.update(self._rows_by_text[text])
+        return sorted(rows)
+
+    def count_containing(self, pattern):
+        """
+        Estimate the number of rows with a string containing pattern.
+
+        Rows recording several matching strings are counted once per string,
+        so this is an upper bound that never builds a row set.
+        """
+        return sum(len(self._rows_by_text[text]) for text in self.matching_texts(pattern))
+
+    def copy(self):
+        """Return an independent copy of the index."""
+        clone = self.__class__()
+        clone._rows_by_text = {text: counts.copy() for text, counts in self._rows_by_text.items()}
+        clone._texts_by_gram = {gram: texts.copy() for gram, texts in self._texts_by_gram.items()}
+        return clone
+
+
+class IncidentCountIndex:
+    """
+    Counting-sort bucket index over the number of incidents per row.
+
+    Bucket c holds the rows with exactly c incidents. Incident counts are
+    small, so a threshold query visits only the buckets above the threshold and
+    a top-k query walks buckets from the highest count down, stopping once k
+    rows are collected; neither looks at the rows they do not return.
+    """
+
+    field = "incident_history"
+
+    def __init__(self):
+        self._buckets = []
+
+    def build(self, incidents_column):
+        """Index every row from an iterable of incident tuples in row order."""
+        for row, incidents in enumerate(incidents_column):
+            self.add(row, incidents)
+
+    def add(self, row, incidents):
+        """Insert a row under its incident count."""
+        count = len(incidents)
+        while len(self._buckets) <= count:
+            self._buckets.append(set())
+        self._buckets[count].add(row)
+
+    def remove(self, row, incidents):
+        """Remove a row from its incident count."""
+        count = len(incidents)
+        if count < len(self._buckets):
+            self._buckets[count].discard(row)
+        # Trailing empty buckets are dropped so the top bucket is always occupied
+        while self._buckets and not self._buckets[-1]:
+            self._buckets.pop()
+
+    def rows_above(self, threshold):
+        """
+        Return the rows with more than threshold incidents.
+
+        Args:
+            threshold (int): Incident count to exceed
+
+        Returns:
+            list: Rows in ascending order
+        """
+        rows = []
+        for bucket in self._buckets[threshold + 1:]:
+            rows.extend(bucket)
+        rows.sort()
+        return rows
+
+    def count_above(self, threshold):
+        """Return the number of rows with more than threshold incidents."""
+        return sum(map(len, self._buckets[threshold + 1:]))
+
+    def top_rows(self, k):
+        """
+        Return up to k rows with the most incidents.
+
+        Args:
+            k (int): Number of rows to return
+
+        Returns:
+            list: Rows from the highest incident count down, ties in ascending row order
+        """
+        rows = []
+        for bucket in reversed(self._buckets):
+            needed = k - len(rows)
+            if needed <= 0:
+                break
+            if len(bucket) <= needed:
+                rows.extend(sorted(bucket))
+            else:
+                rows.extend(heapq.nsmallest(needed, bucket))
+        return rows
+
+    def copy(self):
+        """Return an independent copy of the index."""
+        clone = IncidentCountIndex()
+        clone._buckets = [bucket.copy() for bucket in self._buckets]
+        return clone
+
+
+class LandmarkIndex(IncidentIndex):
+    """
+    Case-insensitive trigram index over nearby landmark names.
+
+    Each distinct landmark is lowercased and interned once, the first time it
+    is seen, so lookups never lowercase row data. Only landmarks held by the
+    index are memoized; query patterns are lowercased on every search. Matching
+    uses str.lower to keep the exact semantics of the unindexed landmark search.
+    """
+
+    field = "nearby_landmarks"
+
+    def __init__(self):
+        super().__init__()
+        self._lowered = {}
+
+    def normalize(self, text):
+        """Return the lowercased, interned form of a landmark name."""
+        lowered = self._lowered.get(text)
+        if lowered is None:
+            lowered = self._lowered[text] = intern(text.lower())
+        return lowered
+
+    def normalize_pattern(self, pattern):
+        """Return the lowercased form of a query pattern without memoizing it."""
+        return pattern.lower()
+
+    def remove(self, row, incidents):
+        """Remove the landmarks of a row, forgetting landmarks no row holds any more."""
+        super().remove(row, incidents)
+        for text in incidents:
+            lowered = self._lowered.get(text)
+            if lowered is not None and lowered not in self._rows_by_text:
+                del self._lowered[text]
+
+    def copy(self):
+        """Return an independent copy of the index."""
+        clone = super().copy()
+        clone._lowered = self._lowered.copy()
+        return clone
+
+
+def haversine_distance(coordinates, other_coordinates):
+    """
+    Calculate the great-circle distance between two (latitude, longitude) points.
+
+    Args:
+        coordinates (tuple): First point in degrees
+        other_coordinates (tuple): Second point in degrees
+
+    Returns:
+        float: Distance in meters
+    """
+    latitude, longitude = map(math.radians, coordinates)
+    other_latitude, other_longitude = map(math.radians, other_coordinates)
+    half_chord = (math.sin((other_latitude - latitude) / 2) ** 2
+                  + math.cos(latitude) * math.cos(other_latitude)
+                  * math.sin((other_longitude - longitude) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(half_chord)))
+
+
+class SpatialIndex:
+    """
+    Uniform grid over intersection coordinates.
+
+    Each cell covers GRID_CELL_DEGREES of latitude and longitude and holds the
+    coordinates of its rows, so radius and bounding-box queries only visit the
+    cells overlapping the search area. Nearest-neighbour queries search rings
+    of cells outward until no unvisited cell can hold a closer point.
+    """
+
+    field = "coordinates"
+
+    def __init__(self, cell_degrees=GRID_CELL_DEGREES):
+        self._cell_degrees = cell_degrees
+        self._cells = {}
+        self._bounds = None
+
+    def _cell(self, latitude, longitude):
+        return (math.floor(latitude / self._cell_degrees), math.floor(longitude / self._cell_degrees))
+
+    def build(self, coordinates_column):
+        """Index every row from an iterable of (latitude, longitude) pairs in row order."""
+        for row, coordinates in enumerate(coordinates_column):
+            self.add(row, coordinates)
+
+    def add(self, row, coordinates):
+        """Insert a row at its coordinates."""
+        cell = self._cell(*coordinates)
+        self._cells.setdefault(cell, {})[row] = coordinates
+        if self._bounds is None:
+            self._bounds = [cell[0], cell[1], cell[0], cell[1]]
+        else:
+            # Bounds only grow; they are a conservative limit for ring searches
+            bounds = self._bounds
+            bounds[0], bounds[1] = min(bounds[0], cell[0]), min(bounds[1], cell[1])
+            bounds[2], bounds[3] = max(bounds[2], cell[0]), max(bounds[3], cell[1])
+
+    def remove(self, row, coordinates):
+        """Remove a row from its coordinates."""
+        cell = self._cell(*coordinates)
+        points = self._cells.get(cell)
+        if points is not None:
+            points.pop(row, None)
+            if not points:
+                del self._cells[cell]
+
+    def _points_in_cells(self, low_cell, high_cell):
+        """Yield (row, coordinates) for every point in a rectangle of cells."""
+        cells = self._cells
+        if (high_cell[0] - low_cell[0] + 1) * (high_cell[1] - low_cell[1] + 1) > len(cells):
+            # Sparse data: walking the occupied cells is cheaper than the rectangle
+            for (x, y), points in cells.items():
+                if low_cell[0] <= x <= high_cell[0] and low_cell[1] <= y <= high_cell[1]:
+                    yield from points.items()
+            return
+        for x in range(low_cell[0], high_cell[0] + 1):
+            for y in range(low_cell[1], high_cell[1] + 1):
+                points = cells.get((x, y))
+                if points:
+                    yield from points.items()
+
+    def rows_in_bbox(self, min_latitude, min_longitude, max_latitude, max_longitude):
+        """
+        Return the rows inside a latitude/longitude bounding box, edges included.
+
+        Returns:
+            list: Rows in ascending order
+        """
+        low_cell = self._cell(min_latitude, min_longitude)
+        high_cell = self._cell(max_latitude, max_longitude)
+        return sorted(row for row, (latitude, longitude) in self._points_in_cells(low_cell, high_cell)
+                      if min_latitude <= latitude <= max_latitude
+                      and min_longitude <= longitude <= max_longitude)
+
+    def rows_within_radius(self, center, radius_m):
+        """
+        Return the rows within a great-circle distance of a point.
+
+        Args:
+            center (tuple): (latitude, longitude) of the search center
+            radius_m (float): Search radius in meters
+
+        Returns:
+            list: Rows in ascending order
+        """
+        latitude, longitude = center
+        latitude_span = math.degrees(radius_m / EARTH_RADIUS_M)
+        cos_latitude = math.cos(math.radians(min(89.9, abs(latitude) + latitude_span)))
+        longitude_span = min(180.0, latitude_span / max(cos_latitude, 1e-9))
+        low_cell = self._cell(latitude - latitude_span, longitude - longitude_span)
+        high_cell = self._cell(latitude + latitude_span, longitude + longitude_span)
+        return sorted(row for row, coordinates in self._points_in_cells(low_cell, high_cell)
+                      if haversine_distance(center, coordinates) <= radius_m)
+
+    def nearest_rows(self, center, k):
+        """
+        Return the k rows closest to a point.
+
+        Args:
+            center (tuple): (latitude, longitude) of the search center
+            k (int): Number of rows to return
+
+        Returns:
+            list: (distance_m, row) pairs, closest first with ties broken by row
+        """
+        if k <= 0 or not self._cells:
+            return []
+        center_x, center_y = self._cell(*center)
+        min_x, min_y, max_x, max_y = self._bounds
+        max_ring = max(center_x - min_x, max_x - center_x, center_y - min_y, max_y - center_y, 0)
+
+        best = []  # max-heap of (-distance, -row) holding the k closest so far
+        for ring in range(max_ring + 1):
+            if (2 * ring + 1) ** 2 > 4 * len(self._cells):
+                # Far from the data the rings are mostly empty cells
+                return self._nearest_rows_best_first(center, k)
+            if len(best) == k:
+                # Every point in this ring is at least ring - 1 whole cells away
+                reach = (ring - 1) * self._cell_degrees
+                latitude_limit = math.radians(min(89.9, abs(center[0]) + (ring + 1) * self._cell_degrees))
+                lower_bound = reach * _METERS_PER_DEGREE * math.cos(latitude_limit)
+                if lower_bound > -best[0][0]:
+                    break
+            for x in range(center_x - ring, center_x + ring + 1):
+                on_edge = x in (center_x - ring, center_x + ring)
+                for y in range(center_y - ring, center_y + ring + 1, 1 if on_edge else 2 * ring):
+                    points = self._cells.get((x, y))
+                    if not points:
+                        continue
+                    for row, coordinates in points.items():
+                        candidate = (-haversine_distance(center, coordinates), -row)
+                        if len(best) < k:
+                            heapq.heappush(best, candidate)
+                        elif candidate > best[0]:
+                            heapq.heapreplace(best, candidate)
+        return sorted((-distance, -row) for distance, row in best)
+
+    def _cell_lower_bound(self, center, cell):
+        """Return a lower bound on the distance from a point to anything in a cell."""
+        size = self._cell_degrees
+        cell_center = ((cell[0] + 0.5) * size, (cell[1] + 0.5) * size)
+        # Triangle inequality: no point of the cell is farther than half its diagonal from its center
+        half_diagonal = size * _METERS_PER_DEGREE * math.sqrt(2) / 2
+        return haversine_distance(center, cell_center) - half_diagonal
+
+    def _nearest_rows_best_first(self, center, k):
+        """Visit occupied cells in order of their distance lower bound."""
+        ordered_cells = sorted((self._cell_lower_bound(center, cell), cell) for cell in self._cells)
+        best = []
+        for lower_bound, cell in ordered_cells:
+            if len(best) == k and lower_bound > -best[0][0]:
+                break
+            for row, coordinates in self._cells[cell].items():
+                candidate = (-haversine_distance(center, coordinates), -row)
+                if len(best) < k:
+                    heapq.heappush(best, candidate)
+                elif candidate > best[0]:
+                    heapq.heapreplace(best, candidate)
+        return sorted((-distance, -row) for distance, row in best)
+
+    def copy(self):
+        """Return an independent copy of the index."""
+        clone = SpatialIndex(self._cell_degrees)
+        clone._cells = {cell: points.copy() for cell, points in self._cells.items()}
+        clone._bounds = None if self._bounds is None else self._bounds.copy()
+        return clone
+
+
+INDEX_TYPES = {
+    "congestion_level": CongestionLevelIndex,
+    "traffic_volume": VolumeIndex,
+    "peak_hours": PeakHourIndex,
+    "incident_history": IncidentIndex,
+    "incident_count": IncidentCountIndex,
+    "nearby_landmarks": LandmarkIndex,
+    "coordinates": SpatialIndex
+}
@@ -0,0 +1,352 @@
+"""
+Traffic Ingest
+Streaming loaders that build intersection data from CSV and JSONL files.
+
+Files are read line by line and handed on in chunks, so the raw file is never
+held in memory. Every record is checked against the rules of
+validate_intersection and malformed rows are reported instead of aborting
+the load.
+"""
+
+import csv
+import json
+import os
+from collections.abc import Mapping
+from sys import intern
+
+from intersection_store import (
+    CONGESTION_LEVELS, INTERSECTION_FIELDS, LEVEL_CODES, MAX_TRAFFIC_VOLUME, IntersectionStore,
+    validate_intersection
+)
+from traffic_indexes import parse_time_period
+
+CSV_COLUMNS = (
+    "intersection_id", "name", "latitude", "longitude", "traffic_volume",
+    "congestion_level", "peak_hours", "nearby_landmarks", "incident_history"
+)
+# Separator for the list-valued CSV columns
+CSV_LIST_SEPARATOR = "|"
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def _split_list(value):
+    return value.split(CSV_LIST_SEPARATOR) if value else []
+
+
+def _parse_csv_row(row):
+    """Convert a CSV row dictionary into (intersection_id, intersection)."""
+    intersection = {
+        "name": row["name"],
+        "coordinates": (float(row["latitude"]), float(row["longitude"])),
+        "traffic_volume": int(row["traffic_volume"]),
+        "congestion_level": row["congestion_level"],
+        "peak_hours": _split_list(row["peak_hours"]),
+        "nearby_landmarks": _split_list(row["nearby_landmarks"]),
+        "incident_history": _split_list(row["incident_history"])
+    }
+    return row["intersection_id"], intersection
+
+
+def _parse_jsonl_line(line):
+    """Convert a JSON object line into (intersection_id, intersection)."""
+    intersection = json.loads(line)
+    if not isinstance(intersection, dict):
+        raise ValueError("Line must contain a JSON object")
+    intersection_id = intersection.pop("intersection_id")
+    if isinstance(intersection.get("coordinates"), list):
+        intersection["coordinates"] = tuple(intersection["coordinates"])
+    return intersection_id, intersection
+
+
+def _iter_csv(file):
+    reader = csv.DictReader(file)
+    missing = [column for column in CSV_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"CSV file is missing columns {missing}")
+    for row in reader:
+        # Header is line 1, so data rows start at line 2
+        yield reader.line_num, row, _parse_csv_row
+
+
+def _iter_jsonl(file):
+    for line_number, line in enumerate(file, start=1):
+        if line.strip():
+            yield line_number, line, _parse_jsonl_line
+
+
+def detect_format(path):
+    """
+    Infer the file format from a path's extension.
+
+    Args:
+        path (str): Path to an intersection file
+
+    Returns:
+        str: "csv" or "jsonl"
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Unsupported file type {extension}. Must be .csv or .jsonl")
+
+
+def iter_intersection_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, errors=None, file_format=None):
+    """
+    Stream validated intersections from a CSV or JSONL file in chunks.
+
+    Args:
+        path (str): Path to the intersection file
+        chunk_size (int): Number of valid intersections per chunk
+        errors (list): If given, receives (line_number, message) for each rejected row
+        file_format (str): "csv" or "jsonl"; inferred from the extension if None
+
+    Yields:
+        list: Up to chunk_size (intersection_id, intersection) pairs
+    """
+    if path is None:
+        raise ValueError("Path cannot be None")
+    if chunk_size is None or chunk_size <= 0:
+        raise ValueError("Chunk size must be positive")
+    file_format = file_format or detect_format(path)
+    if file_format not in ("csv", "jsonl"):
+        raise ValueError("File format must be csv or jsonl")
+
+    with open(path, newline="" if file_format == "csv" else None, encoding="utf-8") as file:
+        rows = _iter_csv(file) if file_format == "csv" else _iter_jsonl(file)
+        chunk = []
+        for line_number, raw, parse in rows:
+            try:
+                intersection_id, intersection = parse(raw)
+                if not isinstance(intersection_id, str) or intersection_id == "":
+                    raise ValueError("Intersection ID cannot be None or empty")
+                error = validate_intersection(intersection)
+            except (ValueError, KeyError, TypeError) as e:
+                error = f"Malformed row: {e}"
+            if error is not None:
+                if errors is not None:
+                    errors.append((line_number, error))
+                continue
+            chunk.append((intersection_id, intersection))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+class _ColumnChunk:
+    """Column lists for a batch of new intersections, plus rows that replace existing IDs."""
+
+    def __init__(self):
+        self.ids = []
+        self.names = []
+        self.latitudes = []
+        self.longitudes = []
+        self.volumes = []
+        self.level_codes = []
+        self.peak_hours = []
+        self.landmarks = []
+        self.incidents = []
+        self.newly_added = bytearray()
+        self.extras = {}
+        self.id_set = set()
+        self.replacements = []
+
+    def __len__(self):
+        return len(self.ids) + len(self.replacements)
+
+    def append(self, intersection_data, iid, name, latitude, longitude, volume, level_code,
+               peak_hours, landmarks, incidents, newly_added=0, extra=None):
+        if iid in intersection_data or iid in self.id_set:
+            # Later rows win; replacements are applied after the chunk is appended
+            self.replacements.append((iid, {
+                "name": name, "coordinates": (latitude, longitude), "traffic_volume": volume,
+                "congestion_level": CONGESTION_LEVELS[level_code], "peak_hours": peak_hours,
+                "nearby_landmarks": landmarks, "incident_history": incidents,
+                "newly_added": bool(newly_added), **(extra or {})
+            }))
+            return
+        if extra:
+            self.extras[len(self.ids)] = extra
+        self.id_set.add(iid)
+        self.ids.append(iid)
+        self.names.append(name)
+        self.latitudes.append(latitude)
+        self.longitudes.append(longitude)
+        self.volumes.append(volume)
+        self.level_codes.append(level_code)
+        self.peak_hours.append(peak_hours)
+        self.landmarks.append(landmarks)
+        self.incidents.append(incidents)
+        self.newly_added.append(newly_added)
+
+    def flush_into(self, intersection_data):
+        intersection_data.extend_columns(
+            self.ids, self.names, self.latitudes, self.longitudes, self.volumes,
+            self.level_codes, self.peak_hours, self.landmarks, self.incidents,
+            self.newly_added, self.extras
+        )
+        for iid, intersection in self.replacements:
+            intersection_data.upsert(iid, intersection)
+
+
+def _load_csv_columns(file, intersection_data, chunk_size, errors):
+    """
+    Fast CSV path that validates fields as they are converted into columns.
+
+    List columns repeat heavily, so each distinct raw value is split, checked
+    and interned once.
+    """
+    reader = csv.reader(file)
+    header = next(reader, None) or []
+    missing = [column for column in CSV_COLUMNS if column not in header]
+    if missing:
+        raise ValueError(f"CSV file is missing columns {missing}")
+    positions = [header.index(column) for column in CSV_COLUMNS]
+    in_order = positions == list(range(len(CSV_COLUMNS)))
+    width = len(header)
+
+    peak_cache = {}
+    name_list_cache = {}
+    chunk = _ColumnChunk()
+    for row in reader:
+        try:
+            if len(row) != width:
+                raise ValueError(f"expected {width} columns, found {len(row)}")
+            if not in_order:
+                row = [row[position] for position in positions]
+            iid, name, latitude, longitude, volume, level, peak_hours, landmarks, incidents = row[:9]
+            if iid == "":
+                raise ValueError("Intersection ID cannot be None or empty")
+            latitude = float(latitude)
+            longitude = float(longitude)
+            volume = int(volume)
+        except ValueError as e:
+            errors.append((reader.line_num, f"Malformed row: {e}"))
+            continue
+
+        # Same checks, in the same order, as validate_intersection
+        level_code = LEVEL_CODES.get(level)
+        if name == "":
+            error = "Name cannot be None or empty"
+        elif not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+            error = "Coordinates must be a valid latitude and longitude"
+        elif volume < 0:
+            error = "Traffic volume must be a non-negative integer"
+        elif volume > MAX_TRAFFIC_VOLUME:
+            error = f"Traffic volume cannot exceed {MAX_TRAFFIC_VOLUME}"
+        elif level_code is None:
+            error = f"Invalid congestion level. Must be one of {list(CONGESTION_LEVELS)}"
+        else:
+            error = None
+        parsed_peaks = peak_cache.get(peak_hours)
+        if error is None and parsed_peaks is None:
+            try:
+                parsed_peaks = tuple(_split_list(peak_hours))
+                for period in parsed_peaks:
+                    parse_time_period(period)
+                peak_cache[peak_hours] = parsed_peaks
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            errors.append((reader.line_num, error))
+            continue
+
+        parsed_landmarks = name_list_cache.get(landmarks)
+        if parsed_landmarks is None:
+            parsed_landmarks = name_list_cache[landmarks] = tuple(map(intern, _split_list(landmarks)))
+        parsed_incidents = name_list_cache.get(incidents)
+        if parsed_incidents is None:
+            parsed_incidents = name_list_cache[incidents] = tuple(map(intern, _split_list(incidents)))
+
+        chunk.append(intersection_data, iid, name, latitude, longitude, volume, level_code,
+                     parsed_peaks, parsed_landmarks, parsed_incidents)
+        if len(chunk) >= chunk_size:
+            chunk.flush_into(intersection_data)
+            chunk = _ColumnChunk()
+    chunk.flush_into(intersection_data)
+
+
+def load_intersections(path, chunk_size=DEFAULT_CHUNK_SIZE, indexes=(), file_format=None):
+    """
+    Load a CSV or JSONL intersection file into an IntersectionStore.
+
+    Rows are appended to the store's columns one chunk at a time. Later rows
+    replace earlier rows with the same intersection ID. Indexes are built
+    once after the load rather than maintained row by row.
+
+    Args:
+        path (str): Path to the intersection file
+        chunk_size (int): Number of intersections read per chunk
+        indexes (iterable): Fields to create secondary indexes on
+        file_format (str): "csv" or "jsonl"; inferred from the extension if None
+
+    Returns:
+        tuple: A tuple containing (intersection_data, errors) where errors is a
+            list of (line_number, message) pairs for the rejected rows
+    """
+    if path is None:
+        raise ValueError("Path cannot be None")
+    if chunk_size is None or chunk_size <= 0:
+        raise ValueError("Chunk size must be positive")
+    file_format = file_format or detect_format(path)
+
+    errors = []
+    intersection_data = IntersectionStore()
+    if file_format == "csv":
+        with open(path, newline="", encoding="utf-8") as file:
+            _load_csv_columns(file, intersection_data, chunk_size, errors)
+    else:
+        for records in iter_intersection_chunks(path, chunk_size, errors, file_format):
+            chunk = _ColumnChunk()
+            for iid, intersection in records:
+                latitude, longitude = intersection["coordinates"]
+                # Fields write_intersections emits beyond the core ones are kept
+                extra = {key: value for key, value in intersection.items()
+                         if key not in INTERSECTION_FIELDS and key != "newly_added"}
+                chunk.append(intersection_data, iid, intersection["name"], latitude, longitude,
+                             intersection["traffic_volume"], LEVEL_CODES[intersection["congestion_level"]],
+                             tuple(intersection["peak_hours"]),
+                             tuple(map(intern, intersection["nearby_landmarks"])),
+                             tuple(intersection["incident_history"]),
+                             1 if intersection.get("newly_added", False) else 0, extra)
+            chunk.flush_into(intersection_data)
+
+    for field in indexes:
+        intersection_data.create_index(field)
+    return intersection_data, errors
+
+
+def write_intersections(intersection_data, path, file_format=None):
+    """
+    Write intersection data to a CSV or JSONL file that load_intersections can read.
+
+    Args:
+        intersection_data (dict): The intersection data dictionary, or an iterable
+            of (intersection_id, intersection) pairs that is written as it streams
+        path (str): Destination path
+        file_format (str): "csv" or "jsonl"; inferred from the extension if None
+    """
+    if intersection_data is None:
+        raise ValueError("Intersection data cannot be None")
+    file_format = file_format or detect_format(path)
+    pairs = intersection_data.items() if isinstance(intersection_data, Mapping) else intersection_data
+
+    with open(path, "w", newline="" if file_format == "csv" else None, encoding="utf-8") as file:
+        if file_format == "csv":
+            writer = csv.writer(file)
+            writer.writerow(CSV_COLUMNS)
+            for iid, intersection in pairs:
+                latitude, longitude = intersection["coordinates"]
+                writer.writerow((
+                    iid, intersection["name"], latitude, longitude, intersection["traffic_volume"],
+                    intersection["congestion_level"],
+                    CSV_LIST_SEPARATOR.join(intersection["peak_hours"]),
+                    CSV_LIST_SEPARATOR.join(intersection["nearby_landmarks"]),
+                    CSV_LIST_SEPARATOR.join(intersection["incident_history"])
+                ))
+        else:
+            for iid, intersection in pairs:
+                file.write(json.dumps({"intersection_id": iid, **intersection}) + "\n")
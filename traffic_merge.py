@@ -0,0 +1,174 @@
+"""
+Traffic Merge
+Bulk merging of intersection feeds with conflict policies.
+
+bulk_merge resolves every incoming intersection against the existing data
+once and writes only the winners, so its cost follows the size of the feed.
+Stores and dictionaries can be updated in place, which avoids copying the
+base dataset, and persistent maps derive a new version that shares every
+untouched node. merge_sorted_shards merges several shard files, each sorted
+by intersection ID, in one streaming pass that holds a single record per
+shard in memory.
+"""
+
+import heapq
+from collections.abc import Mapping
+
+from intersection_store import IntersectionStore
+from persistent_map import PersistentMap
+from traffic_ingest import DEFAULT_CHUNK_SIZE, iter_intersection_chunks
+
+MERGE_POLICIES = ("keep", "overwrite", "newest", "merge_incidents")
+# Record field compared by the "newest" policy
+DEFAULT_TIMESTAMP_FIELD = "updated_at"
+
+
+def _validate_policy(policy):
+    if policy not in MERGE_POLICIES:
+        raise ValueError(f"Invalid merge policy. Must be one of {list(MERGE_POLICIES)}")
+
+
+def resolve_conflict(existing, incoming, policy, timestamp_field=DEFAULT_TIMESTAMP_FIELD):
+    """
+    Decide what to store when an intersection ID is present on both sides.
+
+    Policies:
+        keep: the existing record stays
+        overwrite: the incoming record replaces it
+        newest: the record with the later timestamp_field value wins; a missing
+            timestamp counts as older than any timestamp and ties go to the
+            incoming record
+        merge_incidents: the incoming record replaces it, keeping the existing
+            incident history followed by the incoming incidents not yet recorded
+
+    Args:
+        existing (dict): Record already stored
+        incoming (dict): Record from the feed
+        policy (str): One of MERGE_POLICIES
+        timestamp_field (str): Field compared by the "newest" policy
+
+    Returns:
+        dict: The record to store, or None to keep the existing record
+    """
+    if policy == "overwrite":
+        return incoming
+    if policy == "keep":
+        return None
+    if policy == "newest":
+        existing_time = existing.get(timestamp_field)
+        incoming_time = incoming.get(timestamp_field)
+        if existing_time is not None and (incoming_time is None or existing_time > incoming_time):
+            return None
+        return incoming
+    if policy == "merge_incidents":
+        history = list(existing["incident_history"])
+        recorded = set(history)
+        history.extend(incident for incident in incoming["incident_history"] if incident not in recorded)
+        return {**incoming, "incident_history": history}
+    raise ValueError(f"Invalid merge policy. Must be one of {list(MERGE_POLICIES)}")
+
+
+def bulk_merge(existing_intersections, new_intersections, policy="overwrite", in_place=False,
+               mark_new=True, timestamp_field=DEFAULT_TIMESTAMP_FIELD):
+    """
+    Merge a feed of intersections into existing data under a conflict policy.
+
+    Args:
+        existing_intersections (dict): Intersection data dictionary, store or persistent map
+        new_intersections (dict): Incoming intersections, as a mapping or an
+            iterable of (intersection_id, intersection) pairs such as the
+            output of merge_sorted_shards
+        policy (str): Conflict policy, one of MERGE_POLICIES
+        in_place (bool): Update a dictionary or store directly instead of a copy;
+            persistent maps are immutable and always return a new version
+        mark_new (bool): Flag every written record with "newly_added": True
+        timestamp_field (str): Field compared by the "newest" policy
+
+    Returns:
+        dict: Merged intersection data of the same type as existing_intersections
+    """
+    if existing_intersections is None or new_intersections is None:
+        raise ValueError("Intersection data dictionaries cannot be None")
+    _validate_policy(policy)
+
+    pairs = new_intersections.items() if isinstance(new_intersections, Mapping) else new_intersections
+    changes = {}
+    for iid, intersection in pairs:
+        # A repeated ID in the feed is resolved against its pending record
+        current = changes.get(iid)
+        if current is None and iid in existing_intersections:
+            current = existing_intersections[iid]
+        if current is not None:
+            intersection = resolve_conflict(current, intersection, policy, timestamp_field)
+            if intersection is None:
+                continue
+        changes[iid] = intersection
+    if mark_new:
+        changes = {iid: {**intersection, "newly_added": True} for iid, intersection in changes.items()}
+
+    if isinstance(existing_intersections, PersistentMap):
+        return existing_intersections.update(changes)
+    merged_intersection_data = existing_intersections if in_place else existing_intersections.copy()
+    if isinstance(merged_intersection_data, IntersectionStore):
+        with merged_intersection_data.bulk_update(len(changes)):
+            for iid, intersection in changes.items():
+                merged_intersection_data.upsert(iid, intersection)
+    else:
+        merged_intersection_data.update(changes)
+    return merged_intersection_data
+
+
+def _iter_shard(path, shard, chunk_size, errors, file_format):
+    """Yield (intersection_id, shard, intersection) from one shard, checking the sort order."""
+    shard_errors = [] if errors is not None else None
+    previous_id = None
+    for chunk in iter_intersection_chunks(path, chunk_size, shard_errors, file_format):
+        if shard_errors:
+            errors.extend((path, line_number, message) for line_number, message in shard_errors)
+            shard_errors.clear()
+        for iid, intersection in chunk:
+            if previous_id is not None and iid < previous_id:
+                raise ValueError(f"Shard {path} is not sorted by intersection ID at {iid}")
+            previous_id = iid
+            yield iid, shard, intersection
+    if shard_errors:
+        errors.extend((path, line_number, message) for line_number, message in shard_errors)
+
+
+def merge_sorted_shards(paths, policy="overwrite", timestamp_field=DEFAULT_TIMESTAMP_FIELD,
+                        chunk_size=DEFAULT_CHUNK_SIZE, errors=None, file_format=None):
+    """
+    Stream a k-way merge of shard files that are each sorted by intersection ID.
+
+    Records with the same ID are resolved with the conflict policy in shard
+    order, so a later shard in paths acts as the incoming side. Each shard is
+    read in chunks, never loaded whole.
+
+    Args:
+        paths (list): Shard file paths, oldest first
+        policy (str): Conflict policy, one of MERGE_POLICIES
+        timestamp_field (str): Field compared by the "newest" policy
+        chunk_size (int): Number of intersections read per chunk from each shard
+        errors (list): If given, receives (path, line_number, message) for each rejected row
+        file_format (str): "csv" or "jsonl"; inferred from each extension if None
+
+    Yields:
+        tuple: (intersection_id, intersection) pairs in ascending ID order
+    """
+    if paths is None:
+        raise ValueError("Shard paths cannot be None")
+    _validate_policy(policy)
+
+    shards = [_iter_shard(path, shard, chunk_size, errors, file_format) for shard, path in enumerate(paths)]
+    current_id = current = None
+    for iid, _, intersection in heapq.merge(*shards, key=lambda item: (item[0], item[1])):
+        if iid == current_id:
+            intersection = resolve_conflict(current, intersection, policy, timestamp_field)
+            if intersection is not None:
+                current = intersection
+            continue
+        if current_id is not None:
+            yield current_id, current
+        current_id, current = iid, intersection
+    if current_id is not None:
+        yield current_id, current
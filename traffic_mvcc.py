@@ -0,0 +1,171 @@
+"""
+Traffic MVCC
+Multi-version intersection data for concurrent readers and writers.
+
+VersionedData holds the current Snapshot, an immutable (version, data) pair.
+A reader pins a snapshot by taking the current reference, a single attribute
+read, and can query it for as long as it likes: readers never take a lock and
+never see a half-applied update. Writers are serialized by a lock, build the
+next version with the copy-on-write update functions and publish it by
+replacing the reference, which is atomic. An old version stays alive exactly
+as long as something references its data, a reader's snapshot or anything
+derived from it, and is reclaimed by reference counting when the last
+reference goes.
+
+Published data must not be modified in place afterwards, so writers must not
+use in-place operations such as bulk_merge(..., in_place=True). Persistent
+maps make each new version cheapest, since they share every untouched node
+with the previous one.
+"""
+
+import threading
+import weakref
+
+from urban_traffic_analysis_platform import apply_updates
+
+
+class Snapshot:
+    """
+    One published version of the intersection data.
+
+    Attributes:
+        version (int): Version number, increasing by one per publish
+        data: The intersection data of this version; treat it as read-only
+    """
+
+    __slots__ = ("version", "data", "__weakref__")
+
+    def __init__(self, version, data):
+        self.version = version
+        self.data = data
+
+    def __repr__(self):
+        return f"Snapshot(version={self.version})"
+
+
+class VersionedData:
+    """
+    Intersection data published as immutable snapshots.
+
+    Args:
+        intersection_data (dict): Initial data, published as version 1
+    """
+
+    def __init__(self, intersection_data):
+        if intersection_data is None:
+            raise ValueError("Intersection data cannot be None")
+        self._write_lock = threading.Lock()
+        self._live = set()
+        self._published = 0
+        self._current = self._new_snapshot(intersection_data)
+
+    def _new_snapshot(self, intersection_data):
+        """Create the next snapshot; called with the write lock held or from __init__."""
+        if intersection_data is None:
+            raise ValueError("Intersection data cannot be None")
+        version = self._published + 1
+        snapshot = Snapshot(version, intersection_data)
+        self._live.add(version)
+        try:
+            # Track the data itself, which may outlive the snapshot through other references
+            weakref.finalize(intersection_data, self._live.discard, version)
+        except TypeError:
+            # Plain dictionaries cannot be weakly referenced, so their snapshot stands in
+            weakref.finalize(snapshot, self._live.discard, version)
+        self._published = version
+        return snapshot
+
+    # Readers
+
+    def snapshot(self):
+        """
+        Pin the current version.
+
+        Returns:
+            Snapshot: The latest published snapshot; it stays valid and unchanged
+                while it is referenced
+        """
+        return self._current
+
+    @property
+    def version(self):
+        """Version number of the latest published snapshot."""
+        return self._current.version
+
+    def read(self, function, *args, **kwargs):
+        """
+        Call function(data, *args, **kwargs) on a pinned snapshot.
+
+        Args:
+            function (callable): A filter or statistics function
+
+        Returns:
+            The function's result, computed entirely from one version
+        """
+        return function(self._current.data, *args, **kwargs)
+
+    # Writers
+
+    def publish(self, intersection_data):
+        """
+        Replace the data with a new version.
+
+        Args:
+            intersection_data (dict): New data; it must not be modified afterwards
+
+        Returns:
+            Snapshot: The published snapshot
+        """
+        with self._write_lock:
+            self._current = self._new_snapshot(intersection_data)
+            return self._current
+
+    def update(self, function, *args, **kwargs):
+        """
+        Build and publish the next version as function(data, *args, **kwargs).
+
+        Args:
+            function (callable): An update function returning new data, such as
+                update_traffic_volume or merge_intersection_data
+
+        Returns:
+            Snapshot: The published snapshot
+        """
+        with self._write_lock:
+            self._current = self._new_snapshot(function(self._current.data, *args, **kwargs))
+            return self._current
+
+    def apply_updates(self, updates):
+        """
+        Apply a batch of updates with apply_updates and publish the result.
+
+        Args:
+            updates (list): Update dictionaries, applied in order
+
+        Returns:
+            list: (position, message) pairs for the rejected updates
+        """
+        with self._write_lock:
+            intersection_data, errors = apply_updates(self._current.data, updates)
+            if intersection_data is not self._current.data:
+                self._current = self._new_snapshot(intersection_data)
+            return errors
+
+    # Reclamation
+
+    def live_versions(self):
+        """
+        Return the versions that have not been reclaimed yet.
+
+        A version is live while its data is reachable. Versions holding plain
+        dictionaries, which cannot be weakly referenced, are tracked through
+        their snapshot instead.
+
+        Returns:
+            list: Version numbers in ascending order, including the current one
+        """
+        return sorted(self._live.copy())
+
+    def reclaimed_count(self):
+        """Return the number of published versions that have been reclaimed."""
+        return self._published - len(self._live)
@@ -0,0 +1,167 @@
+"""
+Traffic Parallel
+Process-pool map-reduce for the citywide aggregates.
+
+The intersections are partitioned into contiguous row ranges. Each range is
+shipped to a worker as a few packed byte strings (volumes, congestion level
+codes and incident counts, each with its array typecode), never as intersection dictionaries, which keeps
+pickling cheap. Every worker returns a partial result for the requested
+aggregates, and the partials are combined in partition order, so the
+results are identical to the serial calculate_congestion_distribution,
+calculate_total_traffic_volume, create_volume_brackets and
+find_high_incident_areas. Those functions call map_reduce_aggregates when
+given workers=.
+"""
+
+import os
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import compress
+
+from intersection_store import CONGESTION_LEVELS, VOLUME_BRACKETS, VOLUME_BRACKET_LIMITS, IntersectionStore
+
+# Partitions per worker; more than one evens out uneven chunks
+PARTITIONS_PER_WORKER = 4
+AGGREGATES = ("congestion_distribution", "total_traffic_volume", "volume_brackets", "high_incident_areas")
+# Translation tables that turn bracket codes into 0/1 masks for itertools.compress
+_BRACKET_MASKS = [bytes(1 if code == bracket else 0 for code in range(256)) for bracket in range(len(VOLUME_BRACKETS))]
+
+
+def _aggregate_partition(task):
+    """
+    Compute the partial aggregates of one partition. Runs in a worker process.
+
+    Columns that no requested aggregate needs arrive empty, and the partials
+    of aggregates that were not requested are None.
+    """
+    start, volume_typecode, volume_bytes, level_typecode, level_bytes, incident_bytes, threshold, wanted = task
+    volumes = array(volume_typecode)
+    volumes.frombytes(volume_bytes)
+    levels = array(level_typecode)
+    levels.frombytes(level_bytes)
+    incident_counts = array("q")
+    incident_counts.frombytes(incident_bytes)
+
+    level_counts = Counter(levels) if "congestion_distribution" in wanted else None
+    total_volume = sum(volumes) if "total_traffic_volume" in wanted else None
+    brackets = None
+    if "volume_brackets" in wanted:
+        brackets = bytes([bisect_left(VOLUME_BRACKET_LIMITS, volume) for volume in volumes])
+    incident_rows = None
+    if "high_incident_areas" in wanted:
+        incident_rows = array("q", [start + row for row, count in enumerate(incident_counts)
+                                    if count > threshold]).tobytes()
+    return level_counts, total_volume, brackets, incident_rows
+
+
+def _columns(intersection_data):
+    """
+    Return (ids, volumes, level codes, level names, incident counts) for partitioning.
+
+    Stores already hold typed columns. Other mappings are packed in one pass,
+    assigning level codes in order of first appearance. Their volumes are
+    packed as doubles when any of them is a float.
+    """
+    if isinstance(intersection_data, IntersectionStore):
+        columns = intersection_data.export_columns()
+        incident_counts = array("q", map(len, columns["incidents"]))
+        return (columns["ids"], columns["volumes"], array("B", columns["levels"]),
+                CONGESTION_LEVELS, incident_counts)
+
+    codes = {}
+    volume_list = []
+    levels = array("I")
+    incident_counts = array("q")
+    for intersection in intersection_data.values():
+        volume_list.append(intersection["traffic_volume"])
+        levels.append(codes.setdefault(intersection["congestion_level"], len(codes)))
+        incident_counts.append(len(intersection["incident_history"]))
+    try:
+        volumes = array("q", volume_list)
+    except TypeError:
+        volumes = array("d", volume_list)
+    return list(intersection_data), volumes, levels, tuple(codes), incident_counts
+
+
+def map_reduce_aggregates(intersection_data, workers=None, chunk_size=None, threshold=1, executor=None,
+                          aggregates=AGGREGATES):
+    """
+    Compute the citywide aggregates with a process pool.
+
+    Args:
+        intersection_data (dict): The intersection data dictionary or store
+        workers (int): Number of worker processes; defaults to the CPU count
+        chunk_size (int): Intersections per partition; by default each worker
+            gets PARTITIONS_PER_WORKER partitions
+        threshold (int): Incident threshold for the high incident areas
+        executor (Executor): Existing pool to submit to instead of starting one
+        aggregates (iterable): Names from AGGREGATES to compute; all of them by default
+
+    Returns:
+        dict: Results keyed by the requested aggregate names
+    """
+    if intersection_data is None:
+        raise ValueError("Intersection data cannot be None")
+    if workers is not None and workers <= 0:
+        raise ValueError("Number of workers must be positive")
+    if chunk_size is not None and chunk_size <= 0:
+        raise ValueError("Chunk size must be positive")
+    if threshold < 0:
+        raise ValueError("Threshold cannot be negative")
+    wanted = frozenset(aggregates)
+    if not wanted <= set(AGGREGATES):
+        raise ValueError(f"Invalid aggregate. Must be one of {list(AGGREGATES)}")
+
+    ids, volumes, levels, level_names, incident_counts = _columns(intersection_data)
+    count = len(ids)
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(-(-count // (workers * PARTITIONS_PER_WORKER)), 1)
+
+    # Only the columns the requested aggregates read are shipped
+    needs_volumes = bool(wanted & {"total_traffic_volume", "volume_brackets"})
+    needs_levels = "congestion_distribution" in wanted
+    needs_incidents = "high_incident_areas" in wanted
+    tasks = [(start, volumes.typecode, volumes[start:start + chunk_size].tobytes() if needs_volumes else b"",
+              levels.typecode, levels[start:start + chunk_size].tobytes() if needs_levels else b"",
+              incident_counts[start:start + chunk_size].tobytes() if needs_incidents else b"",
+              threshold, wanted)
+             for start in range(0, count, chunk_size)]
+    if executor is not None:
+        partials = executor.map(_aggregate_partition, tasks)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(_aggregate_partition, tasks))
+
+    # Partials arrive in partition order; byte parts are joined once at the end
+    level_counts, total_volume, bracket_parts, incident_parts = Counter(), 0, [], []
+    for partial_counts, partial_total, brackets, incident_rows in partials:
+        if needs_levels:
+            level_counts.update(partial_counts)
+        if "total_traffic_volume" in wanted:
+            total_volume += partial_total
+        if "volume_brackets" in wanted:
+            bracket_parts.append(brackets)
+        if needs_incidents:
+            incident_parts.append(incident_rows)
+
+    results = {}
+    if needs_levels:
+        results["congestion_distribution"] = {level: level_counts[code] for code, level in enumerate(level_names)
+                                              if level_counts[code]}
+    if "total_traffic_volume" in wanted:
+        results["total_traffic_volume"] = total_volume
+    if "volume_brackets" in wanted:
+        brackets = b"".join(bracket_parts)
+        results["volume_brackets"] = {name: list(compress(ids, brackets.translate(mask)))
+                                      for name, mask in zip(VOLUME_BRACKETS, _BRACKET_MASKS)}
+    if needs_incidents:
+        incident_rows = array("q")
+        incident_rows.frombytes(b"".join(incident_parts))
+        if isinstance(intersection_data, IntersectionStore):
+            results["high_incident_areas"] = intersection_data.records(incident_rows)
+        else:
+            results["high_incident_areas"] = {ids[row]: intersection_data[ids[row]] for row in incident_rows}
+    return results
@@ -0,0 +1,432 @@
+"""
+Traffic Query
+Composable intersection queries with an index-aware planner.
+
+Predicates combine with & into a Query. Running a query returns the same
+result as chaining the matching filter functions, without building an
+intermediate dictionary per predicate:
+
+    query = CongestionLevelIs("Severe") & VolumeBetween(1000, 2000) & HasIncident("Accident")
+    results = query.run(intersection_data)
+
+On an IntersectionStore the planner asks every predicate for an estimate of
+its matching rows. Estimates come from maintained counts or secondary
+indexes. The predicate with the smallest estimate drives the query and
+produces candidate rows, and the remaining predicates are checked against
+the store's columns in one pass over those candidates. Plain dictionaries
+are filtered in a single pass with the cheapest checks first.
+
+lazy_view wraps intersection data in a FilterView. The filter functions
+narrow a view into another view instead of building a dictionary, and
+nothing is evaluated until the view is iterated, counted or sliced.
+"""
+
+from collections import namedtuple
+from collections.abc import ItemsView, Mapping, ValuesView
+from itertools import islice
+
+from intersection_store import LEVEL_CODES, IntersectionRecord, IntersectionStore
+
+QueryPlan = namedtuple("QueryPlan", ["driver", "estimate", "residuals"])
+
+
+class Predicate:
+    """
+    A condition on a single intersection.
+
+    Subclasses implement matches for intersection records and row_matcher for
+    store columns. Predicates that can find their rows without a scan also
+    implement estimate and candidate_rows.
+    """
+
+    # Relative cost of one check; cheaper checks run first
+    cost = 0
+
+    def matches(self, intersection):
+        """Return True if an intersection record satisfies the predicate."""
+        raise NotImplementedError
+
+    def row_matcher(self, columns):
+        """Return a function of a row number that checks the predicate against store columns."""
+        raise NotImplementedError
+
+    def estimate(self, store):
+        """Return the estimated number of matching rows, or None if only a scan can tell."""
+        return None
+
+    def candidate_rows(self, store):
+        """Return the matching rows in ascending order."""
+        raise NotImplementedError
+
+    def __and__(self, other):
+        return Query(self) & other
+
+    def __repr__(self):
+        arguments = ", ".join(repr(value) for value in vars(self).values())
+        return f"{type(self).__name__}({arguments})"
+
+
+class CongestionLevelIs(Predicate):
+    """Congestion level equals a level, like filter_by_congestion_level."""
+
+    cost = 0
+
+    def __init__(self, level):
+        if level is None:
+            raise ValueError("Congestion level cannot be None")
+        self.level = level
+
+    def matches(self, intersection):
+        return intersection["congestion_level"] == self.level
+
+    def row_matcher(self, columns):
+        levels, code = columns["levels"], LEVEL_CODES.get(self.level)
+        return lambda row: levels[row] == code
+
+    def estimate(self, store):
+        # The store maintains exact per-level counts
+        return store.congestion_distribution().get(self.level, 0)
+
+    def candidate_rows(self, store):
+        return store.rows_with_congestion_level(self.level)
+
+
+class VolumeBetween(Predicate):
+    """Traffic volume within [min_volume, max_volume], like filter_by_traffic_volume."""
+
+    cost = 1
+
+    def __init__(self, min_volume, max_volume):
+        if min_volume is None or max_volume is None:
+            raise ValueError("Volume range cannot be None")
+        if min_volume < 0:
+            raise ValueError("Minimum volume cannot be negative")
+        if min_volume > max_volume:
+            raise ValueError("Minimum volume cannot be greater than maximum volume")
+        self.min_volume = min_volume
+        self.max_volume = max_volume
+
+    def matches(self, intersection):
+        return self.min_volume <= intersection["traffic_volume"] <= self.max_volume
+
+    def row_matcher(self, columns):
+        volumes, min_volume, max_volume = columns["volumes"], self.min_volume, self.max_volume
+        return lambda row: min_volume <= volumes[row] <= max_volume
+
+    def estimate(self, store):
+        index = store.index("traffic_volume")
+        return index.count_in_range(self.min_volume, self.max_volume) if index is not None else None
+
+    def candidate_rows(self, store):
+        return store.rows_in_volume_range(self.min_volume, self.max_volume)
+
+
+class HasPeakHour(Predicate):
+    """Peak hours list an exact period, like filter_by_peak_hour."""
+
+    cost = 2
+
+    def __init__(self, time_period):
+        if time_period is None:
+            raise ValueError("Time period cannot be None")
+        self.time_period = time_period
+
+    def matches(self, intersection):
+        return self.time_period in intersection["peak_hours"]
+
+    def row_matcher(self, columns):
+        peak_hours, time_period = columns["peak_hours"], self.time_period
+        return lambda row: time_period in peak_hours[row]
+
+    def estimate(self, store):
+        index = store.index("peak_hours")
+        return index.count_with_period(self.time_period) if index is not None else None
+
+    def candidate_rows(self, store):
+        return store.rows_with_peak_hour(self.time_period)
+
+
+class HasIncident(Predicate):
+    """An incident contains incident_type, like filter_by_incident_type."""
+
+    cost = 3
+
+    def __init__(self, incident_type):
+        if incident_type is None:
+            raise ValueError("Incident type cannot be None")
+        self.incident_type = incident_type
+
+    def matches(self, intersection):
+        return any(self.incident_type in incident for incident in intersection["incident_history"])
+
+    def row_matcher(self, columns):
+        incidents, incident_type = columns["incidents"], self.incident_type
+        return lambda row: any(incident_type in incident for incident in incidents[row])
+
+    def estimate(self, store):
+        index = store.index("incident_history")
+        return index.count_containing(self.incident_type) if index is not None else None
+
+    def candidate_rows(self, store):
+        return store.rows_with_incident(self.incident_type)
+
+
+class NearLandmark(Predicate):
+    """A landmark contains landmark, ignoring case, like find_intersections_near_landmark."""
+
+    cost = 4
+
+    def __init__(self, landmark):
+        if landmark is None:
+            raise ValueError("Landmark cannot be None")
+        self.landmark = landmark
+
+    def matches(self, intersection):
+        needle = self.landmark.lower()
+        return any(needle in name.lower() for name in intersection["nearby_landmarks"])
+
+    def row_matcher(self, columns):
+        landmarks, needle = columns["landmarks"], self.landmark.lower()
+        return lambda row: any(needle in name.lower() for name in landmarks[row])
+
+    def estimate(self, store):
+        index = store.index("nearby_landmarks")
+        return index.count_containing(self.landmark) if index is not None else None
+
+    def candidate_rows(self, store):
+        return store.rows_near_landmark(self.landmark)
+
+
+class Query:
+    """
+    Conjunction of predicates, planned and run against intersection data.
+
+    Args:
+        predicates (Predicate): Conditions every result must satisfy
+    """
+
+    def __init__(self, *predicates):
+        for predicate in predicates:
+            if not isinstance(predicate, Predicate):
+                raise ValueError("Query terms must be predicates")
+        self.predicates = tuple(predicates)
+
+    def __and__(self, other):
+        if isinstance(other, Query):
+            return Query(*self.predicates, *other.predicates)
+        return Query(*self.predicates, other)
+
+    def __repr__(self):
+        return " & ".join(repr(predicate) for predicate in self.predicates) or "Query()"
+
+    def plan(self, intersection_data):
+        """
+        Choose the driving predicate and the order of the remaining checks.
+
+        Args:
+            intersection_data (dict): The intersection data dictionary or store
+
+        Returns:
+            QueryPlan: The driving predicate (None for a full scan), its row
+                estimate and the residual predicates in the order they are checked
+        """
+        if not isinstance(intersection_data, IntersectionStore):
+            return QueryPlan(None, len(intersection_data), sorted(self.predicates, key=lambda p: p.cost))
+
+        total = len(intersection_data)
+        estimates = [(predicate.estimate(intersection_data), predicate) for predicate in self.predicates]
+        indexed = [(estimate, predicate.cost, position)
+                   for position, (estimate, predicate) in enumerate(estimates) if estimate is not None]
+        driver, driver_estimate = None, total
+        if indexed:
+            driver_estimate, _, position = min(indexed)
+            driver = self.predicates[position]
+
+        # Most selective residual first, then cheapest; unknown selectivity counts as a full scan
+        residuals = sorted((item for item in estimates if item[1] is not driver),
+                           key=lambda item: (total if item[0] is None else item[0], item[1].cost))
+        return QueryPlan(driver, driver_estimate, [predicate for _, predicate in residuals])
+
+    def _matching_rows(self, store):
+        """Lazily yield the store rows satisfying every predicate, in ascending order."""
+        driver, estimate, residuals = self.plan(store)
+        if driver is None:
+            candidates = range(len(store))
+        elif estimate == 0:
+            return
+        else:
+            candidates = driver.candidate_rows(store)
+        columns = store.export_columns()
+        matchers = [predicate.row_matcher(columns) for predicate in residuals]
+        for row in candidates:
+            for matcher in matchers:
+                if not matcher(row):
+                    break
+            else:
+                yield row
+
+    def iter_matches(self, intersection_data):
+        """
+        Lazily yield (intersection_id, intersection) pairs satisfying every predicate.
+
+        Args:
+            intersection_data (dict): The intersection data dictionary or store
+
+        Yields:
+            tuple: Matching pairs in the original order
+        """
+        if isinstance(intersection_data, IntersectionStore):
+            ids = intersection_data.export_columns()["ids"]
+            for row in self._matching_rows(intersection_data):
+                yield ids[row], IntersectionRecord(intersection_data, row)
+            return
+
+        checks = [predicate.matches for predicate in self.plan(intersection_data).residuals]
+        for iid, intersection in intersection_data.items():
+            for check in checks:
+                if not check(intersection):
+                    break
+            else:
+                yield iid, intersection
+
+    def run(self, intersection_data):
+        """
+        Return the intersections satisfying every predicate.
+
+        Args:
+            intersection_data (dict): The intersection data dictionary or store
+
+        Returns:
+            dict: Filtered intersection dictionary in the original order
+        """
+        if intersection_data is None:
+            raise ValueError("Intersection data cannot be None")
+        if isinstance(intersection_data, IntersectionStore):
+            return intersection_data.records(self._matching_rows(intersection_data))
+        return dict(self.iter_matches(intersection_data))
+
+    def count(self, intersection_data):
+        """Return the number of intersections satisfying every predicate, without collecting them."""
+        if isinstance(intersection_data, IntersectionStore):
+            return sum(1 for _ in self._matching_rows(intersection_data))
+        return sum(1 for _ in self.iter_matches(intersection_data))
+
+
+class _FilterItemsView(ItemsView):
+    def __iter__(self):
+        return self._mapping.query.iter_matches(self._mapping.source)
+
+
+class _FilterValuesView(ValuesView):
+    def __iter__(self):
+        return (intersection for _, intersection in self._mapping.query.iter_matches(self._mapping.source))
+
+
+class FilterView(Mapping):
+    """
+    Read-only, lazily evaluated view of the intersections matching a query.
+
+    The view holds its source and a Query. Iteration evaluates the predicates
+    as it goes, so reading one page stops after that page's matches. len
+    counts matches without building a dictionary. Slicing with view[start:stop]
+    and page return small dictionaries, and materialize returns all results.
+    The view reflects the source as it is when it is read.
+
+    Args:
+        source (dict): The intersection data dictionary or store to filter
+        query (Query): Conditions the intersections must satisfy
+    """
+
+    def __init__(self, source, query=None):
+        if source is None:
+            raise ValueError("Intersection data cannot be None")
+        if isinstance(source, FilterView):
+            query = source.query & (query or Query())
+            source = source.source
+        self.source = source
+        self.query = query or Query()
+
+    def where(self, predicate):
+        """
+        Return a view narrowed by another predicate, without evaluating anything.
+
+        Args:
+            predicate (Predicate): Additional condition
+
+        Returns:
+            FilterView: The narrowed view
+        """
+        return FilterView(self.source, self.query & predicate)
+
+    def __and__(self, predicate):
+        return self.where(predicate)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if any(value is not None and value < 0 for value in (key.start, key.stop, key.step)):
+                raise ValueError("Negative slice bounds are not supported on a lazy view")
+            return dict(islice(self.items(), key.start, key.stop, key.step))
+        intersection = self.source[key]
+        if not all(predicate.matches(intersection) for predicate in self.query.predicates):
+            raise KeyError(key)
+        return intersection
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return (iid for iid, _ in self.query.iter_matches(self.source))
+
+    def __len__(self):
+        return self.query.count(self.source)
+
+    def __bool__(self):
+        # Stop at the first match instead of counting them all
+        return next(self.query.iter_matches(self.source), None) is not None
+
+    def items(self):
+        return _FilterItemsView(self)
+
+    def values(self):
+        return _FilterValuesView(self)
+
+    def page(self, page_number, page_size):
+        """
+        Return one page of matches.
+
+        Args:
+            page_number (int): Zero-based page number
+            page_size (int): Matches per page
+
+        Returns:
+            dict: Up to page_size matching intersections
+        """
+        if page_number is None or page_number < 0:
+            raise ValueError("Page number cannot be None or negative")
+        if page_size is None or page_size <= 0:
+            raise ValueError("Page size must be positive")
+        return self[page_number * page_size:(page_number + 1) * page_size]
+
+    def materialize(self):
+        """Evaluate the view and return every match as a dictionary."""
+        return self.query.run(self.source)
+
+    def __repr__(self):
+        return f"FilterView({self.query!r})"
+
+
+def lazy_view(intersection_data):
+    """
+    Wrap intersection data so the filter functions return lazy views.
+
+    Args:
+        intersection_data (dict): The intersection data dictionary or store
+
+    Returns:
+        FilterView: Unfiltered view of the data
+    """
+    return FilterView(intersection_data)
@@ -0,0 +1,349 @@
+"""
+Traffic Service
+Asyncio ingestion service for live sensor readings.
+
+Sensors connect over TCP or a Unix socket and send one JSON object per line
+in the update format of apply_updates, for example
+{"intersection_id": "I001", "traffic_volume": 940}. A connection parses
+everything that arrived in one read into a list of readings and puts the
+list on a bounded queue. A single applier task waits up to linger seconds
+after the first list arrives, then takes all queued lists, up to max_batch
+readings, and applies them as one apply_updates micro-batch, so the data is
+copied once per batch rather than once per reading. A list that would take
+the batch past max_batch is split, and its rest starts the next batch.
+
+When the queue is full, a connection writes PAUSE to its sensor and stops
+reading until the queue has room, then writes RESUME. While the connection
+is not reading, the socket buffers fill and TCP flow control slows the
+sensor down as well.
+"""
+
+import asyncio
+import json
+import random
+import sys
+from collections import deque, namedtuple
+from contextlib import suppress
+
+from intersection_store import CONGESTION_LEVELS, IntersectionStore
+from traffic_indexes import INDEX_TYPES
+from urban_traffic_analysis_platform import apply_updates, initialize_data
+
+DEFAULT_PORT = 9400
+DEFAULT_MAX_QUEUE = 64
+DEFAULT_MAX_BATCH = 50000
+# Seconds a batch waits for more readings, trading latency for fewer copies
+DEFAULT_LINGER = 0.02
+READ_SIZE = 1 << 16
+# Number of rejected readings kept for inspection
+ERROR_LOG_SIZE = 100
+PAUSE = b"PAUSE\n"
+RESUME = b"RESUME\n"
+
+IngestStats = namedtuple("IngestStats", ["received", "applied", "rejected", "batches", "backpressure_events"])
+
+
+def parse_readings(lines):
+    """
+    Parse JSON reading lines, skipping blank ones.
+
+    The lines are decoded as one JSON array, which is several times faster
+    than decoding them one by one. If that fails, or does not give exactly
+    one object per line, every line is decoded on its own so a malformed
+    line only costs itself.
+
+    Args:
+        lines (list): Lines as bytes, without their line endings
+
+    Returns:
+        tuple: A tuple containing (readings, malformed) where malformed is the
+            number of lines that are not valid JSON
+    """
+    lines = [line for line in lines if line and not line.isspace()]
+    if not lines:
+        return [], 0
+    try:
+        readings = json.loads(b"[" + b",".join(lines) + b"]")
+        if len(readings) == len(lines) and all(type(reading) is dict for reading in readings):
+            return readings, 0
+    except ValueError:
+        pass
+
+    readings = []
+    malformed = 0
+    for line in lines:
+        try:
+            readings.append(json.loads(line))
+        except ValueError:
+            malformed += 1
+    return readings, malformed
+
+
+class IngestionService:
+    """
+    Applies sensor readings to intersection data in micro-batches.
+
+    The current data is available as the data attribute and is replaced after
+    every batch, in the same way the update functions return new data.
+
+    Args:
+        intersection_data (dict): The intersection data dictionary, store or persistent map
+        max_queue (int): Maximum number of queued reading lists before backpressure
+        max_batch (int): Readings applied per batch, at most
+        linger (float): Seconds to wait for more readings before applying a batch
+    """
+
+    def __init__(self, intersection_data, max_queue=DEFAULT_MAX_QUEUE, max_batch=DEFAULT_MAX_BATCH,
+                 linger=DEFAULT_LINGER):
+        if intersection_data is None:
+            raise ValueError("Intersection data cannot be None")
+        if max_queue is None or max_queue <= 0:
+            raise ValueError("Maximum queue size must be positive")
+        if max_batch is None or max_batch <= 0:
+            raise ValueError("Maximum batch size must be positive")
+        if linger is None or linger < 0:
+            raise ValueError("Linger cannot be None or negative")
+        self.data = intersection_data
+        self.max_batch = max_batch
+        self.linger = linger
+        self.recent_errors = deque(maxlen=ERROR_LOG_SIZE)
+        self._queue = asyncio.Queue(max_queue)
+        # Rest of a split list, applied first by the next batch; its list is marked done after that
+        self._carried = []
+        self._carried_items = 0
+        self._servers = []
+        self._applier = None
+        self._received = 0
+        self._applied = 0
+        self._rejected = 0
+        self._batches = 0
+        self._backpressure_events = 0
+
+    def stats(self):
+        """
+        Report the service counters.
+
+        Returns:
+            IngestStats: Readings received, applied and rejected, batches and backpressure events
+        """
+        return IngestStats(self._received, self._applied, self._rejected, self._batches,
+                           self._backpressure_events)
+
+    async def start(self):
+        """Start the applier task if it is not running."""
+        if self._applier is None:
+            self._applier = asyncio.create_task(self._apply_loop())
+
+    async def serve_tcp(self, host="127.0.0.1", port=0):
+        """
+        Accept sensor connections on a TCP port.
+
+        Args:
+            host (str): Interface to listen on
+            port (int): Port to listen on; 0 picks a free port
+
+        Returns:
+            asyncio.Server: The listening server
+        """
+        await self.start()
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        self._servers.append(server)
+        return server
+
+    async def serve_unix(self, path):
+        """
+        Accept sensor connections on a Unix socket.
+
+        Args:
+            path (str): Socket path
+
+        Returns:
+            asyncio.Server: The listening server
+        """
+        await self.start()
+        server = await asyncio.start_unix_server(self._handle_connection, path)
+        self._servers.append(server)
+        return server
+
+    async def submit(self, readings):
+        """
+        Queue a list of readings for the next batch, waiting while the queue is full.
+
+        Args:
+            readings (list): Update dictionaries; the service takes ownership of the list
+
+        Returns:
+            bool: True if the queue was full and the call had to wait
+        """
+        self._received += len(readings)
+        if self._queue.full():
+            self._backpressure_events += 1
+            await self._queue.put(readings)
+            return True
+        self._queue.put_nowait(readings)
+        return False
+
+    async def _handle_connection(self, reader, writer):
+        pending = b""
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                lines = (pending + data).split(b"\n")
+                pending = lines.pop()
+                readings, malformed = parse_readings(lines)
+                self._rejected += malformed
+                if not readings:
+                    continue
+                if self._queue.full():
+                    writer.write(PAUSE)
+                    await self.submit(readings)
+                    writer.write(RESUME)
+                else:
+                    await self.submit(readings)
+            readings, malformed = parse_readings([pending])
+            self._rejected += malformed
+            if readings:
+                await self.submit(readings)
+        finally:
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _apply_loop(self):
+        while True:
+            if self._carried:
+                batch, taken = self._carried, self._carried_items
+                self._carried, self._carried_items = [], 0
+            else:
+                batch = await self._queue.get()
+                taken = 1
+            try:
+                if self.linger and len(batch) < self.max_batch and not self._queue.full():
+                    await asyncio.sleep(self.linger)
+                while len(batch) < self.max_batch and not self._queue.empty():
+                    batch.extend(self._queue.get_nowait())
+                    taken += 1
+                if len(batch) > self.max_batch:
+                    # Only the last list taken can overflow, so its rest is all that is carried
+                    self._carried = batch[self.max_batch:]
+                    del batch[self.max_batch:]
+                    self._carried_items = 1
+                    taken -= 1
+                self._apply(batch)
+            finally:
+                # drain() waits on the queue, so every taken batch is marked done even on failure
+                for _ in range(taken):
+                    self._queue.task_done()
+            # get() does not yield while items are queued, so let the connections read
+            await asyncio.sleep(0)
+
+    def _apply(self, batch):
+        try:
+            self.data, errors = apply_updates(self.data, batch)
+        except Exception:
+            # A reading the validator let through broke the batch; retry one by one
+            # so only the failing readings are rejected
+            errors = []
+            for position, reading in enumerate(batch):
+                try:
+                    self.data, reading_errors = apply_updates(self.data, [reading])
+                except Exception as e:
+                    errors.append((position, f"Update failed: {e}"))
+                else:
+                    errors.extend((position, message) for _, message in reading_errors)
+        self._batches += 1
+        self._applied += len(batch) - len(errors)
+        self._rejected += len(errors)
+        for position, message in errors[-ERROR_LOG_SIZE:]:
+            self.recent_errors.append((batch[position], message))
+
+    async def drain(self):
+        """Wait until every queued reading has been applied."""
+        await self._queue.join()
+
+    async def stop(self):
+        """Stop accepting connections, apply the queued readings and stop the applier."""
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers.clear()
+        if self._applier is not None:
+            await self.drain()
+            self._applier.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._applier
+            self._applier = None
+
+
+def fake_sensor_payload(intersection_ids, count, seed=0):
+    """
+    Build newline-separated JSON readings like those of a loop detector feed.
+
+    Most readings are traffic volumes, some are congestion levels and a few
+    are incidents.
+
+    Args:
+        intersection_ids (list): Intersection IDs to report on
+        count (int): Number of readings
+        seed (int): Random seed
+
+    Returns:
+        bytes: The encoded readings
+    """
+    generator = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        iid = generator.choice(intersection_ids)
+        roll = generator.random()
+        if roll < 0.9:
+            reading = {"intersection_id": iid, "traffic_volume": generator.randrange(3000)}
+        elif roll < 0.99:
+            reading = {"intersection_id": iid, "congestion_level": generator.choice(CONGESTION_LEVELS)}
+        else:
+            reading = {"intersection_id": iid, "incident": generator.choice(("Accident", "Road Work", "Flooding"))}
+        lines.append(json.dumps(reading))
+    return ("\n".join(lines) + "\n").encode() if lines else b""
+
+
+async def run_fake_sensor(payload, host="127.0.0.1", port=None, path=None, write_size=READ_SIZE):
+    """
+    Send a payload of readings to the service like a sensor, honouring flow control.
+
+    Args:
+        payload (bytes): Encoded readings, for example from fake_sensor_payload
+        host (str): Service host for TCP
+        port (int): Service TCP port
+        path (str): Service Unix socket path, used instead of TCP if given
+        write_size (int): Bytes written per write
+
+    Returns:
+        int: Number of PAUSE messages received from the service
+    """
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    view = memoryview(payload)
+    for start in range(0, len(view), write_size):
+        writer.write(view[start:start + write_size])
+        await writer.drain()
+    writer.write_eof()
+    replies = await reader.read()
+    writer.close()
+    with suppress(ConnectionError):
+        await writer.wait_closed()
+    return replies.count(PAUSE)
+
+
+async def _serve(port):
+    intersection_data, _ = initialize_data()
+    service = IngestionService(IntersectionStore.from_dict(intersection_data, indexes=INDEX_TYPES))
+    server = await service.serve_tcp(port=port)
+    print(f"Accepting sensor readings on port {port}")
+    await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(_serve(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT))
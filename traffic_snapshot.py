@@ -0,0 +1,284 @@
+"""
+Traffic Snapshot
+Versioned binary snapshot format for intersection data, opened through mmap.
+
+A snapshot file holds the intersection columns in a fixed layout:
+
+    header          magic, format version, intersection and string counts,
+                    and the congestion, volume and bracket aggregates
+    section table   (offset, length) of every section, in SECTIONS order
+    sections        each one starts on an 8-byte boundary
+
+The string table stores the intersection IDs first, followed by every other
+distinct string, UTF-8 encoded and separated by NUL bytes. Names and the
+entries of the list fields are stored as uint32 indexes into that table.
+Each list field uses an offsets array of count + 1 uint64 values, so the
+entries of row r are values[offsets[r]:offsets[r + 1]]. Numeric columns are
+fixed-width little-endian arrays.
+
+Opening a snapshot copies the numeric columns with a single memcpy each and
+decodes the string table. The list fields stay in the mapped file and are
+decoded row by row on first access.
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from intersection_store import CONGESTION_LEVELS, VOLUME_BRACKETS, IntersectionStore
+
+SNAPSHOT_MAGIC = b"UTRFSNAP"
+SNAPSHOT_VERSION = 1
+SECTIONS = (
+    "strings", "names", "volumes", "latitudes", "longitudes", "levels", "newly_added",
+    "peak_offsets", "peak_values", "landmark_offsets", "landmark_values",
+    "incident_offsets", "incident_values", "extras"
+)
+# Every list field is stored as a pair of (offsets, values) sections
+LIST_FIELDS = (
+    ("peak_hours", "peak_offsets", "peak_values"),
+    ("landmarks", "landmark_offsets", "landmark_values"),
+    ("incidents", "incident_offsets", "incident_values")
+)
+_HEADER = struct.Struct(f"<8sIIQQQ{len(CONGESTION_LEVELS)}Q{len(VOLUME_BRACKETS)}Q")
+_SECTION = struct.Struct("<QQ")
+_ALIGNMENT = 8
+_STRING_SEPARATOR = "\0"
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+class OffsetTupleColumn:
+    """
+    Column of string tuples decoded on demand from snapshot offset arrays.
+
+    Rows are decoded from the mapped file each time they are read. Assigned
+    rows are kept in an overlay and appended rows in a tail list, so the
+    column supports the same mutations as the list it stands in for.
+    """
+
+    __slots__ = ("_strings", "_offsets", "_values", "_base_count", "_overlay", "_tail")
+
+    def __init__(self, strings, offsets, values):
+        self._strings = strings
+        self._offsets = offsets
+        self._values = values
+        self._base_count = len(offsets) - 1
+        self._overlay = {}
+        self._tail = []
+
+    def _decode(self, row):
+        strings = self._strings
+        return tuple([strings[index] for index in self._values[self._offsets[row]:self._offsets[row + 1]]])
+
+    def __len__(self):
+        return self._base_count + len(self._tail)
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if row >= self._base_count:
+            return self._tail[row - self._base_count]
+        if row in self._overlay:
+            return self._overlay[row]
+        if row < 0:
+            raise IndexError("column index out of range")
+        return self._decode(row)
+
+    def __setitem__(self, row, value):
+        if row < 0:
+            row += len(self)
+        if row >= self._base_count:
+            self._tail[row - self._base_count] = value
+        elif row < 0:
+            raise IndexError("column index out of range")
+        else:
+            self._overlay[row] = value
+
+    def __iter__(self):
+        overlay = self._overlay
+        for row in range(self._base_count):
+            yield overlay[row] if row in overlay else self._decode(row)
+        yield from self._tail
+
+    def append(self, value):
+        self._tail.append(value)
+
+    def extend(self, values):
+        self._tail.extend(values)
+
+    def copy(self):
+        clone = OffsetTupleColumn(self._strings, self._offsets, self._values)
+        clone._overlay = self._overlay.copy()
+        clone._tail = self._tail.copy()
+        return clone
+
+
+def _native(typecode, data):
+    """Copy little-endian bytes into a growable array."""
+    values = array(typecode)
+    values.frombytes(data)
+    if _BIG_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def _typed_view(typecode, data):
+    """View little-endian bytes as typed values, copying only on big-endian hosts."""
+    return _native(typecode, data) if _BIG_ENDIAN else data.cast(typecode)
+
+
+def _little_endian(values):
+    if _BIG_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def save_snapshot(intersection_data, path):
+    """
+    Write intersection data to a binary snapshot file.
+
+    Args:
+        intersection_data (dict or IntersectionStore): Intersections to save
+        path (str): Destination file path
+
+    Returns:
+        int: Number of intersections written
+    """
+    if intersection_data is None:
+        raise ValueError("Intersection data cannot be None")
+    if path is None:
+        raise ValueError("Path cannot be None")
+    if not isinstance(intersection_data, IntersectionStore):
+        intersection_data = IntersectionStore.from_dict(intersection_data)
+    columns = intersection_data.export_columns()
+    ids = columns["ids"]
+    count = len(ids)
+
+    # IDs take the first count slots so loading can slice them straight off the table
+    strings = list(ids)
+    string_index = {iid: position for position, iid in enumerate(ids)}
+    if len(string_index) != count or not all(isinstance(iid, str) for iid in ids):
+        raise ValueError("Intersection IDs must be distinct strings")
+
+    def index_of(text):
+        position = string_index.get(text)
+        if position is None:
+            position = string_index[text] = len(strings)
+            strings.append(text)
+        return position
+
+    sections = {"names": array("I", map(index_of, columns["names"]))}
+    for field, offsets_section, values_section in LIST_FIELDS:
+        offsets = array("Q", [0])
+        values = array("I")
+        for entries in columns[field]:
+            values.extend(map(index_of, entries))
+            offsets.append(len(values))
+        sections[offsets_section] = offsets
+        sections[values_section] = values
+    if any(_STRING_SEPARATOR in text for text in strings):
+        raise ValueError("Strings in a snapshot cannot contain NUL characters")
+
+    payloads = {
+        "strings": _STRING_SEPARATOR.join(strings).encode("utf-8"),
+        "volumes": _little_endian(columns["volumes"]),
+        "latitudes": _little_endian(columns["latitudes"]),
+        "longitudes": _little_endian(columns["longitudes"]),
+        "levels": bytes(columns["levels"]),
+        "newly_added": bytes(columns["newly_added"]),
+        "extras": json.dumps({str(row): extra for row, extra in columns["extras"].items()}).encode("utf-8")
+    }
+    payloads.update((name, _little_endian(values)) for name, values in sections.items())
+
+    distribution = intersection_data.congestion_distribution()
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(SECTIONS), count, len(strings),
+        intersection_data.total_traffic_volume(),
+        *(distribution.get(level, 0) for level in CONGESTION_LEVELS),
+        *intersection_data.volume_bracket_counts().values()
+    )
+    position = _HEADER.size + _SECTION.size * len(SECTIONS)
+    table = []
+    for name in SECTIONS:
+        position += -position % _ALIGNMENT
+        table.append((position, len(payloads[name])))
+        position += len(payloads[name])
+
+    with open(path, "wb") as file:
+        file.write(header)
+        for offset, length in table:
+            file.write(_SECTION.pack(offset, length))
+        for name, (offset, _) in zip(SECTIONS, table):
+            file.write(bytes(offset - file.tell()))
+            file.write(payloads[name])
+    return count
+
+
+def load_snapshot(path, indexes=()):
+    """
+    Open a binary snapshot file as an IntersectionStore.
+
+    Args:
+        path (str): Snapshot file path
+        indexes (iterable): Fields to create secondary indexes on, each built on its
+            first use so opening the file does not decode every row
+
+    Returns:
+        IntersectionStore: Store backed by the snapshot columns
+    """
+    if path is None:
+        raise ValueError("Path cannot be None")
+    with open(path, "rb") as file:
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError("Snapshot file is empty")
+    view = memoryview(mapped)
+
+    table_end = _HEADER.size + _SECTION.size * len(SECTIONS)
+    if len(view) < table_end:
+        raise ValueError("Snapshot file is truncated")
+    magic, version, section_count, count, string_count, total_volume, *counts = _HEADER.unpack_from(view)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Not an intersection snapshot file")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}. Expected {SNAPSHOT_VERSION}")
+    if section_count != len(SECTIONS):
+        raise ValueError("Snapshot section table does not match this format version")
+
+    sections = {}
+    for position, name in enumerate(SECTIONS):
+        offset, length = _SECTION.unpack_from(view, _HEADER.size + _SECTION.size * position)
+        if offset + length > len(view):
+            raise ValueError("Snapshot file is truncated")
+        sections[name] = view[offset:offset + length]
+
+    strings = str(sections["strings"], "utf-8").split(_STRING_SEPARATOR) if string_count else []
+    if len(strings) != string_count:
+        raise ValueError("Snapshot string table is corrupt")
+    names = list(map(strings.__getitem__, _typed_view("I", sections["names"])))
+
+    list_columns = {}
+    for field, offsets_section, values_section in LIST_FIELDS:
+        offsets = _typed_view("Q", sections[offsets_section])
+        values = _typed_view("I", sections[values_section])
+        if len(offsets) != count + 1:
+            raise ValueError("Snapshot offsets do not match the intersection count")
+        list_columns[field] = OffsetTupleColumn(strings, offsets, values)
+
+    extras = {int(row): extra for row, extra in json.loads(str(sections["extras"], "utf-8")).items()}
+    level_count = len(CONGESTION_LEVELS)
+    intersection_data = IntersectionStore.from_columns(
+        strings[:count], names,
+        _native("d", sections["latitudes"]), _native("d", sections["longitudes"]),
+        _native("q", sections["volumes"]), bytearray(sections["levels"]),
+        newly_added=bytearray(sections["newly_added"]), extras=extras,
+        aggregates=(counts[:level_count], total_volume, counts[level_count:]),
+        **list_columns
+    )
+    for field in indexes:
+        intersection_data.create_index(field, lazy=True)
+    return intersection_data
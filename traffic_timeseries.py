@@ -0,0 +1,288 @@
+"""
+Traffic Time Series
+Fixed-size ring buffers of timestamped traffic volume samples.
+
+Time is divided into slots of resolution seconds and every intersection keeps
+its latest capacity slots, for example 1440 one-minute slots for a day. A
+series is a few arrays allocated once with the series, so recording a sample
+writes in place and the memory per intersection is fixed by the capacity
+(see bytes_per_series):
+
+- values: each slot's volume plus one, with 0 marking a slot without a sample
+- sums and counts: running totals of the volumes and of the samples, one slot
+  longer than the ring, so the total or sample count of any window is the
+  difference of two entries
+- block maxima: a segment tree over blocks of MAX_BLOCK slots, so a window
+  maximum combines O(log capacity) tree nodes with at most two partial blocks
+
+Running totals wrap around at the width of their arrays. Their differences
+stay exact because volumes are capped so that a full window never sums past
+2**32, and the capacity is below 2**16.
+"""
+
+from array import array
+from collections import namedtuple
+
+DEFAULT_CAPACITY = 1440
+DEFAULT_RESOLUTION = 60
+# Slots per leaf of the block maximum tree
+MAX_BLOCK = 32
+_SUM_MASK = (1 << 32) - 1
+_COUNT_MASK = (1 << 16) - 1
+MAX_CAPACITY = _COUNT_MASK
+
+WindowStats = namedtuple("WindowStats", ["count", "total", "mean", "max"])
+_EMPTY_WINDOW = WindowStats(0, 0, None, None)
+
+
+def bytes_per_series(capacity=DEFAULT_CAPACITY):
+    """
+    Return the array memory of one intersection's series.
+
+    Args:
+        capacity (int): Number of slots kept per intersection
+
+    Returns:
+        int: Bytes of array storage, excluding small fixed object overhead
+    """
+    blocks = -(-capacity // MAX_BLOCK)
+    return 4 * capacity + 4 * (capacity + 1) + 2 * (capacity + 1) + 4 * 2 * blocks
+
+
+class _Series:
+    """Ring buffer arrays and the newest slot of one intersection."""
+
+    __slots__ = ("latest", "values", "sums", "counts", "tree")
+
+    def __init__(self, capacity, blocks):
+        self.latest = None
+        self.values = array("I", bytes(4 * capacity))
+        self.sums = array("I", bytes(4 * (capacity + 1)))
+        self.counts = array("H", bytes(2 * (capacity + 1)))
+        self.tree = array("I", bytes(4 * 2 * blocks))
+
+
+class VolumeHistory:
+    """
+    Volume samples of many intersections in fixed-size ring buffers.
+
+    A series is allocated on an intersection's first sample. Samples newer than
+    the latest slot advance the ring, leaving skipped slots empty; a sample for
+    a slot that is still in the ring replaces that slot's sample.
+
+    Args:
+        capacity (int): Number of slots kept per intersection
+        resolution (int): Slot length in seconds
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, resolution=DEFAULT_RESOLUTION):
+        if capacity is None or not 0 < capacity <= MAX_CAPACITY:
+            raise ValueError(f"Capacity must be between 1 and {MAX_CAPACITY}")
+        if resolution is None or resolution <= 0:
+            raise ValueError("Resolution must be positive")
+        self.capacity = capacity
+        self.resolution = resolution
+        # A full window of maximal samples still fits in the 32-bit running sums
+        self.max_volume = _SUM_MASK // capacity
+        self._blocks = -(-capacity // MAX_BLOCK)
+        self._series = {}
+
+    def __len__(self):
+        return len(self._series)
+
+    def __contains__(self, intersection_id):
+        return intersection_id in self._series
+
+    def memory_bytes(self):
+        """Return the array memory of all allocated series."""
+        return len(self._series) * bytes_per_series(self.capacity)
+
+    def discard(self, intersection_id):
+        """Drop an intersection's series, if it has one."""
+        self._series.pop(intersection_id, None)
+
+    def _slot(self, timestamp):
+        return int(timestamp // self.resolution)
+
+    def _set_value(self, series, position, stored):
+        """Store a slot value and bring its block maximum up to date."""
+        values, tree = series.values, series.tree
+        previous = values[position]
+        values[position] = stored
+        node = position // MAX_BLOCK + self._blocks
+        if stored >= tree[node]:
+            # Raising a maximum only touches the path while it is still the largest
+            while node and tree[node] < stored:
+                tree[node] = stored
+                node >>= 1
+            return
+        if previous != tree[node]:
+            return
+        start = (node - self._blocks) * MAX_BLOCK
+        tree[node] = max(values[start:start + MAX_BLOCK])
+        node >>= 1
+        while node:
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+            node >>= 1
+
+    def _append(self, series, slot, stored):
+        """Write the slot after the latest one and extend the running totals."""
+        capacity = self.capacity
+        self._set_value(series, slot % capacity, stored)
+        current, previous = slot % (capacity + 1), (slot - 1) % (capacity + 1)
+        if stored:
+            series.sums[current] = (series.sums[previous] + stored - 1) & _SUM_MASK
+            series.counts[current] = (series.counts[previous] + 1) & _COUNT_MASK
+        else:
+            series.sums[current] = series.sums[previous]
+            series.counts[current] = series.counts[previous]
+        series.latest = slot
+
+    def record(self, intersection_id, timestamp, volume):
+        """
+        Record a volume sample.
+
+        Args:
+            intersection_id (str): Intersection ID
+            timestamp (float): Sample time in seconds, for example a Unix timestamp
+            volume (int): Traffic volume
+        """
+        if intersection_id is None:
+            raise ValueError("Intersection ID cannot be None")
+        if not isinstance(volume, int) or not 0 <= volume <= self.max_volume:
+            raise ValueError(f"Traffic volume must be an integer between 0 and {self.max_volume}")
+        slot = self._slot(timestamp)
+        series = self._series.get(intersection_id)
+        latest = None if series is None else series.latest
+        if latest is None or slot - latest > self.capacity:
+            # Every retained slot would be skipped, so start from an empty ring
+            series = self._series[intersection_id] = _Series(self.capacity, self._blocks)
+            self._append(series, slot, volume + 1)
+        elif slot > latest:
+            for skipped in range(latest + 1, slot):
+                self._append(series, skipped, 0)
+            self._append(series, slot, volume + 1)
+        elif slot > latest - self.capacity:
+            self._replace(series, slot, volume + 1)
+        else:
+            raise ValueError("Sample is older than the retained history")
+
+    def _replace(self, series, slot, stored):
+        """Replace the sample of a retained slot and shift the later running totals."""
+        capacity = self.capacity
+        position = slot % capacity
+        previous = series.values[position]
+        self._set_value(series, position, stored)
+        volume_change = (stored - 1 if stored else 0) - (previous - 1 if previous else 0)
+        count_change = (1 if stored else 0) - (1 if previous else 0)
+        sums, counts = series.sums, series.counts
+        for later in range(slot, series.latest + 1):
+            position = later % (capacity + 1)
+            sums[position] = (sums[position] + volume_change) & _SUM_MASK
+            counts[position] = (counts[position] + count_change) & _COUNT_MASK
+
+    def _range_max(self, series, low, high):
+        """Return the largest stored value in ring positions low..high, inclusive."""
+        values, tree = series.values, series.tree
+        low_block, high_block = low // MAX_BLOCK, high // MAX_BLOCK
+        if low_block == high_block:
+            return max(values[low:high + 1])
+        result = max(max(values[low:(low_block + 1) * MAX_BLOCK]),
+                     max(values[high_block * MAX_BLOCK:high + 1]))
+        left, right = low_block + 1 + self._blocks, high_block + self._blocks
+        while left < right:
+            if left & 1:
+                result = max(result, tree[left])
+                left += 1
+            if right & 1:
+                right -= 1
+                result = max(result, tree[right])
+            left >>= 1
+            right >>= 1
+        return result
+
+    def window(self, intersection_id, start, end):
+        """
+        Aggregate the samples of the slots from start to end, inclusive.
+
+        The window is clipped to the retained history. Sum and count come from
+        two running total entries and the maximum from the block tree.
+
+        Args:
+            intersection_id (str): Intersection ID
+            start (float): Time in the first slot of the window
+            end (float): Time in the last slot of the window
+
+        Returns:
+            WindowStats: Sample count, total volume, mean and max; mean and max
+                are None when the window holds no sample
+        """
+        if start > end:
+            raise ValueError("Window start must not be after its end")
+        series = self._series.get(intersection_id)
+        if series is None:
+            return _EMPTY_WINDOW
+        capacity = self.capacity
+        first = max(self._slot(start), series.latest - capacity + 1)
+        last = min(self._slot(end), series.latest)
+        if first > last:
+            return _EMPTY_WINDOW
+
+        current, before = last % (capacity + 1), (first - 1) % (capacity + 1)
+        count = (series.counts[current] - series.counts[before]) & _COUNT_MASK
+        if not count:
+            return _EMPTY_WINDOW
+        total = (series.sums[current] - series.sums[before]) & _SUM_MASK
+        low, high = first % capacity, last % capacity
+        if low <= high:
+            largest = self._range_max(series, low, high)
+        else:
+            largest = max(self._range_max(series, low, capacity - 1), self._range_max(series, 0, high))
+        return WindowStats(count, total, total / count, largest - 1)
+
+    def rolling(self, intersection_id, seconds, end=None):
+        """
+        Aggregate the samples of the last seconds up to end.
+
+        Args:
+            intersection_id (str): Intersection ID
+            seconds (float): Window length; covers ceil(seconds / resolution) slots
+            end (float): Time in the last slot of the window; defaults to the latest sample
+
+        Returns:
+            WindowStats: Sample count, total volume, mean and max
+        """
+        if seconds is None or seconds <= 0:
+            raise ValueError("Window length must be positive")
+        series = self._series.get(intersection_id)
+        if series is None:
+            return _EMPTY_WINDOW
+        last = series.latest if end is None else self._slot(end)
+        slots = -(-seconds // self.resolution)
+        return self.window(intersection_id, (last - slots + 1) * self.resolution, last * self.resolution)
+
+    def latest(self, intersection_id):
+        """
+        Return the newest sample of an intersection.
+
+        Returns:
+            tuple: (slot start time, volume), or None if it has no samples
+        """
+        series = self._series.get(intersection_id)
+        if series is None:
+            return None
+        return series.latest * self.resolution, series.values[series.latest % self.capacity] - 1
+
+    def samples(self, intersection_id):
+        """
+        Return the retained samples of an intersection, oldest first.
+
+        Returns:
+            list: (slot start time, volume) pairs
+        """
+        series = self._series.get(intersection_id)
+        if series is None:
+            return []
+        first = series.latest - self.capacity + 1
+        return [(slot * self.resolution, series.values[slot % self.capacity] - 1)
+                for slot in range(first, series.latest + 1) if series.values[slot % self.capacity]]
@@ -0,0 +1,532 @@
+"""
+Traffic WAL
+Write-ahead log and checkpoints for intersection updates.
+
+A log directory holds checkpoints and log segments, named after log sequence
+numbers (LSNs), which count the logged mutations from 1:
+
+    checkpoint-<lsn>.snap   binary snapshot of the data after mutation lsn
+    wal-<lsn>.log           segment whose first record is mutation lsn
+
+A segment starts with a magic header, followed by records of the form
+
+    payload length (uint32), CRC-32 of LSN and payload (uint32), LSN (uint64),
+    payload: kind (uint8) and the kind's fields
+
+Volume, congestion level and incident records are packed with struct, and
+merges and update batches are stored as JSON. Appending a record only adds it
+to an in-memory buffer. A background thread writes the buffer and fsyncs the
+segment every sync_interval seconds, so one fsync commits every record
+appended in that time (group commit); commit() waits until everything
+appended so far is on disk.
+
+A checkpoint starts a new segment, saves the data with save_snapshot and then
+deletes the older checkpoints and segments. Recovery opens the latest
+checkpoint and replays only the records after it, in update batches through
+apply_updates. A record cut short by a crash at the end of the last segment
+is discarded, along with everything after it.
+"""
+
+import json
+import os
+import struct
+import threading
+import zlib
+
+from intersection_store import CONGESTION_LEVELS, MAX_TRAFFIC_VOLUME, IntersectionStore, validate_intersection
+from traffic_snapshot import load_snapshot, save_snapshot
+from urban_traffic_analysis_platform import (
+    add_incident_record,
+    apply_updates,
+    merge_intersection_data,
+    update_congestion_level,
+    update_traffic_volume
+)
+
+WAL_MAGIC = b"UTRFWAL\0"
+WAL_VERSION = 1
+# Seconds between group commits of the background sync thread
+DEFAULT_SYNC_INTERVAL = 0.05
+# Log bytes after which DurableData writes a new checkpoint
+DEFAULT_CHECKPOINT_BYTES = 64 << 20
+
+RECORD_VOLUME = 1
+RECORD_LEVEL = 2
+RECORD_INCIDENT = 3
+RECORD_MERGE = 4
+RECORD_BATCH = 5
+
+_SEGMENT_HEADER = struct.Struct("<8sI")
+_RECORD = struct.Struct("<IIQ")
+_RECORD_PREFIX = struct.Struct("<II")
+_LSN = struct.Struct("<Q")
+_VOLUME = struct.Struct("<Bq")
+_LEVEL = struct.Struct("<BB")
+_INCIDENT = struct.Struct("<BH")
+_CHECKPOINT_PREFIX, _CHECKPOINT_SUFFIX = "checkpoint-", ".snap"
+_SEGMENT_PREFIX, _SEGMENT_SUFFIX = "wal-", ".log"
+
+
+def _file_name(prefix, lsn, suffix):
+    return f"{prefix}{lsn:020d}{suffix}"
+
+
+def _list_files(directory, prefix, suffix):
+    """Return (lsn, path) pairs of the matching files, in LSN order."""
+    files = []
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(suffix):
+            number = name[len(prefix):-len(suffix)]
+            if number.isdigit():
+                files.append((int(number), os.path.join(directory, name)))
+    return sorted(files)
+
+
+def _sync_directory(directory):
+    """Make renames and new files in a directory durable, where the platform allows it."""
+    if os.name != "posix":
+        return
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def _decode_update(payload):
+    """Turn a record payload into an apply_updates update, or None for merge and batch records."""
+    kind = payload[0]
+    if kind == RECORD_VOLUME:
+        volume = _VOLUME.unpack_from(payload)[1]
+        return {"intersection_id": str(payload[_VOLUME.size:], "utf-8"), "traffic_volume": volume}
+    if kind == RECORD_LEVEL:
+        level = CONGESTION_LEVELS[_LEVEL.unpack_from(payload)[1]]
+        return {"intersection_id": str(payload[_LEVEL.size:], "utf-8"), "congestion_level": level}
+    if kind == RECORD_INCIDENT:
+        id_end = _INCIDENT.size + _INCIDENT.unpack_from(payload)[1]
+        return {"intersection_id": str(payload[_INCIDENT.size:id_end], "utf-8"),
+                "incident": str(payload[id_end:], "utf-8")}
+    if kind in (RECORD_MERGE, RECORD_BATCH):
+        return None
+    raise ValueError(f"Unknown log record kind {kind}")
+
+
+def read_segment(path):
+    """
+    Read the valid records of a log segment.
+
+    Args:
+        path (str): Segment file path
+
+    Returns:
+        tuple: A tuple containing (records, valid_length, complete) where records
+            is a list of (lsn, payload) pairs, valid_length the byte length of the
+            valid prefix and complete False if the file ends in a damaged record
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < _SEGMENT_HEADER.size:
+        return [], 0, False
+    magic, version = _SEGMENT_HEADER.unpack_from(data)
+    if magic != WAL_MAGIC:
+        raise ValueError(f"{path} is not an intersection log segment")
+    if version != WAL_VERSION:
+        raise ValueError(f"Unsupported log version {version}. Expected {WAL_VERSION}")
+
+    records = []
+    position = _SEGMENT_HEADER.size
+    view = memoryview(data)
+    while position + _RECORD.size <= len(data):
+        length, checksum, lsn = _RECORD.unpack_from(data, position)
+        start = position + _RECORD.size
+        payload = view[start:start + length]
+        if len(payload) < length or not length:
+            break
+        if zlib.crc32(payload, zlib.crc32(view[position + 8:start])) != checksum:
+            break
+        records.append((lsn, payload))
+        position = start + length
+    return records, position, position == len(data)
+
+
+def recover(directory, indexes=()):
+    """
+    Rebuild intersection data from the latest checkpoint and the log after it.
+
+    Args:
+        directory (str): Log directory
+        indexes (iterable): Fields to create secondary indexes on
+
+    Returns:
+        tuple: A tuple containing (intersection_data, lsn) where intersection_data
+            is an IntersectionStore and lsn the last applied log sequence number
+    """
+    if directory is None:
+        raise ValueError("Log directory cannot be None")
+    checkpoints = _list_files(directory, _CHECKPOINT_PREFIX, _CHECKPOINT_SUFFIX)
+    if checkpoints:
+        lsn, path = checkpoints[-1]
+        intersection_data = load_snapshot(path, indexes)
+    else:
+        lsn = 0
+        intersection_data = IntersectionStore.from_dict({}, indexes)
+
+    segments = _list_files(directory, _SEGMENT_PREFIX, _SEGMENT_SUFFIX)
+    updates = []
+    for position, (first_lsn, path) in enumerate(segments):
+        if first_lsn > lsn + 1:
+            raise ValueError(f"Log records {lsn + 1} to {first_lsn - 1} are missing")
+        records, _, complete = read_segment(path)
+        if not complete and position != len(segments) - 1:
+            raise ValueError(f"Log segment {path} is damaged before its end")
+        for record_lsn, payload in records:
+            if record_lsn <= lsn:
+                continue
+            if record_lsn != lsn + 1:
+                raise ValueError(f"Log record {lsn + 1} is missing")
+            lsn = record_lsn
+            update = _decode_update(payload)
+            if update is not None:
+                updates.append(update)
+                continue
+            if payload[0] == RECORD_BATCH:
+                updates.extend(json.loads(str(payload[1:], "utf-8")))
+                continue
+            if updates:
+                intersection_data, _ = apply_updates(intersection_data, updates)
+                updates = []
+            intersection_data = merge_intersection_data(intersection_data, dict(json.loads(str(payload[1:], "utf-8"))))
+    if updates:
+        intersection_data, _ = apply_updates(intersection_data, updates)
+    return intersection_data, lsn
+
+
+class WriteAheadLog:
+    """
+    Append-only, group-committed log of intersection mutations.
+
+    Opening a log truncates a damaged record at the end of its last segment.
+    The append methods are thread-safe and return the record's LSN.
+
+    Args:
+        directory (str): Log directory, created if missing
+        sync_interval (float): Seconds between group commits; 0 commits on every append
+    """
+
+    def __init__(self, directory, sync_interval=DEFAULT_SYNC_INTERVAL):
+        if directory is None:
+            raise ValueError("Log directory cannot be None")
+        if sync_interval is None or sync_interval < 0:
+            raise ValueError("Sync interval cannot be None or negative")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.sync_interval = sync_interval
+        # _lock guards the buffer and LSN, _sync_lock the file
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._buffer = bytearray()
+        self._closed = False
+
+        checkpoints = _list_files(directory, _CHECKPOINT_PREFIX, _CHECKPOINT_SUFFIX)
+        segments = _list_files(directory, _SEGMENT_PREFIX, _SEGMENT_SUFFIX)
+        self._lsn = checkpoints[-1][0] if checkpoints else 0
+        self._file = None
+        while segments:
+            first_lsn, path = segments.pop()
+            records, valid_length, _ = read_segment(path)
+            if valid_length < _SEGMENT_HEADER.size:
+                # A crash while starting the segment left no usable header
+                os.remove(path)
+                continue
+            self._lsn = max(self._lsn, records[-1][0] if records else first_lsn - 1)
+            self._file = open(path, "r+b")
+            self._file.truncate(valid_length)
+            self._file.seek(valid_length)
+            self._segment_lsn = first_lsn
+            break
+        if self._file is None:
+            self._open_segment(self._lsn + 1)
+        self._durable_lsn = self._lsn
+        self.bytes_since_checkpoint = 0
+
+        self._wake = threading.Event()
+        self._syncer = None
+        if sync_interval:
+            self._syncer = threading.Thread(target=self._sync_loop, name="wal-sync", daemon=True)
+            self._syncer.start()
+
+    @property
+    def lsn(self):
+        """LSN of the latest appended record."""
+        return self._lsn
+
+    @property
+    def durable_lsn(self):
+        """LSN of the latest record known to be on disk."""
+        return self._durable_lsn
+
+    def _open_segment(self, first_lsn):
+        """Start a new segment; called with the sync lock held or from __init__."""
+        path = os.path.join(self.directory, _file_name(_SEGMENT_PREFIX, first_lsn, _SEGMENT_SUFFIX))
+        self._file = open(path, "wb")
+        self._file.write(_SEGMENT_HEADER.pack(WAL_MAGIC, WAL_VERSION))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        _sync_directory(self.directory)
+        self._segment_lsn = first_lsn
+
+    def _append(self, payload):
+        with self._lock:
+            if self._closed:
+                raise ValueError("Write-ahead log is closed")
+            lsn = self._lsn = self._lsn + 1
+            lsn_bytes = _LSN.pack(lsn)
+            buffer = self._buffer
+            buffer += _RECORD_PREFIX.pack(len(payload), zlib.crc32(payload, zlib.crc32(lsn_bytes)))
+            buffer += lsn_bytes
+            buffer += payload
+            self.bytes_since_checkpoint += _RECORD.size + len(payload)
+        if not self.sync_interval:
+            self.commit()
+        return lsn
+
+    def append_volume(self, intersection_id, new_volume):
+        """Log a traffic volume update."""
+        if isinstance(new_volume, bool) or not isinstance(new_volume, int):
+            raise ValueError("Logged traffic volume must be an integer")
+        return self._append(_VOLUME.pack(RECORD_VOLUME, new_volume) + intersection_id.encode("utf-8"))
+
+    def append_level(self, intersection_id, new_level):
+        """Log a congestion level update."""
+        if new_level not in CONGESTION_LEVELS:
+            raise ValueError(f"Invalid congestion level. Must be one of {list(CONGESTION_LEVELS)}")
+        return self._append(_LEVEL.pack(RECORD_LEVEL, CONGESTION_LEVELS.index(new_level)) + intersection_id.encode("utf-8"))
+
+    def append_incident(self, intersection_id, incident):
+        """Log an incident record."""
+        encoded_id = intersection_id.encode("utf-8")
+        return self._append(_INCIDENT.pack(RECORD_INCIDENT, len(encoded_id)) + encoded_id + incident.encode("utf-8"))
+
+    def append_merge(self, new_intersections):
+        """Log a merge of new intersections."""
+        encoded = json.dumps(list(new_intersections.items()), separators=(",", ":")).encode("utf-8")
+        return self._append(bytes((RECORD_MERGE,)) + encoded)
+
+    def append_batch(self, updates):
+        """Log a batch of apply_updates updates."""
+        return self._append(bytes((RECORD_BATCH,)) + json.dumps(updates, separators=(",", ":")).encode("utf-8"))
+
+    def commit(self):
+        """
+        Write and fsync every appended record.
+
+        Concurrent callers share one fsync: a caller whose records were written
+        by another caller's commit returns without writing.
+
+        Returns:
+            int: The durable LSN, at least the LSN of every record appended before the call
+        """
+        target = self._lsn
+        with self._sync_lock:
+            if self._durable_lsn >= target:
+                return self._durable_lsn
+            with self._lock:
+                pending, self._buffer = self._buffer, bytearray()
+                lsn = self._lsn
+            if pending:
+                self._file.write(pending)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._durable_lsn = lsn
+            return lsn
+
+    def _sync_loop(self):
+        while not self._wake.wait(self.sync_interval):
+            if self._lsn != self._durable_lsn:
+                self.commit()
+
+    def checkpoint(self, intersection_data, lsn=None):
+        """
+        Save a checkpoint and delete the checkpoints and segments it replaces.
+
+        The caller must pass the data exactly as of the given LSN and keep
+        other writers out until the call returns.
+
+        Args:
+            intersection_data (dict): Intersection data after the mutation with the given LSN
+            lsn (int): LSN the data reflects; defaults to the latest appended record
+
+        Returns:
+            str: Path of the new checkpoint
+        """
+        if intersection_data is None:
+            raise ValueError("Intersection data cannot be None")
+        lsn = self._lsn if lsn is None else lsn
+        self.commit()
+        with self._sync_lock:
+            if self._lsn == lsn and self._segment_lsn <= lsn:
+                self._file.close()
+                self._open_segment(lsn + 1)
+            path = os.path.join(self.directory, _file_name(_CHECKPOINT_PREFIX, lsn, _CHECKPOINT_SUFFIX))
+            temporary = path + ".tmp"
+            save_snapshot(intersection_data, temporary)
+            with open(temporary, "rb+") as file:
+                os.fsync(file.fileno())
+            os.replace(temporary, path)
+            _sync_directory(self.directory)
+            self.bytes_since_checkpoint = 0
+
+            for checkpoint_lsn, old_path in _list_files(self.directory, _CHECKPOINT_PREFIX, _CHECKPOINT_SUFFIX):
+                if checkpoint_lsn < lsn:
+                    os.remove(old_path)
+            # A segment is obsolete once the next one starts at or before lsn + 1
+            segments = _list_files(self.directory, _SEGMENT_PREFIX, _SEGMENT_SUFFIX)
+            for (_, old_path), (next_lsn, _) in zip(segments, segments[1:]):
+                if next_lsn <= lsn + 1:
+                    os.remove(old_path)
+        return path
+
+    def close(self):
+        """Commit the appended records and close the log."""
+        if self._closed:
+            return
+        self._wake.set()
+        if self._syncer is not None:
+            self._syncer.join()
+        self.commit()
+        with self._lock:
+            self._closed = True
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class DurableData:
+    """
+    Intersection data whose mutations are logged before they become visible.
+
+    Each mutation method runs the matching update function, logs the change
+    and then replaces the data attribute. A change is on disk within the log's
+    sync interval, or once commit() returns. If the directory already holds a
+    log, the data is recovered from it; otherwise intersection_data is saved
+    as the first checkpoint. Recovered data is an IntersectionStore.
+
+    Args:
+        directory (str): Log directory
+        intersection_data (dict): Initial data for a new log directory
+        indexes (iterable): Fields to index in recovered data
+        sync_interval (float): Seconds between group commits
+        checkpoint_bytes (int): Log bytes after which a checkpoint is written
+    """
+
+    def __init__(self, directory, intersection_data=None, indexes=(), sync_interval=DEFAULT_SYNC_INTERVAL,
+                 checkpoint_bytes=DEFAULT_CHECKPOINT_BYTES):
+        if directory is None:
+            raise ValueError("Log directory cannot be None")
+        if checkpoint_bytes is None or checkpoint_bytes <= 0:
+            raise ValueError("Checkpoint size must be positive")
+        existing = os.path.isdir(directory) and (
+            _list_files(directory, _CHECKPOINT_PREFIX, _CHECKPOINT_SUFFIX)
+            or _list_files(directory, _SEGMENT_PREFIX, _SEGMENT_SUFFIX))
+        if not existing and intersection_data is None:
+            raise ValueError("Intersection data cannot be None for a new log")
+        self.checkpoint_bytes = checkpoint_bytes
+        self._write_lock = threading.Lock()
+        self.log = WriteAheadLog(directory, sync_interval)
+        if existing:
+            self.data, lsn = recover(directory, indexes)
+            if lsn != self.log.lsn:
+                raise ValueError("Recovered log sequence number does not match the log")
+        else:
+            self.data = intersection_data
+            self.log.checkpoint(intersection_data)
+
+    def _logged(self, intersection_data, append, *args):
+        """Log a change and publish its result; called with the write lock held."""
+        append(*args)
+        self.data = intersection_data
+        if self.log.bytes_since_checkpoint >= self.checkpoint_bytes:
+            self.log.checkpoint(intersection_data)
+        return intersection_data
+
+    def update_traffic_volume(self, intersection_id, new_volume):
+        """Update and log an intersection's traffic volume; see update_traffic_volume."""
+        if isinstance(new_volume, bool) or not isinstance(new_volume, int):
+            raise ValueError("Logged traffic volume must be an integer")
+        if new_volume > MAX_TRAFFIC_VOLUME:
+            raise ValueError(f"Logged traffic volume cannot exceed {MAX_TRAFFIC_VOLUME}")
+        with self._write_lock:
+            intersection_data = update_traffic_volume(self.data, intersection_id, new_volume)
+            return self._logged(intersection_data, self.log.append_volume, intersection_id, new_volume)
+
+    def update_congestion_level(self, intersection_id, new_level):
+        """Update and log an intersection's congestion level; see update_congestion_level."""
+        with self._write_lock:
+            intersection_data = update_congestion_level(self.data, intersection_id, new_level)
+            return self._logged(intersection_data, self.log.append_level, intersection_id, new_level)
+
+    def add_incident_record(self, intersection_id, incident):
+        """Add and log an incident; see add_incident_record."""
+        if not isinstance(incident, str):
+            raise ValueError("Logged incident must be a string")
+        with self._write_lock:
+            intersection_data = add_incident_record(self.data, intersection_id, incident)
+            return self._logged(intersection_data, self.log.append_incident, intersection_id, incident)
+
+    def merge_intersection_data(self, new_intersections):
+        """
+        Merge and log new intersections; see merge_intersection_data.
+
+        Recovery replays merges into an IntersectionStore, which validates every
+        record, so merged records are validated before anything is logged; a
+        merge that recovery could not replay is rejected instead.
+        """
+        with self._write_lock:
+            intersection_data = merge_intersection_data(self.data, new_intersections)
+            for intersection_id in new_intersections:
+                error = validate_intersection(intersection_data[intersection_id])
+                if error is not None:
+                    raise ValueError(f"Intersection {intersection_id}: {error}")
+            return self._logged(intersection_data, self.log.append_merge, new_intersections)
+
+    def apply_updates(self, updates):
+        """
+        Apply and log a batch of updates; see apply_updates.
+
+        Only the accepted updates are logged, as one record.
+
+        Returns:
+            list: (position, message) pairs for the rejected updates
+        """
+        with self._write_lock:
+            intersection_data, errors = apply_updates(self.data, updates)
+            if intersection_data is not self.data:
+                accepted = updates
+                if errors:
+                    rejected = {position for position, _ in errors}
+                    accepted = [update for position, update in enumerate(updates) if position not in rejected]
+                self._logged(intersection_data, self.log.append_batch, accepted)
+            return errors
+
+    def commit(self):
+        """Wait until every logged change is on disk and return the durable LSN."""
+        return self.log.commit()
+
+    def checkpoint(self):
+        """Save a checkpoint of the current data and compact the log."""
+        with self._write_lock:
+            return self.log.checkpoint(self.data)
+
+    def close(self):
+        """Commit the logged changes and close the log."""
+        self.log.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -3,6 +3,27 @@ Urban Traffic Analysis Platform
 This program demonstrates dictionary operations through an urban traffic analysis system.
 """
 
+import heapq
+import math
+import sys
+import time
+
+from intersection_store import CONGESTION_LEVELS, MAX_TRAFFIC_VOLUME, IntersectionStore
+from persistent_map import PersistentMap
+from traffic_analytics import (
+    get_analytics_backend,
+    vectorized_congestion_distribution,
+    vectorized_high_incident_areas,
+    vectorized_total_traffic_volume,
+    vectorized_volume_brackets
+)
+from traffic_cache import cached_result
+from traffic_indexes import INDEX_TYPES, haversine_distance, parse_time_of_day, parse_time_period
+from traffic_merge import bulk_merge
+from traffic_query import CongestionLevelIs, FilterView, HasIncident, HasPeakHour, NearLandmark, VolumeBetween
+from traffic_parallel import map_reduce_aggregates
+from traffic_snapshot import load_snapshot
+
 def initialize_data():
     """
     Initialize the intersection data with predefined intersections using dictionaries.
@@ -83,6 +104,7 @@ def initialize_data():
     
     return intersection_data, new_intersections
 
+@cached_result
 def filter_by_congestion_level(intersection_data, level):
     """
     Filter intersections by congestion level using dictionary comprehension.
@@ -99,9 +121,15 @@ def filter_by_congestion_level(intersection_data, level):
     if level is None:
         raise ValueError("Congestion level cannot be None")
     
+    if isinstance(intersection_data, FilterView):
+        return intersection_data.where(CongestionLevelIs(level))
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.records(intersection_data.rows_with_congestion_level(level))
+    
     return {iid: intersection for iid, intersection in intersection_data.items() 
             if intersection["congestion_level"] == level}
 
+@cached_result
 def filter_by_traffic_volume(intersection_data, min_volume, max_volume):
     """
     Filter intersections by traffic volume range using dictionary comprehension.
@@ -123,9 +151,15 @@ def filter_by_traffic_volume(intersection_data, min_volume, max_volume):
     if min_volume > max_volume:
         raise ValueError("Minimum volume cannot be greater than maximum volume")
     
+    if isinstance(intersection_data, FilterView):
+        return intersection_data.where(VolumeBetween(min_volume, max_volume))
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.records(intersection_data.rows_in_volume_range(min_volume, max_volume))
+    
     return {iid: intersection for iid, intersection in intersection_data.items() 
             if min_volume <= intersection["traffic_volume"] <= max_volume}
 
+@cached_result
 def filter_by_peak_hour(intersection_data, time_period):
     """
     Filter intersections by peak hour using dictionary comprehension.
@@ -142,9 +176,67 @@ def filter_by_peak_hour(intersection_data, time_period):
     if time_period is None:
         raise ValueError("Time period cannot be None")
     
+    if isinstance(intersection_data, FilterView):
+        return intersection_data.where(HasPeakHour(time_period))
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.records(intersection_data.rows_with_peak_hour(time_period))
+    
     return {iid: intersection for iid, intersection in intersection_data.items() 
             if time_period in intersection["peak_hours"]}
 
+def find_intersections_in_peak_at(intersection_data, time_of_day):
+    """
+    Find intersections whose peak hours include a time of day.
+    
+    Args:
+        intersection_data (dict): The intersection data dictionary
+        time_of_day (str): Time to check (e.g., "08:15")
+    
+    Returns:
+        dict: Filtered intersection dictionary
+    """
+    if intersection_data is None:
+        raise ValueError("Intersection data cannot be None")
+    if time_of_day is None:
+        raise ValueError("Time of day cannot be None")
+    
+    minute = parse_time_of_day(time_of_day) % (24 * 60)
+    
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.records(intersection_data.rows_in_peak_at(minute))
+    
+    return {iid: intersection for iid, intersection in intersection_data.items() 
+            if any(start <= minute < end for period in intersection["peak_hours"] 
+                   for start, end in parse_time_period(period))}
+
+@cached_result
+def filter_by_peak_hour_overlap(intersection_data, time_period):
+    """
+    Filter intersections whose peak hours overlap a time period.
+    
+    Args:
+        intersection_data (dict): The intersection data dictionary
+        time_period (str): Time period to check (e.g., "07:30-08:30")
+    
+    Returns:
+        dict: Filtered intersection dictionary
+    """
+    if intersection_data is None:
+        raise ValueError("Intersection data cannot be None")
+    if time_period is None:
+        raise ValueError("Time period cannot be None")
+    
+    intervals = parse_time_period(time_period)
+    
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.records(intersection_data.rows_with_peak_overlap(intervals))
+    
+    return {iid: intersection for iid, intersection in intersection_data.items() 
+            if any(start < query_end and query_start < end for period in intersection["peak_hours"] 
+                   for start, end in parse_time_period(period) 
+                   for query_start, query_end in intervals)}
+
+@cached_result
 def filter_by_incident_type(intersection_data, incident_type):
     """
     Filter intersections by incident type using dictionary comprehension.
@@ -161,6 +253,11 @@ def filter_by_incident_type(intersection_data, incident_type):
     if incident_type is None:
         raise ValueError("Incident type cannot be None")
     
+    if isinstance(intersection_data, FilterView):
+        return intersection_data.where(HasIncident(incident_type))
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.records(intersection_data.rows_with_incident(incident_type))
+    
     return {iid: intersection for iid, intersection in intersection_data.items() 
             if any(incident_type in incident for incident in intersection["incident_history"])}
 
@@ -180,9 +277,105 @@ def find_intersections_near_landmark(intersection_data, landmark):
     if landmark is None:
         raise ValueError("Landmark cannot be None")
     
+    if isinstance(intersection_data, FilterView):
+        return intersection_data.where(NearLandmark(landmark))
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.records(intersection_data.rows_near_landmark(landmark))
+    
     return {iid: intersection for iid, intersection in intersection_data.items() 
             if any(landmark.lower() in l.lower() for l in intersection["nearby_landmarks"])}
 
+def _validate_point(latitude, longitude):
+    """Raise ValueError unless latitude and longitude form a valid point."""
+    if latitude is None or longitude is None:
+        raise ValueError("Coordinates cannot be None")
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise ValueError("Coordinates must be a valid latitude and longitude")
+
+def find_intersections_within_radius(intersection_data, latitude, longitude, radius_m):
+    """
+    Find intersections within a distance of a point.
+    
+    Args:
+        intersection_data (dict): The intersection data dictionary
+        latitude (float): Latitude of the search center
+        longitude (float): Longitude of the search center
+        radius_m (float): Search radius in meters
+    
+    Returns:
+        dict: Filtered intersection dictionary
+    """
+    if intersection_data is None:
+        raise ValueError("Intersection data cannot be None")
+    _validate_point(latitude, longitude)
+    if radius_m is None or radius_m < 0:
+        raise ValueError("Radius cannot be None or negative")
+    
+    center = (latitude, longitude)
+    
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.records(intersection_data.rows_within_radius(center, radius_m))
+    
+    return {iid: intersection for iid, intersection in intersection_data.items() 
+            if haversine_distance(center, intersection["coordinates"]) <= radius_m}
+
+def find_intersections_in_bbox(intersection_data, min_latitude, min_longitude, max_latitude, max_longitude):
+    """
+    Find intersections inside a latitude/longitude bounding box.
+    
+    Args:
+        intersection_data (dict): The intersection data dictionary
+        min_latitude (float): Southern edge of the box
+        min_longitude (float): Western edge of the box
+        max_latitude (float): Northern edge of the box
+        max_longitude (float): Eastern edge of the box
+    
+    Returns:
+        dict: Filtered intersection dictionary
+    """
+    if intersection_data is None:
+        raise ValueError("Intersection data cannot be None")
+    _validate_point(min_latitude, min_longitude)
+    _validate_point(max_latitude, max_longitude)
+    if min_latitude > max_latitude or min_longitude > max_longitude:
+        raise ValueError("Minimum coordinates cannot be greater than maximum coordinates")
+    
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.records(
+            intersection_data.rows_in_bbox(min_latitude, min_longitude, max_latitude, max_longitude))
+    
+    return {iid: intersection for iid, intersection in intersection_data.items() 
+            if min_latitude <= intersection["coordinates"][0] <= max_latitude 
+            and min_longitude <= intersection["coordinates"][1] <= max_longitude}
+
+def find_nearest_intersections(intersection_data, latitude, longitude, k):
+    """
+    Find the k intersections closest to a point.
+    
+    Args:
+        intersection_data (dict): The intersection data dictionary
+        latitude (float): Latitude of the search point
+        longitude (float): Longitude of the search point
+        k (int): Number of intersections to return
+    
+    Returns:
+        dict: Up to k intersections ordered from nearest to farthest
+    """
+    if intersection_data is None:
+        raise ValueError("Intersection data cannot be None")
+    _validate_point(latitude, longitude)
+    if k is None or k < 0:
+        raise ValueError("Number of intersections cannot be None or negative")
+    
+    center = (latitude, longitude)
+    
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.records(row for _, row in intersection_data.nearest_rows(center, k))
+    
+    nearest_ids = heapq.nsmallest(k, intersection_data, 
+                                  key=lambda iid: haversine_distance(center, intersection_data[iid]["coordinates"]))
+    return {iid: intersection_data[iid] for iid in nearest_ids}
+
 def update_traffic_volume(intersection_data, intersection_id, new_volume):
     """
     Update an intersection's traffic volume.
@@ -205,12 +398,41 @@ def update_traffic_volume(intersection_data, intersection_id, new_volume):
     if intersection_id not in intersection_data:
         raise ValueError(f"Intersection ID {intersection_id} not found")
     
+    if isinstance(intersection_data, IntersectionStore):
+        updated_intersection_data = intersection_data.copy()
+        updated_intersection_data.set_traffic_volume(intersection_id, new_volume)
+        return updated_intersection_data
+    
+    if isinstance(intersection_data, PersistentMap):
+        return intersection_data.set(intersection_id, {**intersection_data[intersection_id], "traffic_volume": new_volume})
+    
     # Create a new dictionary with the updated traffic volume
     updated_intersection_data = intersection_data.copy()
     updated_intersection_data[intersection_id] = {**updated_intersection_data[intersection_id], "traffic_volume": new_volume}
     
     return updated_intersection_data
 
+def record_traffic_volume(intersection_data, history, intersection_id, new_volume, timestamp=None):
+    """
+    Update an intersection's traffic volume and keep the reading in its history.
+    
+    Args:
+        intersection_data (dict): The intersection data dictionary
+        history (VolumeHistory): Ring buffers receiving the volume sample
+        intersection_id (str): Intersection ID to update
+        new_volume (int): New traffic volume
+        timestamp (float): Time of the reading in seconds; defaults to now
+    
+    Returns:
+        dict: Updated intersection data dictionary
+    """
+    if history is None:
+        raise ValueError("Volume history cannot be None")
+    
+    updated_intersection_data = update_traffic_volume(intersection_data, intersection_id, new_volume)
+    history.record(intersection_id, time.time() if timestamp is None else timestamp, new_volume)
+    return updated_intersection_data
+
 def update_congestion_level(intersection_data, intersection_id, new_level):
     """
     Update an intersection's congestion level.
@@ -237,6 +459,14 @@ def update_congestion_level(intersection_data, intersection_id, new_level):
     if intersection_id not in intersection_data:
         raise ValueError(f"Intersection ID {intersection_id} not found")
     
+    if isinstance(intersection_data, IntersectionStore):
+        updated_intersection_data = intersection_data.copy()
+        updated_intersection_data.set_congestion_level(intersection_id, new_level)
+        return updated_intersection_data
+    
+    if isinstance(intersection_data, PersistentMap):
+        return intersection_data.set(intersection_id, {**intersection_data[intersection_id], "congestion_level": new_level})
+    
     # Create a new dictionary with the updated congestion level
     updated_intersection_data = intersection_data.copy()
     updated_intersection_data[intersection_id] = {**updated_intersection_data[intersection_id], "congestion_level": new_level}
@@ -265,6 +495,18 @@ def add_incident_record(intersection_data, intersection_id, incident):
     if intersection_id not in intersection_data:
         raise ValueError(f"Intersection ID {intersection_id} not found")
     
+    if isinstance(intersection_data, IntersectionStore):
+        updated_intersection_data = intersection_data.copy()
+        updated_intersection_data.add_incident(intersection_id, incident)
+        return updated_intersection_data
+    
+    if isinstance(intersection_data, PersistentMap):
+        intersection = intersection_data[intersection_id]
+        if incident in intersection["incident_history"]:
+            return intersection_data
+        return intersection_data.set(intersection_id, 
+                                     {**intersection, "incident_history": [*intersection["incident_history"], incident]})
+    
     # Create a new dictionary with the updated incident history
     updated_intersection_data = intersection_data.copy()
     if incident not in updated_intersection_data[intersection_id]["incident_history"]:
@@ -288,6 +530,9 @@ def merge_intersection_data(existing_intersections, new_intersections):
     if existing_intersections is None or new_intersections is None:
         raise ValueError("Intersection data dictionaries cannot be None")
     
+    if isinstance(existing_intersections, (IntersectionStore, PersistentMap)):
+        return bulk_merge(existing_intersections, new_intersections, policy="overwrite")
+    
     # Create a copy of the existing intersection data
     merged_intersection_data = existing_intersections.copy()
     
@@ -297,12 +542,115 @@ def merge_intersection_data(existing_intersections, new_intersections):
     
     return merged_intersection_data
 
-def calculate_congestion_distribution(intersection_data):
+def _validate_update(intersection_data, update):
+    """
+    Check one batch update item against the rules of the single-update functions.
+    
+    Returns:
+        str: Error message, or None if the update is valid
+    """
+    if not isinstance(update, dict):
+        return "Update must be a dictionary"
+    intersection_id = update.get("intersection_id")
+    if intersection_id is None:
+        return "Intersection ID cannot be None"
+    if not isinstance(intersection_id, str):
+        return "Intersection ID must be a string"
+    if intersection_id not in intersection_data:
+        return f"Intersection ID {intersection_id} not found"
+    if not any(field in update for field in ("traffic_volume", "congestion_level", "incident")):
+        return "Update must contain traffic_volume, congestion_level or incident"
+    if "traffic_volume" in update:
+        new_volume = update["traffic_volume"]
+        if new_volume is None or not isinstance(new_volume, int) or isinstance(new_volume, bool) or new_volume < 0:
+            return "New volume cannot be None or negative"
+        if new_volume > MAX_TRAFFIC_VOLUME:
+            return f"New volume cannot exceed {MAX_TRAFFIC_VOLUME}"
+    if "congestion_level" in update and update["congestion_level"] not in CONGESTION_LEVELS:
+        return f"Invalid congestion level. Must be one of {list(CONGESTION_LEVELS)}"
+    if "incident" in update and (update["incident"] is None or update["incident"] == ""):
+        return "Incident cannot be None or empty"
+    if "incident" in update and not isinstance(update["incident"], str):
+        return "Incident must be a string"
+    return None
+
+def apply_updates(intersection_data, updates):
+    """
+    Apply a batch of traffic volume, congestion level and incident updates.
+    
+    Each update is a dictionary with an "intersection_id" and any of
+    "traffic_volume", "congestion_level" and "incident". Invalid updates are
+    skipped and reported instead of stopping the batch, and the data is
+    copied at most once for the whole batch.
+    
+    Args:
+        intersection_data (dict): The intersection data dictionary
+        updates (list): Update dictionaries, applied in order
+    
+    Returns:
+        tuple: A tuple containing (updated_intersection_data, errors) where errors
+            is a list of (position, message) pairs for the rejected updates
+    """
+    if intersection_data is None:
+        raise ValueError("Intersection data cannot be None")
+    if updates is None:
+        raise ValueError("Updates cannot be None")
+    
+    errors = []
+    valid_updates = []
+    for position, update in enumerate(updates):
+        error = _validate_update(intersection_data, update)
+        if error is None:
+            valid_updates.append(update)
+        else:
+            errors.append((position, error))
+    
+    if not valid_updates:
+        return intersection_data, errors
+    
+    if isinstance(intersection_data, IntersectionStore):
+        changed_fields = {"incident_history" if field == "incident" else field 
+                          for update in valid_updates for field in update if field != "intersection_id"}
+        updated_intersection_data = intersection_data.copy()
+        with updated_intersection_data.bulk_update(len(valid_updates), changed_fields):
+            for update in valid_updates:
+                iid = update["intersection_id"]
+                if "traffic_volume" in update:
+                    updated_intersection_data.set_traffic_volume(iid, update["traffic_volume"])
+                if "congestion_level" in update:
+                    updated_intersection_data.set_congestion_level(iid, update["congestion_level"])
+                if "incident" in update:
+                    updated_intersection_data.add_incident(iid, update["incident"])
+        return updated_intersection_data, errors
+    
+    # Copy each touched intersection once, then apply its updates in place
+    changed_intersections = {}
+    for update in valid_updates:
+        iid = update["intersection_id"]
+        if iid not in changed_intersections:
+            intersection = intersection_data[iid]
+            changed_intersections[iid] = {**intersection, "incident_history": list(intersection["incident_history"])}
+        intersection = changed_intersections[iid]
+        if "traffic_volume" in update:
+            intersection["traffic_volume"] = update["traffic_volume"]
+        if "congestion_level" in update:
+            intersection["congestion_level"] = update["congestion_level"]
+        if "incident" in update and update["incident"] not in intersection["incident_history"]:
+            intersection["incident_history"].append(update["incident"])
+    
+    if isinstance(intersection_data, PersistentMap):
+        return intersection_data.update(changed_intersections), errors
+    
+    return {**intersection_data, **changed_intersections}, errors
+
+@cached_result
+def calculate_congestion_distribution(intersection_data, workers=None):
     """
     Calculate the number of intersections at each congestion level.
     
     Args:
         intersection_data (dict): The intersection data dictionary
+        workers (int): Worker processes to partition the count across; serial if None
     
     Returns:
         dict: Dictionary with congestion levels as keys and counts as values
@@ -310,6 +658,14 @@ def calculate_congestion_distribution(intersection_data):
     if intersection_data is None:
         raise ValueError("Intersection data cannot be None")
     
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.congestion_distribution()
+    if workers is not None:
+        return map_reduce_aggregates(intersection_data, workers,
+                                     aggregates=("congestion_distribution",))["congestion_distribution"]
+    if get_analytics_backend() == "numpy":
+        return vectorized_congestion_distribution(intersection_data)
+    
     congestion_counts = {}
     for intersection in intersection_data.values():
         level = intersection["congestion_level"]
@@ -320,12 +676,14 @@ def calculate_congestion_distribution(intersection_data):
     
     return congestion_counts
 
-def calculate_total_traffic_volume(intersection_data):
+@cached_result
+def calculate_total_traffic_volume(intersection_data, workers=None):
     """
     Calculate the total traffic volume across all intersections.
     
     Args:
         intersection_data (dict): The intersection data dictionary
+        workers (int): Worker processes to partition the sum across; serial if None
     
     Returns:
         int: Total traffic volume
@@ -333,15 +691,24 @@ def calculate_total_traffic_volume(intersection_data):
     if intersection_data is None:
         raise ValueError("Intersection data cannot be None")
     
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.total_traffic_volume()
+    if workers is not None:
+        return map_reduce_aggregates(intersection_data, workers,
+                                     aggregates=("total_traffic_volume",))["total_traffic_volume"]
+    if get_analytics_backend() == "numpy":
+        return vectorized_total_traffic_volume(intersection_data)
+    
     return sum(intersection["traffic_volume"] for intersection in intersection_data.values())
 
-def find_high_incident_areas(intersection_data, threshold=1):
+def find_high_incident_areas(intersection_data, threshold=1, workers=None):
     """
     Find intersections with incidents above a threshold.
     
     Args:
         intersection_data (dict): The intersection data dictionary
         threshold (int): Minimum number of incidents
+        workers (int): Worker processes to partition the scan across; serial if None
     
     Returns:
         dict: Dictionary of high incident intersections
@@ -351,15 +718,50 @@ def find_high_incident_areas(intersection_data, threshold=1):
     if threshold < 0:
         raise ValueError("Threshold cannot be negative")
     
+    # The incident count index answers from the buckets above the threshold alone
+    if isinstance(intersection_data, IntersectionStore) and intersection_data.has_index("incident_count"):
+        return intersection_data.records(intersection_data.rows_with_incident_count_above(threshold))
+    if workers is not None:
+        return map_reduce_aggregates(intersection_data, workers, threshold=threshold,
+                                     aggregates=("high_incident_areas",))["high_incident_areas"]
+    if get_analytics_backend() == "numpy":
+        return vectorized_high_incident_areas(intersection_data, threshold)
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.records(intersection_data.rows_with_incident_count_above(threshold))
+    
     return {iid: intersection for iid, intersection in intersection_data.items() 
             if len(intersection["incident_history"]) > threshold}
 
-def create_volume_brackets(intersection_data):
+def top_k_incident_areas(intersection_data, k):
+    """
+    Find the intersections with the most recorded incidents.
+    
+    Args:
+        intersection_data (dict): The intersection data dictionary
+        k (int): Number of intersections to return
+    
+    Returns:
+        dict: Up to k intersections ordered from most to fewest incidents, ties in data order
+    """
+    if intersection_data is None:
+        raise ValueError("Intersection data cannot be None")
+    if k is None or k < 0:
+        raise ValueError("Number of intersections cannot be None or negative")
+    
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.records(intersection_data.top_rows_by_incident_count(k))
+    
+    # nlargest keeps equal counts in data order without sorting the whole city
+    top_ids = heapq.nlargest(k, intersection_data, key=lambda iid: len(intersection_data[iid]["incident_history"]))
+    return {iid: intersection_data[iid] for iid in top_ids}
+
+def create_volume_brackets(intersection_data, workers=None):
     """
     Group intersections into traffic volume brackets.
     
     Args:
         intersection_data (dict): The intersection data dictionary
+        workers (int): Worker processes to partition the grouping across; serial if None
     
     Returns:
         dict: Dictionary with volume brackets as keys and lists of intersection IDs as values
@@ -367,6 +769,14 @@ def create_volume_brackets(intersection_data):
     if intersection_data is None:
         raise ValueError("Intersection data cannot be None")
     
+    if workers is not None:
+        return map_reduce_aggregates(intersection_data, workers,
+                                     aggregates=("volume_brackets",))["volume_brackets"]
+    if get_analytics_backend() == "numpy":
+        return vectorized_volume_brackets(intersection_data)
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.volume_brackets()
+    
     volume_brackets = {
         "low": [],       # 0-750
         "medium": [],    # 751-1500
@@ -387,6 +797,54 @@ def create_volume_brackets(intersection_data):
     
     return volume_brackets
 
+def top_intersections_by_volume(intersection_data, n):
+    """
+    Find the intersections with the highest traffic volumes.
+    
+    Args:
+        intersection_data (dict): The intersection data dictionary
+        n (int): Number of intersections to return
+    
+    Returns:
+        dict: Up to n intersections ordered from highest to lowest volume
+    """
+    if intersection_data is None:
+        raise ValueError("Intersection data cannot be None")
+    if n is None or n < 0:
+        raise ValueError("Number of intersections cannot be None or negative")
+    
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.records(intersection_data.top_rows_by_volume(n))
+    
+    top_ids = heapq.nlargest(n, intersection_data, key=lambda iid: intersection_data[iid]["traffic_volume"])
+    return {iid: intersection_data[iid] for iid in top_ids}
+
+@cached_result
+def calculate_volume_percentile(intersection_data, percentile):
+    """
+    Calculate a traffic volume percentile using the nearest-rank method.
+    
+    Args:
+        intersection_data (dict): The intersection data dictionary
+        percentile (float): Percentile between 0 and 100
+    
+    Returns:
+        int: Traffic volume at the requested percentile
+    """
+    if intersection_data is None:
+        raise ValueError("Intersection data cannot be None")
+    if percentile is None or not 0 <= percentile <= 100:
+        raise ValueError("Percentile must be between 0 and 100")
+    if not intersection_data:
+        raise ValueError("Intersection data cannot be empty")
+    
+    rank = max(math.ceil(percentile / 100 * len(intersection_data)), 1) - 1
+    
+    if isinstance(intersection_data, IntersectionStore):
+        return intersection_data.volume_at_rank(rank)
+    
+    return sorted(intersection["traffic_volume"] for intersection in intersection_data.values())[rank]
+
 
 def get_formatted_intersection(iid, intersection):
     """
@@ -471,13 +929,22 @@ def display_data(data, data_type):
         print(f"\n{data_type}:")
         print(data)
 
-def main():
-    """Main program function."""
+def main(snapshot_path=None):
+    """
+    Main program function.
+    
+    Args:
+        snapshot_path (str): Binary snapshot to open instead of the built-in intersections
+    """
     intersection_data, new_intersections = initialize_data()
+    if snapshot_path is not None:
+        intersection_data = load_snapshot(snapshot_path, indexes=INDEX_TYPES)
+    else:
+        intersection_data = IntersectionStore.from_dict(intersection_data, indexes=INDEX_TYPES)
     
     while True:
         # Show basic info about the data
-        congestion_levels = set(intersection["congestion_level"] for intersection in intersection_data.values())
+        congestion_levels = set(calculate_congestion_distribution(intersection_data))
         
         print(f"\n===== URBAN TRAFFIC ANALYSIS PLATFORM =====")
         print(f"Total Intersections: {len(intersection_data)}")
@@ -507,7 +974,10 @@ def main():
             print("3. Filter by Peak Hour")
             print("4. Filter by Incident Type")
             print("5. Find Intersections Near Landmark")
-            filter_choice = input("Select filter option (1-5): ")
+            print("6. Find Intersections in Peak at a Time")
+            print("7. Filter by Overlapping Peak Hours")
+            print("8. Find Intersections Within Radius")
+            filter_choice = input("Select filter option (1-8): ")
             
             if filter_choice == "1":
                 level = input("Enter congestion level to filter by (Low, Moderate, High, Severe, Critical): ")
@@ -538,6 +1008,32 @@ def main():
                 filtered = find_intersections_near_landmark(intersection_data, landmark)
                 display_data(filtered, "filtered")
             
+            elif filter_choice == "6":
+                try:
+                    time_of_day = input("Enter time of day (e.g., '08:15'): ")
+                    filtered = find_intersections_in_peak_at(intersection_data, time_of_day)
+                    display_data(filtered, "filtered")
+                except ValueError as e:
+                    print(f"Error: {e}")
+            
+            elif filter_choice == "7":
+                try:
+                    time_period = input("Enter time period (e.g., '07:30-08:30'): ")
+                    filtered = filter_by_peak_hour_overlap(intersection_data, time_period)
+                    display_data(filtered, "filtered")
+                except ValueError as e:
+                    print(f"Error: {e}")
+            
+            elif filter_choice == "8":
+                try:
+                    latitude = float(input("Enter latitude: "))
+                    longitude = float(input("Enter longitude: "))
+                    radius_m = float(input("Enter radius in meters: "))
+                    filtered = find_intersections_within_radius(intersection_data, latitude, longitude, radius_m)
+                    display_data(filtered, "filtered")
+                except ValueError as e:
+                    print(f"Error: {e}")
+            
             else:
                 print("Invalid choice.")
         
@@ -595,7 +1091,8 @@ def main():
             print("2. Total Traffic Volume")
             print("3. High Incident Areas")
             print("4. Traffic Volume Brackets")
-            stats_choice = input("Select statistics option (1-4): ")
+            print("5. Top Incident Hotspots")
+            stats_choice = input("Select statistics option (1-5): ")
             
             if stats_choice == "1":
                 congestion_distribution = calculate_congestion_distribution(intersection_data)
@@ -617,6 +1114,14 @@ def main():
                 volume_brackets = create_volume_brackets(intersection_data)
                 display_data(volume_brackets, "volume_brackets")
             
+            elif stats_choice == "5":
+                try:
+                    k = int(input("Enter number of hotspots (default 5): ") or "5")
+                    hotspots = top_k_incident_areas(intersection_data, k)
+                    display_data(hotspots, "high_incidents")
+                except ValueError as e:
+                    print(f"Error: {e}")
+            
             else:
                 print("Invalid choice.")
         
@@ -624,4 +1129,4 @@ def main():
             print("Invalid choice. Please try again.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
\ No newline at end of file